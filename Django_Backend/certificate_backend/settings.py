@@ -42,6 +42,129 @@ BLOCKCHAIN_URL = os.getenv('BLOCKCHAIN_URL')
 CONTRACT_ADDRESS = os.getenv('CONTRACT_ADDRESS')
 BLOCKCHAIN_NETWORK_ID = os.getenv('BLOCKCHAIN_NETWORK_ID')
 
+# Backoff (seconds) between background reconnect attempts when the node is down
+BLOCKCHAIN_RECONNECT_MIN_BACKOFF = float(os.getenv('BLOCKCHAIN_RECONNECT_MIN_BACKOFF', '1'))
+BLOCKCHAIN_RECONNECT_MAX_BACKOFF = float(os.getenv('BLOCKCHAIN_RECONNECT_MAX_BACKOFF', '60'))
+
+# RPC connection pool (per worker process) and timeouts, in seconds
+BLOCKCHAIN_RPC_POOL_SIZE = int(os.getenv('BLOCKCHAIN_RPC_POOL_SIZE', '10'))
+BLOCKCHAIN_RPC_CONNECT_TIMEOUT = float(os.getenv('BLOCKCHAIN_RPC_CONNECT_TIMEOUT', '3'))
+BLOCKCHAIN_RPC_READ_TIMEOUT = float(os.getenv('BLOCKCHAIN_RPC_READ_TIMEOUT', '10'))
+BLOCKCHAIN_RECEIPT_TIMEOUT = float(os.getenv('BLOCKCHAIN_RECEIPT_TIMEOUT', '120'))
+
+# Total time a single API request may spend talking to the node
+BLOCKCHAIN_VERIFY_DEADLINE = float(os.getenv('BLOCKCHAIN_VERIFY_DEADLINE', '5'))
+BLOCKCHAIN_ISSUE_DEADLINE = float(os.getenv('BLOCKCHAIN_ISSUE_DEADLINE', '130'))
+
+# Background receipt tracking for asynchronous issuance
+BLOCKCHAIN_RECEIPT_POLL_INTERVAL = float(os.getenv('BLOCKCHAIN_RECEIPT_POLL_INTERVAL', '2'))
+BLOCKCHAIN_PENDING_TX_TIMEOUT = int(os.getenv('BLOCKCHAIN_PENDING_TX_TIMEOUT', '600'))
+# Blocks (including the one it was mined in) before a transaction counts as final,
+# and how far back mined certificates are re-checked for reorgs
+BLOCKCHAIN_CONFIRMATION_DEPTH = int(os.getenv('BLOCKCHAIN_CONFIRMATION_DEPTH', '1'))
+BLOCKCHAIN_REORG_CHECK_DEPTH = int(os.getenv('BLOCKCHAIN_REORG_CHECK_DEPTH', '64'))
+
+# Seconds an issuer account may sit idle before its nonce is resynced from the node
+BLOCKCHAIN_NONCE_RESYNC_AFTER = int(os.getenv('BLOCKCHAIN_NONCE_RESYNC_AFTER', '30'))
+
+# Issuer accounts that transactions are spread across (comma separated).
+# Unlocked node accounts send through eth_sendTransaction; private keys sign locally.
+# With neither set, the node's first account is used.
+BLOCKCHAIN_SENDER_ACCOUNTS = [a.strip() for a in os.getenv('BLOCKCHAIN_SENDER_ACCOUNTS', '').split(',') if a.strip()]
+BLOCKCHAIN_SENDER_PRIVATE_KEYS = [k.strip() for k in os.getenv('BLOCKCHAIN_SENDER_PRIVATE_KEYS', '').split(',') if k.strip()]
+
+# Bulk issuance: most certificates per issueCertificates transaction, and the gas
+# budget per transaction (defaults to 80% of the block gas limit when unset)
+BLOCKCHAIN_BULK_ISSUE_MAX_BATCH = int(os.getenv('BLOCKCHAIN_BULK_ISSUE_MAX_BATCH', '500'))
+BLOCKCHAIN_BULK_ISSUE_GAS_TARGET = int(os.getenv('BLOCKCHAIN_BULK_ISSUE_GAS_TARGET', '0')) or None
+
+# How issued certificates reach the chain: 'direct' stores each certificate in the
+# contract, 'merkle' queues them and anchors one Merkle root per batch
+# (see the anchor_certificates management command). A batch claimed by an anchorer
+# that died before sending its root is queued again after the claim timeout (seconds)
+CERTIFICATE_ANCHORING_MODE = os.getenv('CERTIFICATE_ANCHORING_MODE', 'direct')
+CERTIFICATE_ANCHOR_BATCH_SIZE = int(os.getenv('CERTIFICATE_ANCHOR_BATCH_SIZE', '10000'))
+CERTIFICATE_ANCHOR_CLAIM_TIMEOUT = int(os.getenv('CERTIFICATE_ANCHOR_CLAIM_TIMEOUT', '600'))
+
+# Contract event indexer (manage.py index_chain): first block to scan, blocks per
+# eth_getLogs request and seconds between polls once caught up
+BLOCKCHAIN_INDEX_START_BLOCK = int(os.getenv('BLOCKCHAIN_INDEX_START_BLOCK', '0'))
+BLOCKCHAIN_INDEX_BLOCK_RANGE = int(os.getenv('BLOCKCHAIN_INDEX_BLOCK_RANGE', '2000'))
+BLOCKCHAIN_INDEX_POLL_INTERVAL = float(os.getenv('BLOCKCHAIN_INDEX_POLL_INTERVAL', '5'))
+# Backfill tuning: the block window adapts between 1 and MAX_BLOCK_RANGE, aiming for
+# about TARGET_LOGS logs per request, with up to CONCURRENCY requests in flight
+BLOCKCHAIN_INDEX_MAX_BLOCK_RANGE = int(os.getenv('BLOCKCHAIN_INDEX_MAX_BLOCK_RANGE', '100000'))
+BLOCKCHAIN_INDEX_TARGET_LOGS = int(os.getenv('BLOCKCHAIN_INDEX_TARGET_LOGS', '5000'))
+BLOCKCHAIN_INDEX_CONCURRENCY = int(os.getenv('BLOCKCHAIN_INDEX_CONCURRENCY', '4'))
+
+# Where verification reads chain state from: 'chain' calls the contract on every
+# request, 'index' trusts rows the event indexer (or receipt tracker) has confirmed
+CERTIFICATE_VERIFICATION_SOURCE = os.getenv('CERTIFICATE_VERIFICATION_SOURCE', 'chain')
+
+# Verification cache in front of verifyCertificate calls: entries per worker, local
+# TTL in seconds, and the TTL in the shared Django cache (0 disables the shared tier)
+CERTIFICATE_VERIFY_CACHE_SIZE = int(os.getenv('CERTIFICATE_VERIFY_CACHE_SIZE', '10000'))
+CERTIFICATE_VERIFY_CACHE_TTL = int(os.getenv('CERTIFICATE_VERIFY_CACHE_TTL', '60'))
+CERTIFICATE_VERIFY_CACHE_SHARED_TTL = int(os.getenv('CERTIFICATE_VERIFY_CACHE_SHARED_TTL', '0'))
+CERTIFICATE_VERIFY_CACHE_ALIAS = os.getenv('CERTIFICATE_VERIFY_CACHE_ALIAS', 'default')
+
+# Bloom filter of known certificate hashes used to reject never-issued hashes:
+# expected number of certificates, target false-positive rate, and the seconds between
+# the background thread's database refreshes. Rows are re-scanned until they are
+# CERTIFICATE_INSERT_SETTLE_SECONDS old, the longest a certificate insert transaction may stay open
+CERTIFICATE_BLOOM_CAPACITY = int(os.getenv('CERTIFICATE_BLOOM_CAPACITY', '1000000'))
+CERTIFICATE_BLOOM_ERROR_RATE = float(os.getenv('CERTIFICATE_BLOOM_ERROR_RATE', '0.001'))
+CERTIFICATE_BLOOM_REFRESH_INTERVAL = float(os.getenv('CERTIFICATE_BLOOM_REFRESH_INTERVAL', '1'))
+CERTIFICATE_INSERT_SETTLE_SECONDS = float(os.getenv('CERTIFICATE_INSERT_SETTLE_SECONDS', '60'))
+
+# Memory-mapped snapshot of all certificate hashes shared by every worker, written by
+# manage.py build_hash_snapshot (empty disables it), and how often workers look for a new file
+CERTIFICATE_HASH_SNAPSHOT_PATH = os.getenv('CERTIFICATE_HASH_SNAPSHOT_PATH', '')
+CERTIFICATE_HASH_SNAPSHOT_CHECK_INTERVAL = float(os.getenv('CERTIFICATE_HASH_SNAPSHOT_CHECK_INTERVAL', '5'))
+
+# Certificate list: default and largest keyset page sizes
+CERTIFICATE_LIST_PAGE_SIZE = int(os.getenv('CERTIFICATE_LIST_PAGE_SIZE', '50'))
+CERTIFICATE_LIST_MAX_PAGE_SIZE = int(os.getenv('CERTIFICATE_LIST_MAX_PAGE_SIZE', '500'))
+
+# Search endpoint: default and largest number of ranked results
+CERTIFICATE_SEARCH_LIMIT = int(os.getenv('CERTIFICATE_SEARCH_LIMIT', '20'))
+CERTIFICATE_SEARCH_MAX_LIMIT = int(os.getenv('CERTIFICATE_SEARCH_MAX_LIMIT', '100'))
+
+# Hash prefix lookup: shortest prefix in hex characters and most candidates listed
+CERTIFICATE_LOOKUP_MIN_PREFIX = int(os.getenv('CERTIFICATE_LOOKUP_MIN_PREFIX', '4'))
+CERTIFICATE_LOOKUP_MAX_CANDIDATES = int(os.getenv('CERTIFICATE_LOOKUP_MAX_CANDIDATES', '10'))
+
+# Registry export: rows fetched per database round trip, and bytes buffered
+# before each block is sent
+CERTIFICATE_EXPORT_CHUNK_SIZE = int(os.getenv('CERTIFICATE_EXPORT_CHUNK_SIZE', '2000'))
+CERTIFICATE_EXPORT_BLOCK_BYTES = int(os.getenv('CERTIFICATE_EXPORT_BLOCK_BYTES', '65536'))
+
+# Batch verification: hashes accepted per request, eth_calls per JSON-RPC batch
+VERIFY_BATCH_MAX_HASHES = int(os.getenv('VERIFY_BATCH_MAX_HASHES', '1000'))
+BLOCKCHAIN_RPC_BATCH_SIZE = int(os.getenv('BLOCKCHAIN_RPC_BATCH_SIZE', '200'))
+# Hashes per verifyCertificates eth_call; chunks over the node's gas cap are split
+BLOCKCHAIN_VERIFY_CHUNK_SIZE = int(os.getenv('BLOCKCHAIN_VERIFY_CHUNK_SIZE', '250'))
+
+# CSV bulk verification: rows verified per chunk, and the most rows read from one file
+CERTIFICATE_BULK_VERIFY_CHUNK_SIZE = int(os.getenv('CERTIFICATE_BULK_VERIFY_CHUNK_SIZE', '500'))
+CERTIFICATE_BULK_VERIFY_MAX_ROWS = int(os.getenv('CERTIFICATE_BULK_VERIFY_MAX_ROWS', '200000'))
+
+# Background job queue (manage.py run_workers). With CERTIFICATE_BACKGROUND_JOBS the issue
+# endpoint only creates the certificate and queues the transaction, QR code and PDF hash.
+# Concurrency limits cap the jobs of a type run at once by one worker process,
+# e.g. CERTIFICATE_JOB_CONCURRENCY_LIMITS=issue_certificate=2,generate_qr_code=4
+CERTIFICATE_BACKGROUND_JOBS = os.getenv('CERTIFICATE_BACKGROUND_JOBS', 'False') == 'True'
+CERTIFICATE_JOB_LEASE_SECONDS = int(os.getenv('CERTIFICATE_JOB_LEASE_SECONDS', '300'))
+CERTIFICATE_JOB_RETRY_BACKOFF = float(os.getenv('CERTIFICATE_JOB_RETRY_BACKOFF', '5'))
+CERTIFICATE_JOB_RETRY_MAX_BACKOFF = float(os.getenv('CERTIFICATE_JOB_RETRY_MAX_BACKOFF', '600'))
+CERTIFICATE_JOB_POLL_INTERVAL = float(os.getenv('CERTIFICATE_JOB_POLL_INTERVAL', '1'))
+CERTIFICATE_JOB_RETENTION_DAYS = int(os.getenv('CERTIFICATE_JOB_RETENTION_DAYS', '7'))
+CERTIFICATE_JOB_CONCURRENCY_LIMITS = {
+    name.strip(): int(limit)
+    for name, limit in (item.split('=', 1) for item in os.getenv('CERTIFICATE_JOB_CONCURRENCY_LIMITS', '').split(',')
+                        if '=' in item)
+}
+
 CORS_ALLOW_ALL_ORIGINS = True
 
 CORS_ALLOWED_ORIGINS = [
@@ -0,0 +1,132 @@
+# certificates/anchoring.py
+"""
+Merkle anchoring mode.
+
+With CERTIFICATE_ANCHORING_MODE = 'merkle', issued certificates are queued
+instead of being written to the contract one by one. anchor_pending() builds
+a Merkle tree over a batch of queued hashes, anchors only the root on chain
+and stores each certificate's inclusion proof. The receipt tracker then
+confirms the batch from the anchoring transaction.
+
+Several anchorers can run at once: each claims its batch by moving the rows
+from queued to anchoring before building the tree, so no certificate ends up
+under two roots.
+
+Verifying an anchored certificate is a local proof check plus one cached
+lookup of the root.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .blockchain import (
+    SmartContractError,
+    anchor_merkle_root,
+    anchored_roots,
+)
+from .merkle import build_merkle_tree, verify_merkle_proof
+from .models import Certificate
+
+ANCHORING_MODE_DIRECT = 'direct'
+ANCHORING_MODE_MERKLE = 'merkle'
+
+ANCHOR_BATCH_SIZE = getattr(settings, 'CERTIFICATE_ANCHOR_BATCH_SIZE', 10000)
+ANCHOR_CLAIM_TIMEOUT = getattr(settings, 'CERTIFICATE_ANCHOR_CLAIM_TIMEOUT', 600)
+
+
+class ClaimConflict(Exception):
+    """Another anchorer claimed some of the rows first; the claim is rolled back"""
+    pass
+
+
+def is_merkle_mode():
+    return getattr(settings, 'CERTIFICATE_ANCHORING_MODE', ANCHORING_MODE_DIRECT) == ANCHORING_MODE_MERKLE
+
+
+def release_stale_claims(timeout=ANCHOR_CLAIM_TIMEOUT):
+    """Queue again the rows of anchorers that died before sending their root"""
+    return Certificate.objects.filter(
+        chain_status=Certificate.CHAIN_STATUS_ANCHORING,
+        transaction_hash__isnull=True,
+        pending_since__lt=timezone.now() - timedelta(seconds=timeout),
+    ).update(chain_status=Certificate.CHAIN_STATUS_QUEUED, pending_since=None)
+
+
+def claim_batch(batch_size):
+    """
+    Move up to batch_size queued certificates to anchoring and return their ids.
+    The conditional UPDATE must claim every selected row, so two anchorers
+    never share one even where SELECT ... FOR UPDATE does not lock (SQLite).
+    """
+    try:
+        with transaction.atomic():
+            ids = list(
+                Certificate.objects.select_for_update(skip_locked=True)
+                .filter(chain_status=Certificate.CHAIN_STATUS_QUEUED)
+                .order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            claimed = Certificate.objects.filter(id__in=ids, chain_status=Certificate.CHAIN_STATUS_QUEUED).update(
+                chain_status=Certificate.CHAIN_STATUS_ANCHORING, pending_since=timezone.now())
+            if claimed != len(ids):
+                raise ClaimConflict()
+    except ClaimConflict:
+        return []
+    return ids
+
+
+def anchor_pending(batch_size=ANCHOR_BATCH_SIZE):
+    """
+    Anchor one batch of queued certificates under a single Merkle root.
+    Returns how many certificates were anchored. A batch whose transaction
+    fails to send goes back to the queue.
+    """
+    release_stale_claims()
+    ids = claim_batch(batch_size)
+    if not ids:
+        return 0
+    batch = list(Certificate.objects.filter(id__in=ids).order_by('id'))
+
+    root, proofs = build_merkle_tree([certificate.cert_hash for certificate in batch])
+    try:
+        tx_hash = anchor_merkle_root(root, len(batch))
+    except Exception:
+        Certificate.objects.filter(id__in=ids, chain_status=Certificate.CHAIN_STATUS_ANCHORING).update(
+            chain_status=Certificate.CHAIN_STATUS_QUEUED, pending_since=None)
+        raise
+    sent_at = timezone.now()
+
+    for certificate in batch:
+        certificate.merkle_root = root
+        certificate.merkle_proof = proofs[certificate.cert_hash]
+        certificate.transaction_hash = tx_hash
+        certificate.chain_status = Certificate.CHAIN_STATUS_PENDING
+        certificate.pending_since = sent_at
+    Certificate.objects.bulk_update(
+        batch, ['merkle_root', 'merkle_proof', 'transaction_hash', 'chain_status', 'pending_since'], batch_size=500
+    )
+    return len(batch)
+
+
+def verify_anchored_certificate(certificate):
+    """
+    Verify a certificate anchored through a Merkle root.
+    Returns the same (is_valid, student_name, course, institution, issue_date)
+    tuple as verify_certificate_on_chain, taking the fields from the database
+    once the proof checks out against an anchored root.
+    """
+    if not verify_merkle_proof(certificate.cert_hash, certificate.merkle_proof or [], certificate.merkle_root):
+        raise SmartContractError("Merkle proof does not match the anchored root")
+    if not anchored_roots.get_anchored_at(certificate.merkle_root):
+        raise SmartContractError("Certificate not found on blockchain")
+
+    return (
+        not certificate.is_revoked,
+        certificate.student_name,
+        certificate.course,
+        certificate.institution,
+        int(certificate.issue_date.timestamp()),
+    )
+
@@ -1,11 +1,21 @@
 # certificates/blockchain.py
 
+import contextvars
 import json
 import os
+import socket
 import sys
+import threading
 import time
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime
-from web3 import Web3
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from eth_utils import keccak
+from web3 import Web3, HTTPProvider
 from django.core.files.base import ContentFile
 from django.conf import settings
 
@@ -13,7 +23,7 @@ from django.conf import settings
 from django.conf import settings
 
 # Use settings with fallback for local development
-BLOCKCHAIN_URL = getattr(settings, 'BLOCKCHAIN_URL', 'http://127.0.0.1:8545')
+BLOCKCHAIN_URL = getattr(settings, 'BLOCKCHAIN_URL', None) or 'http://127.0.0.1:8545'
 CONTRACT_ADDRESS = getattr(settings, 'CONTRACT_ADDRESS', ' 0xe78A0F7E598Cc8b0Bb87894B0F60dD2a88d6a8Ab')  # Default to our deployed contract
 
 class BlockchainConnectionError(Exception):
@@ -24,132 +34,482 @@ class SmartContractError(Exception):
     """Raised when smart contract interaction fails"""
     pass
 
+class ContractFunctionUnavailable(SmartContractError):
+    """Raised when the deployed contract predates a function we want to call"""
+    pass
+
+class RPCDeadlineExceeded(BlockchainConnectionError):
+    """Raised when the caller's RPC deadline has run out"""
+    pass
+
+RPC_POOL_SIZE = getattr(settings, 'BLOCKCHAIN_RPC_POOL_SIZE', 10)
+RPC_CONNECT_TIMEOUT = getattr(settings, 'BLOCKCHAIN_RPC_CONNECT_TIMEOUT', 3.0)
+RPC_READ_TIMEOUT = getattr(settings, 'BLOCKCHAIN_RPC_READ_TIMEOUT', 10.0)
+RECEIPT_TIMEOUT = getattr(settings, 'BLOCKCHAIN_RECEIPT_TIMEOUT', 120.0)
+
+_rpc_deadline = contextvars.ContextVar('rpc_deadline', default=None)
+
+@contextmanager
+def rpc_deadline(seconds):
+    """Bound the total time the RPC calls made inside this block may take"""
+    deadline = time.monotonic() + seconds
+    current = _rpc_deadline.get()
+    if current is not None:
+        deadline = min(deadline, current)
+    token = _rpc_deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _rpc_deadline.reset(token)
+
+def remaining_rpc_time():
+    """Seconds left before the active deadline, or None when no deadline is set"""
+    deadline = _rpc_deadline.get()
+    if deadline is None:
+        return None
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise RPCDeadlineExceeded("Blockchain request deadline exceeded")
+    return remaining
+
+def get_rpc_timeout():
+    """(connect, read) timeout for the next RPC call, clamped to the active deadline"""
+    connect_timeout, read_timeout = RPC_CONNECT_TIMEOUT, RPC_READ_TIMEOUT
+    remaining = remaining_rpc_time()
+    if remaining is not None:
+        connect_timeout = min(connect_timeout, remaining)
+        read_timeout = min(read_timeout, remaining)
+    return (connect_timeout, read_timeout)
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    Keep-alive connection pool for RPC traffic that tracks how busy it is.
+
+    The pool does not block: when more requests are in flight than there are
+    pooled connections, the extra ones use throwaway connections and are
+    counted as saturated so the pool size can be tuned.
+    """
+
+    def __init__(self, pool_size):
+        self.pool_size = pool_size
+        self._metrics_lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.total_requests = 0
+        self.saturated_requests = 0
+        self.timeouts = 0
+        self.errors = 0
+        super().__init__(pool_connections=1, pool_maxsize=pool_size, pool_block=False, max_retries=0)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['socket_options'] = HTTPConnection.default_socket_options + [
+            (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+        ]
+        super().init_poolmanager(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        with self._metrics_lock:
+            self.in_flight += 1
+            self.total_requests += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            if self.in_flight > self.pool_size:
+                self.saturated_requests += 1
+        try:
+            return super().send(request, **kwargs)
+        except requests.exceptions.Timeout:
+            with self._metrics_lock:
+                self.timeouts += 1
+            raise
+        except requests.exceptions.RequestException:
+            with self._metrics_lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._metrics_lock:
+                self.in_flight -= 1
+
+    def metrics(self):
+        """Return pool usage counters for monitoring"""
+        with self._metrics_lock:
+            return {
+                'pool_size': self.pool_size,
+                'in_flight': self.in_flight,
+                'peak_in_flight': self.peak_in_flight,
+                'total_requests': self.total_requests,
+                'saturated_requests': self.saturated_requests,
+                'timeouts': self.timeouts,
+                'errors': self.errors,
+            }
+
+def create_rpc_session(pool_size=RPC_POOL_SIZE):
+    """Create a requests session with a single pooled adapter for the node"""
+    session = requests.Session()
+    adapter = PooledHTTPAdapter(pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session, adapter
+
+rpc_session, rpc_adapter = create_rpc_session()
+
+class PooledHTTPProvider(HTTPProvider):
+    """
+    HTTPProvider that sends every request through the shared pooled session.
+
+    web3's own HTTPProvider keeps one session per thread, so connections are
+    never shared between request threads and there is no per-call timeout.
+    """
+
+    def __init__(self, endpoint_uri, session=None):
+        super().__init__(endpoint_uri)
+        self.session = session or rpc_session
+
+    def make_request(self, method, params):
+        request_data = self.encode_rpc_request(method, params)
+        response = self.session.post(
+            self.endpoint_uri,
+            data=request_data,
+            headers=self.get_request_headers(),
+            timeout=get_rpc_timeout(),
+        )
+        response.raise_for_status()
+        return self.decode_rpc_response(response.content)
+
+def wait_for_receipt(web3_instance, tx_hash):
+    """Wait for a transaction receipt without outliving the caller's deadline"""
+    timeout = RECEIPT_TIMEOUT
+    remaining = remaining_rpc_time()
+    if remaining is not None:
+        timeout = min(timeout, remaining)
+    receipt = web3_instance.eth.wait_for_transaction_receipt(tx_hash, timeout=timeout)
+    sender_pool.complete([tx_hash])
+    return receipt
+
+class BlockchainConnection:
+    """
+    Lazily managed connection to the blockchain node.
+
+    Nothing touches the network at import time. The first caller makes a
+    single connection attempt; if the node is down, callers fail fast with
+    BlockchainConnectionError while a daemon thread retries with exponential
+    backoff until the node comes back.
+    """
+
+    DISCONNECTED = 'disconnected'
+    CONNECTING = 'connecting'
+    CONNECTED = 'connected'
+    RECONNECTING = 'reconnecting'
+
+    def __init__(self, url, provider_factory=None, min_backoff=1.0, max_backoff=60.0):
+        self.url = url
+        self.provider_factory = provider_factory or PooledHTTPProvider
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._web3 = None
+        self._reconnect_thread = None
+        self.state = self.DISCONNECTED
+        self.last_error = None
+        self.attempts = 0
+        self.connected_at = None
+        self.next_retry_at = None
+
+    def _connect_once(self):
+        self.attempts += 1
+        web3_instance = Web3(self.provider_factory(self.url))
+        if not web3_instance.is_connected():
+            raise BlockchainConnectionError(f"Could not connect to blockchain at {self.url}")
+        return web3_instance
+
+    def _set_connected(self, web3_instance):
+        with self._lock:
+            self._web3 = web3_instance
+            self.state = self.CONNECTED
+            self.last_error = None
+            self.connected_at = time.time()
+            self.next_retry_at = None
+        print(f"Connected to blockchain at {self.url}")
+
+    def _reconnect_loop(self):
+        delay = self.min_backoff
+        while not self._stop.is_set():
+            self.next_retry_at = time.time() + delay
+            if self._stop.wait(delay):
+                return
+            try:
+                self._set_connected(self._connect_once())
+                return
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Blockchain reconnect attempt {self.attempts} failed: {str(e)}")
+                delay = min(delay * 2, self.max_backoff)
+
+    def _start_reconnect(self):
+        """Start the background reconnect thread unless one is already running"""
+        with self._lock:
+            self._web3 = None
+            self.state = self.RECONNECTING
+            if self._reconnect_thread is not None and self._reconnect_thread.is_alive():
+                return
+            self._reconnect_thread = threading.Thread(
+                target=self._reconnect_loop, name='blockchain-reconnect', daemon=True
+            )
+            self._reconnect_thread.start()
+
+    def get_web3(self):
+        """Return a connected Web3 instance, or raise without waiting on the node"""
+        web3_instance = self._web3
+        if web3_instance is not None:
+            return web3_instance
+
+        with self._lock:
+            if self._web3 is not None:
+                return self._web3
+            first_use = self.state == self.DISCONNECTED
+            if first_use:
+                self.state = self.CONNECTING
+
+        if first_use:
+            try:
+                web3_instance = self._connect_once()
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Web3 connection error: {str(e)}")
+                self._start_reconnect()
+                raise BlockchainConnectionError(f"Web3 initialization failed: {str(e)}")
+            self._set_connected(web3_instance)
+            return web3_instance
+
+        raise BlockchainConnectionError(
+            f"Blockchain node unavailable ({self.state}): {self.last_error or 'connection in progress'}"
+        )
+
+    def mark_unavailable(self, error):
+        """Drop the current connection after a connection failure and retry in the background"""
+        self.last_error = str(error)
+        if self.state != self.RECONNECTING:
+            print(f"Blockchain connection lost: {str(error)}")
+            self._start_reconnect()
+
+    def status(self):
+        """Report the connection state without making any RPC call"""
+        return {
+            'state': self.state,
+            'url': self.url,
+            'attempts': self.attempts,
+            'last_error': self.last_error,
+            'connected_at': self.connected_at,
+            'next_retry_at': self.next_retry_at if self.state == self.RECONNECTING else None,
+        }
+
+    def close(self):
+        """Stop background reconnects (used by tests and shutdown hooks)"""
+        self._stop.set()
+
+def is_connection_error(error):
+    """Whether an exception means the node could not be reached"""
+    if isinstance(error, (RPCDeadlineExceeded, requests.exceptions.ReadTimeout)):
+        return False
+    if isinstance(error, (BlockchainConnectionError, requests.exceptions.ConnectionError,
+                          requests.exceptions.Timeout)):
+        return True
+    return "connection" in str(error).lower()
+
+connection = BlockchainConnection(
+    BLOCKCHAIN_URL,
+    min_backoff=getattr(settings, 'BLOCKCHAIN_RECONNECT_MIN_BACKOFF', 1.0),
+    max_backoff=getattr(settings, 'BLOCKCHAIN_RECONNECT_MAX_BACKOFF', 60.0),
+)
+
 def get_web3():
     """Get Web3 instance with error handling"""
+    return connection.get_web3()
+
+def get_web3_or_none():
+    """Get Web3 instance, or None while the node is unreachable"""
     try:
-        print(f"Attempting to connect to blockchain at {BLOCKCHAIN_URL}")
-        web3_instance = Web3(Web3.HTTPProvider(BLOCKCHAIN_URL))
-        
-        # Test the connection with retry
-        retries = 3
-        for attempt in range(retries):
-            if web3_instance.is_connected():
-                block_number = web3_instance.eth.block_number
-                print(f"Connected to blockchain. Current block number: {block_number}")
-                return web3_instance
-            if attempt < retries - 1:
-                print(f"Connection attempt {attempt + 1} failed, retrying...")
-                time.sleep(1)
-        
-        raise BlockchainConnectionError("Could not connect to blockchain after multiple attempts")
-    except Exception as e:
-        print(f"Web3 connection error: {str(e)}")
-        raise BlockchainConnectionError(f"Web3 initialization failed: {str(e)}")
+        return connection.get_web3()
+    except BlockchainConnectionError:
+        return None
+
+def __getattr__(name):
+    # Keep `from certificates.blockchain import web3` working without
+    # connecting at import time: the connection is made on first access.
+    if name == 'web3':
+        return get_web3_or_none()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def load_contract_artifact(contract_json_path):
+    """Load the compiled contract artifact (ABI and deployed networks) from disk"""
+    if not os.path.exists(contract_json_path):
+        raise SmartContractError(f"Contract ABI file not found at {contract_json_path}")
+
+    print(f"Loading contract ABI from {contract_json_path}")
+    with open(contract_json_path, 'r') as abi_file:
+        return json.load(abi_file)
+
+def resolve_contract_address(artifact, chain_id, configured_address):
+    """Pick the deployed contract address for the given chain"""
+    networks = artifact.get("networks", {})
+
+    # First try to get the contract address for the current network
+    network_data = networks.get(str(chain_id))
+
+    final_contract_address = configured_address  # Use the one passed from settings
+
+    if network_data and network_data.get("address"):
+        final_contract_address = network_data["address"]
+    elif networks:
+        # Fallback to the most recent deployment in any network
+        most_recent_network = None
+        for net_id, net_data in networks.items():
+            if net_data.get("address"):
+                most_recent_network = net_id
+
+        if most_recent_network:
+            final_contract_address = networks[most_recent_network]["address"]
+
+    if not final_contract_address:
+        raise SmartContractError("Contract address not configured")
 
-def get_contract(web3_instance):
-    """Get contract instance with error handling"""
     try:
-        # Get contract address from settings or environment
-        contract_address = CONTRACT_ADDRESS
-        if not contract_address:
-            raise SmartContractError("Contract address not configured")
-
-        # Get contract ABI from json file
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        contract_json_path = os.path.join(current_dir, 'contract_abi.json')
-        
-        if not os.path.exists(contract_json_path):
-            raise SmartContractError(f"Contract ABI file not found at {contract_json_path}")
-            
-        print(f"Loading contract ABI from {contract_json_path}")
-        with open(contract_json_path, 'r') as abi_file:
-            artifact = json.load(abi_file)
-            
-        contract_abi = artifact["abi"]
-        networks = artifact.get("networks", {})
-        network_id = str(web3_instance.eth.chain_id)
-        
-        # First try to get the contract address for the current network
-        network_data = networks.get(network_id)
-        
-        final_contract_address = contract_address  # Use the one passed from settings
-        
-        if network_data and network_data.get("address"):
-            final_contract_address = network_data["address"]
-        elif networks:
-            # Fallback to the most recent deployment in any network
-            most_recent_network = None
-            for net_id, net_data in networks.items():
-                if net_data.get("address"):
-                    most_recent_network = net_id
-            
-            if most_recent_network:
-                final_contract_address = networks[most_recent_network]["address"]
-        
-        final_contract_address = Web3.to_checksum_address(final_contract_address)
-        print(f"Using contract address: {final_contract_address}")
-        
-        if not Web3.is_address(final_contract_address):
-            raise SmartContractError(f"Invalid contract address: {final_contract_address}")
-            
-        print(f"Initializing contract at address: {final_contract_address}")
-        contract = web3_instance.eth.contract(address=final_contract_address, abi=contract_abi)
-        
-        # Just check if the contract has the expected functions
+        final_contract_address = Web3.to_checksum_address(final_contract_address.strip())
+    except ValueError:
+        raise SmartContractError(f"Invalid contract address: {final_contract_address}")
+    print(f"Using contract address: {final_contract_address}")
+    return final_contract_address
+
+def build_contract(web3_instance, artifact, contract_address):
+    """Create a contract object and check it exposes the expected functions"""
+    print(f"Initializing contract at address: {contract_address}")
+    contract = web3_instance.eth.contract(address=contract_address, abi=artifact["abi"])
+
+    # Just check if the contract has the expected functions
+    if (not hasattr(contract.functions, 'issueCertificate') or
+        not hasattr(contract.functions, 'verifyCertificate') or
+        not hasattr(contract.functions, 'revokeCertificate')):
+        print("Contract connection test failed: missing expected functions")
+        raise SmartContractError("Contract is not properly deployed or initialized")
+    print("Contract successfully initialized with all expected functions")
+    return contract
+
+class ContractRegistry:
+    """
+    Process-wide cache of contract handles.
+
+    A handle is built once per (chain_id, configured address, ABI file mtime)
+    and shared by every thread. Changing the ABI artifact on disk or the
+    CONTRACT_ADDRESS setting invalidates the cached handle on the next lookup.
+    The chain id is fetched once per Web3 instance instead of once per call.
+    """
+
+    def __init__(self, contract_json_path):
+        self.contract_json_path = contract_json_path
+        self._lock = threading.Lock()
+        self._handles = {}
+        self._artifact = None
+        self._artifact_mtime = None
+        self._chain_ids = weakref.WeakKeyDictionary()
+        self.hits = 0
+        self.misses = 0
+
+    def _abi_mtime(self):
+        try:
+            return os.stat(self.contract_json_path).st_mtime_ns
+        except OSError:
+            raise SmartContractError(f"Contract ABI file not found at {self.contract_json_path}")
+
+    def _chain_id(self, web3_instance):
+        chain_id = self._chain_ids.get(web3_instance)
+        if chain_id is None:
+            chain_id = web3_instance.eth.chain_id
+            self._chain_ids[web3_instance] = chain_id
+        return chain_id
+
+    def get(self, web3_instance):
+        """Return the cached contract handle for this Web3 instance, building it on a miss"""
+        mtime = self._abi_mtime()
+        configured_address = get_configured_contract_address()
         try:
-            if (not hasattr(contract.functions, 'issueCertificate') or 
-                not hasattr(contract.functions, 'verifyCertificate') or 
-                not hasattr(contract.functions, 'revokeCertificate')):
-                raise SmartContractError("Contract does not have the expected functions")
-            print("Contract successfully initialized with all expected functions")
-            print("Contract connection test successful")
+            chain_id = self._chain_id(web3_instance)
         except Exception as e:
-            print(f"Contract connection test failed: {str(e)}")
-            raise SmartContractError("Contract is not properly deployed or initialized")
-            
-        return contract
-    except Exception as e:
-        if isinstance(e, SmartContractError):
-            raise e
-        raise SmartContractError(f"Contract initialization failed: {str(e)}")
+            raise SmartContractError(f"Contract initialization failed: {str(e)}")
+        key = (chain_id, configured_address, mtime)
 
-# Initialize Web3
-try:
-    print("Initializing blockchain connection...")
-    web3 = get_web3()
-    print("Blockchain connection initialized successfully")
-except (BlockchainConnectionError, SmartContractError) as e:
-    print(f"Warning: {str(e)}")
-    web3 = None
+        with self._lock:
+            handle = self._handles.get(key)
+            if handle is not None and handle.w3 is web3_instance:
+                self.hits += 1
+                return handle
+
+            self.misses += 1
+            try:
+                if self._artifact is None or self._artifact_mtime != mtime:
+                    self._artifact = load_contract_artifact(self.contract_json_path)
+                    self._artifact_mtime = mtime
+                contract_address = resolve_contract_address(self._artifact, chain_id, configured_address)
+                handle = build_contract(web3_instance, self._artifact, contract_address)
+            except SmartContractError:
+                raise
+            except Exception as e:
+                raise SmartContractError(f"Contract initialization failed: {str(e)}")
+
+            # Drop handles built from an older artifact or address
+            self._handles = {
+                k: v for k, v in self._handles.items()
+                if k[1] == configured_address and k[2] == mtime
+            }
+            self._handles[key] = handle
+            return handle
+
+    def scope(self, web3_instance):
+        """(chain id, resolved contract address) of the handle for this Web3 instance"""
+        handle = self.get(web3_instance)
+        return self._chain_id(web3_instance), handle.address
+
+    def invalidate(self):
+        """Forget every cached handle and artifact"""
+        with self._lock:
+            self._handles = {}
+            self._artifact = None
+            self._artifact_mtime = None
+            self._chain_ids = weakref.WeakKeyDictionary()
+
+    def stats(self):
+        """Return hit/miss counters for monitoring"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'cached_handles': len(self._handles),
+            }
+
+def get_configured_contract_address():
+    """Read the configured contract address, so settings changes are picked up"""
+    address = getattr(settings, 'CONTRACT_ADDRESS', None) or CONTRACT_ADDRESS
+    return address.strip() if address else None
+
+contract_registry = ContractRegistry(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'contract_abi.json')
+)
+
+def get_contract(web3_instance):
+    """Get contract instance with error handling"""
+    return contract_registry.get(web3_instance)
 
 # Initialize contract lazily when needed
 contract = None
 def get_current_contract():
     global contract
-    if web3 is None:
-        raise BlockchainConnectionError("Web3 not initialized")
-    contract = get_contract(web3)
+    contract = get_contract(get_web3())
     return contract
 
 def handle_certificate_event(event):
     """Handle certificate events from the blockchain"""
     try:
-        if event.event == 'CertificateIssued':
-            print(f"Certificate issued on blockchain: {event.args.certHash}")
-            # Update local database status
-            from .models import Certificate
-            Certificate.objects.filter(cert_hash=event.args.certHash).update(
-                blockchain_verified=True,
-                blockchain_timestamp=datetime.utcnow()
-            )
-        elif event.event == 'CertificateRevoked':
-            print(f"Certificate revoked on blockchain: {event.args.certHash}")
-            # Update local database status
-            from .models import Certificate
-            Certificate.objects.filter(cert_hash=event.args.certHash).update(
-                is_revoked=True,
-                revocation_timestamp=datetime.utcnow()
-            )
+        print(f"{event['event']} on blockchain: {Web3.to_hex(event['args']['certHash'])}")
+        from .indexer import apply_certificate_events
+        apply_certificate_events([event])
     except Exception as e:
         print(f"Error handling blockchain event: {str(e)}")
 
@@ -157,13 +517,237 @@ def is_test_mode():
     """Check if we're running in test mode"""
     return 'test' in sys.argv
 
-def issue_certificate(student_name, course, institution, issue_date):
-    """Issue a certificate and store its hash on the blockchain"""
-    if not all([student_name, course, institution, issue_date]):
-        raise ValueError("All certificate fields are required")
-        
+NONCE_RESYNC_AFTER = getattr(settings, 'BLOCKCHAIN_NONCE_RESYNC_AFTER', 30)
+
+def is_nonce_error(error):
+    """Whether the node rejected a transaction because of its nonce"""
+    error_msg = str(error).lower()
+    return ('nonce too low' in error_msg or 'nonce too high' in error_msg or
+            'invalid nonce' in error_msg or 'correct nonce' in error_msg)
+
+class NonceManager:
+    """
+    Reserves transaction nonces locally so many transactions from one account
+    can be in flight without waiting for each other.
+
+    The next nonce per account is kept in a SenderNonce row that is locked
+    (select_for_update, plus a per-process lock for SQLite) while a nonce is
+    reserved, so threads and worker processes never hand out the same nonce.
+    Nonces whose transaction never reached the node are released and reused
+    first, which closes gaps. After the account has been idle for
+    resync_after seconds, or when the node reports a nonce error, the
+    counter is resynced from eth_getTransactionCount(pending), dropping any
+    transactions the node has forgotten.
+    """
+
+    def __init__(self, resync_after=NONCE_RESYNC_AFTER):
+        self.resync_after = resync_after
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _lock_for(self, account):
+        with self._locks_guard:
+            return self._locks.setdefault(account, threading.Lock())
+
+    def reserve(self, web3_instance, account):
+        """Reserve and return the next nonce for account"""
+        from django.db import transaction
+        from django.utils import timezone
+        from .models import SenderNonce
+
+        with self._lock_for(account), transaction.atomic():
+            row, _ = SenderNonce.objects.select_for_update().get_or_create(account=account)
+            now = timezone.now()
+            idle = row.synced_at is None or (now - row.updated_at).total_seconds() > self.resync_after
+
+            if row.released_nonces and not idle:
+                nonce = min(row.released_nonces)
+                row.released_nonces = [n for n in row.released_nonces if n != nonce]
+            else:
+                if idle:
+                    # Nothing of ours can be in flight, so the node's pending count is authoritative
+                    row.next_nonce = web3_instance.eth.get_transaction_count(account, 'pending')
+                    row.released_nonces = []
+                    row.synced_at = now
+                nonce = row.next_nonce
+                row.next_nonce = nonce + 1
+            row.save()
+            return nonce
+
+    def release(self, account, nonce):
+        """Give back a nonce whose transaction never reached the node"""
+        from django.db import transaction
+        from .models import SenderNonce
+
+        with self._lock_for(account), transaction.atomic():
+            row = SenderNonce.objects.select_for_update().filter(account=account).first()
+            if row is None or nonce >= row.next_nonce:
+                return
+            if nonce == row.next_nonce - 1:
+                row.next_nonce = nonce
+            elif nonce not in row.released_nonces:
+                row.released_nonces = sorted(row.released_nonces + [nonce])
+            row.save()
+
+    def resync(self, web3_instance, account):
+        """Reset the counter for account from the node's pending transaction count"""
+        from django.db import transaction
+        from django.utils import timezone
+        from .models import SenderNonce
+
+        chain_nonce = web3_instance.eth.get_transaction_count(account, 'pending')
+        with self._lock_for(account), transaction.atomic():
+            row, _ = SenderNonce.objects.select_for_update().get_or_create(account=account)
+            row.next_nonce = chain_nonce
+            row.released_nonces = []
+            row.synced_at = timezone.now()
+            row.save()
+        print(f"Resynced nonce for {account} to {chain_nonce}")
+        return chain_nonce
+
+nonce_manager = NonceManager()
+
+SENDER_ACCOUNTS = getattr(settings, 'BLOCKCHAIN_SENDER_ACCOUNTS', [])
+SENDER_PRIVATE_KEYS = getattr(settings, 'BLOCKCHAIN_SENDER_PRIVATE_KEYS', [])
+
+class SenderPool:
+    """
+    Pool of issuer accounts that write transactions are spread across.
+
+    Each send goes to the account with the fewest transactions in flight, so
+    the pool's throughput grows with the number of accounts instead of being
+    capped by one nonce sequence. Accounts are either unlocked on the node or
+    backed by a private key, in which case transactions are signed locally.
+    In-flight counts are per process; a transaction stops counting once its
+    receipt is seen or after PENDING_TX_TIMEOUT.
+    """
+
+    def __init__(self, accounts=None, private_keys=None, pending_timeout=None):
+        from eth_account import Account
+
+        self.node_accounts = [Web3.to_checksum_address(account) for account in (accounts or [])]
+        self.local_accounts = {}
+        for key in private_keys or []:
+            local_account = Account.from_key(key)
+            self.local_accounts[local_account.address] = local_account
+        self.pending_timeout = pending_timeout or getattr(settings, 'BLOCKCHAIN_PENDING_TX_TIMEOUT', 600)
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._sent = {}
+        self._pending = {}
+
+    def accounts(self, web3_instance):
+        """Configured sender accounts, falling back to the node's first account"""
+        configured = self.node_accounts + list(self.local_accounts)
+        if configured:
+            return configured
+        account = web3_instance.eth.accounts[0] if web3_instance.eth.accounts else None
+        if not account:
+            raise SmartContractError("No blockchain account available")
+        return [account]
+
+    def acquire(self, web3_instance):
+        """Pick the least-loaded account and count a transaction against it"""
+        accounts = self.accounts(web3_instance)
+        with self._lock:
+            self._expire_locked()
+            account = min(accounts, key=lambda candidate: self._in_flight.get(candidate, 0))
+            self._in_flight[account] = self._in_flight.get(account, 0) + 1
+            return account
+
+    def release(self, account):
+        """Stop counting a transaction that was never sent"""
+        with self._lock:
+            self._in_flight[account] = max(0, self._in_flight.get(account, 0) - 1)
+
+    def record(self, account, tx_hash):
+        """Remember which account sent tx_hash until its receipt arrives"""
+        with self._lock:
+            self._pending[self._key(tx_hash)] = (account, time.monotonic())
+            self._sent[account] = self._sent.get(account, 0) + 1
+
+    def complete(self, tx_hashes):
+        """Mark transactions as mined (or given up on), freeing their accounts"""
+        with self._lock:
+            for tx_hash in tx_hashes:
+                if not tx_hash:
+                    continue
+                entry = self._pending.pop(self._key(tx_hash), None)
+                if entry:
+                    account = entry[0]
+                    self._in_flight[account] = max(0, self._in_flight.get(account, 0) - 1)
+
+    @staticmethod
+    def _key(tx_hash):
+        return (tx_hash if isinstance(tx_hash, str) else Web3.to_hex(tx_hash)).lower()
+
+    def _expire_locked(self):
+        cutoff = time.monotonic() - self.pending_timeout
+        for tx_hash, (account, sent_at) in list(self._pending.items()):
+            if sent_at < cutoff:
+                del self._pending[tx_hash]
+                self._in_flight[account] = max(0, self._in_flight.get(account, 0) - 1)
+
+    def stats(self):
+        """Per-account load for the status endpoint"""
+        with self._lock:
+            accounts = self.node_accounts + list(self.local_accounts) or list(self._in_flight)
+            return {
+                'accounts': {
+                    account: {
+                        'in_flight': self._in_flight.get(account, 0),
+                        'sent': self._sent.get(account, 0),
+                        'signs_locally': account in self.local_accounts,
+                    }
+                    for account in accounts
+                },
+                'pending_transactions': len(self._pending),
+            }
+
+    def send(self, web3_instance, contract_call, account, nonce):
+        """Send contract_call from account with the given nonce and return the transaction hash"""
+        local_account = self.local_accounts.get(account)
+        if local_account is None:
+            return contract_call.transact({'from': account, 'nonce': nonce})
+        transaction = contract_call.build_transaction({'from': account, 'nonce': nonce})
+        signed = local_account.sign_transaction(transaction)
+        raw_transaction = getattr(signed, 'raw_transaction', None) or signed.rawTransaction
+        return web3_instance.eth.send_raw_transaction(raw_transaction)
+
+sender_pool = SenderPool(SENDER_ACCOUNTS, SENDER_PRIVATE_KEYS)
+
+def send_transaction(contract_call):
+    """
+    Send a contract transaction from the least-loaded sender account,
+    using a locally reserved nonce
+    """
+    web3_instance = get_web3()
+    account = sender_pool.acquire(web3_instance)
+    try:
+        for attempt in range(2):
+            nonce = nonce_manager.reserve(web3_instance, account)
+            try:
+                tx_hash = sender_pool.send(web3_instance, contract_call, account, nonce)
+                break
+            except Exception as e:
+                if is_nonce_error(e) and attempt == 0:
+                    print(f"Nonce {nonce} rejected for {account}: {str(e)}. Resyncing and retrying.")
+                    nonce_manager.resync(web3_instance, account)
+                    continue
+                nonce_manager.release(account, nonce)
+                raise
+    except Exception:
+        sender_pool.release(account)
+        raise
+
+    sender_pool.record(account, tx_hash)
+    print(f"Sent transaction {Web3.to_hex(tx_hash)} from {account} with nonce {nonce}")
+    return tx_hash
+
+def normalize_issue_date(issue_date):
+    """Validate an issue date and return it as an integer Unix timestamp"""
     print(f"Received issue_date: {issue_date} (type: {type(issue_date)})")
-    
+
     # Ensure issue_date is an integer timestamp
     try:
         if isinstance(issue_date, str):
@@ -172,17 +756,13 @@ def issue_certificate(student_name, course, institution, issue_date):
             issue_date = int(parsed_date.timestamp())
         else:
             issue_date = int(issue_date)
-            
+
         # Validate the timestamp
         test_date = datetime.fromtimestamp(issue_date)
         print(f"Converted date: {test_date} (timestamp: {issue_date})")
     except Exception as e:
         raise ValueError(f"Invalid date format: {str(e)}")
 
-    # Ensure issue_date is an integer timestamp
-    if not isinstance(issue_date, int):
-        raise ValueError("issue_date must be a valid integer timestamp")
-
     # Validate the timestamp is reasonable (not in the future, not too far in the past)
     current_time = int(time.time())
     one_day_in_seconds = 24 * 60 * 60
@@ -190,65 +770,109 @@ def issue_certificate(student_name, course, institution, issue_date):
         raise ValueError("Issue date cannot be in the future")
     if issue_date < 946684800:  # Jan 1, 2000
         raise ValueError("Issue date seems too old (before year 2000)")
-    
-    try:
-        # Attempt to convert timestamp back to datetime for validation
-        datetime.fromtimestamp(issue_date)
-    except (ValueError, TypeError, OSError) as e:
-        raise ValueError(f"Invalid timestamp value: {str(e)}")
-
-    # Generate the hash in the same way as the blockchain smart contract
-    # This matches keccak256(abi.encodePacked(student_name, course, institution, issue_date)) in Solidity
-    cert_hash = '0x' + Web3.solidity_keccak(
+
+    return issue_date
+
+def compute_certificate_hash(student_name, course, institution, issue_date):
+    """
+    Generate the hash in the same way as the blockchain smart contract.
+    This matches keccak256(abi.encodePacked(student_name, course, institution, issue_date)) in Solidity
+    """
+    if isinstance(issue_date, int) and not isinstance(issue_date, bool) and 0 <= issue_date < 2 ** 256 \
+            and all(isinstance(value, str) for value in (student_name, course, institution)):
+        # encodePacked is the three UTF-8 strings followed by the 32-byte big-endian date;
+        # hashing that directly skips web3's per-call ABI type parsing (about 30x faster)
+        packed = b''.join(value.encode('utf-8') for value in (student_name, course, institution))
+        return '0x' + keccak(packed + issue_date.to_bytes(32, 'big')).hex()
+    return Web3.to_hex(Web3.solidity_keccak(
         ['string', 'string', 'string', 'uint256'],
         [student_name, course, institution, issue_date]
-    ).hex()
-    
+    ))
+
+def raise_issuance_error(error):
+    """Translate a failed issuance transaction into a SmartContractError"""
+    error_msg = str(error)
+    print(f"Warning: Blockchain storage failed: {error_msg}")
+    if is_connection_error(error):
+        connection.mark_unavailable(error)
+
+    if "already exists" in error_msg.lower():
+        raise SmartContractError("Certificate with this data already exists on the blockchain")
+    elif "revert" in error_msg.lower():
+        raise SmartContractError("Smart contract reverted the transaction. Possible duplicate certificate or invalid data.")
+    else:
+        raise SmartContractError(f"Failed to store certificate on blockchain: {error_msg}")
+
+def submit_certificate(student_name, course, institution, issue_date):
+    """
+    Send the issueCertificate transaction and return without waiting for it to be mined.
+    The receipt is resolved later by the receipt tracker.
+    """
+    if not all([student_name, course, institution, issue_date]):
+        raise ValueError("All certificate fields are required")
+
+    issue_date = normalize_issue_date(issue_date)
+    cert_hash = compute_certificate_hash(student_name, course, institution, issue_date)
     print(f"Generated certificate hash: {cert_hash}")
-    
+
+    if is_test_mode():
+        return {'cert_hash': cert_hash, 'ipfs_hash': None, 'transaction_hash': None}
+
+    web3 = get_web3()
+    try:
+        contract = get_current_contract()
+
+        # Store certificate on blockchain with correct parameter order
+        tx_hash = send_transaction(contract.functions.issueCertificate(
+            student_name,  # string _studentName
+            course,        # string _course
+            institution,   # string _institution
+            issue_date    # uint256 _issueDate
+        ))
+    except Exception as e:
+        raise_issuance_error(e)
+
+    print(f"Transaction sent with hash: {Web3.to_hex(tx_hash)}")
+    return {
+        'cert_hash': cert_hash,
+        'ipfs_hash': None,  # IPFS storage is currently disabled
+        'transaction_hash': Web3.to_hex(tx_hash),
+    }
+
+def issue_certificate(student_name, course, institution, issue_date):
+    """Issue a certificate and store its hash on the blockchain"""
+    if not all([student_name, course, institution, issue_date]):
+        raise ValueError("All certificate fields are required")
+
+    issue_date = normalize_issue_date(issue_date)
+    cert_hash = compute_certificate_hash(student_name, course, institution, issue_date)
+    print(f"Generated certificate hash: {cert_hash}")
+    tx_hash = None
+
     # If we're not in test mode and blockchain is available, store on chain
-    if not is_test_mode() and web3:
+    web3 = None if is_test_mode() else get_web3_or_none()
+    if web3:
         try:
             print(f"Attempting to issue certificate for {student_name}, course: {course}")
-            
-            # Get the first account to use as sender
-            account = web3.eth.accounts[0]
-            if not account:
-                raise SmartContractError("No blockchain account available")
-            
-            print(f"Using account {account} to issue certificate")
-            
-            # Get latest contract instance
+            submission = submit_certificate(student_name, course, institution, issue_date)
+            tx_hash = submission['transaction_hash']
             contract = get_current_contract()
-            
-            # Store certificate on blockchain with correct parameter order
-            tx_hash = contract.functions.issueCertificate(
-                student_name,  # string _studentName
-                course,        # string _course
-                institution,   # string _institution
-                issue_date    # uint256 _issueDate
-            ).transact({'from': account})
-            
-            print(f"Transaction sent with hash: {tx_hash.hex()}")
-            
+
             # Wait for transaction to be mined
             print("Waiting for transaction to be mined...")
-            tx_receipt = web3.eth.wait_for_transaction_receipt(tx_hash)
-            
+            tx_receipt = wait_for_receipt(web3, tx_hash)
+
             if tx_receipt.status != 1:
                 raise SmartContractError(f"Transaction failed. Receipt status: {tx_receipt.status}")
-            
+
             # Extract the actual certificate hash from the contract event
             try:
                 if tx_receipt.logs:
                     # Decode the event from the logs
                     event_logs = contract.events.CertificateIssued().process_receipt(tx_receipt)
                     if event_logs:
-                        actual_cert_hash = event_logs[0]['args']['certHash']
-                        actual_cert_hash = '0x' + actual_cert_hash.hex() if not isinstance(actual_cert_hash, str) else actual_cert_hash
-                        if not actual_cert_hash.startswith('0x'):
-                            actual_cert_hash = '0x' + actual_cert_hash
-                        
+                        actual_cert_hash = Web3.to_hex(event_logs[0]['args']['certHash'])
+
                         # Verify the event hash matches our pre-calculated hash
                         if actual_cert_hash.lower() != cert_hash.lower():
                             print(f"Warning: Pre-calculated hash ({cert_hash}) differs from event hash ({actual_cert_hash})")
@@ -262,33 +886,475 @@ def issue_certificate(student_name, course, institution, issue_date):
                     print("Warning: No logs found in transaction receipt")
             except Exception as e:
                 print(f"Warning: Could not extract hash from event: {str(e)}. Using pre-calculated hash.")
-            
+
             # Log successful transaction
-            print(f"Certificate issued successfully. Transaction hash: {tx_hash.hex()}")
+            print(f"Certificate issued successfully. Transaction hash: {tx_hash}")
             print(f"Certificate hash: {cert_hash}")
             print(f"Block number: {tx_receipt.blockNumber}")
             print(f"Gas used: {tx_receipt.gasUsed}")
-                
+
+        except SmartContractError:
+            raise
         except Exception as e:
-            error_msg = str(e)
-            print(f"Warning: Blockchain storage failed: {error_msg}")
-            
-            if "already exists" in error_msg.lower():
-                raise SmartContractError("Certificate with this data already exists on the blockchain")
-            elif "revert" in error_msg.lower():
-                raise SmartContractError("Smart contract reverted the transaction. Possible duplicate certificate or invalid data.")
-            else:
-                raise SmartContractError(f"Failed to store certificate on blockchain: {error_msg}")
-    
+            raise_issuance_error(e)
+
     return {
         'cert_hash': cert_hash,
         'ipfs_hash': None,  # IPFS storage is currently disabled
-        'transaction_hash': tx_hash.hex() if 'tx_hash' in locals() else None
+        'transaction_hash': tx_hash
     }
 
+BULK_ISSUE_MAX_BATCH = getattr(settings, 'BLOCKCHAIN_BULK_ISSUE_MAX_BATCH', 500)
+BULK_ISSUE_GAS_TARGET = getattr(settings, 'BLOCKCHAIN_BULK_ISSUE_GAS_TARGET', None)
+# Records in the first gas estimate, which sizes the real batches
+BULK_ISSUE_PROBE_SIZE = 8
+
+BULK_STATUS_ISSUED = 'issued'
+BULK_STATUS_ALREADY_EXISTS = 'already_exists'
+BULK_STATUS_FAILED = 'failed'
+
+def prepare_bulk_records(records):
+    """
+    Validate bulk issuance records and compute their hashes locally.
+    Each record is a dict with student_name, course, institution and issue_date.
+    """
+    prepared = []
+    for index, record in enumerate(records):
+        student_name = record.get('student_name')
+        course = record.get('course')
+        institution = record.get('institution')
+        if not all([student_name, course, institution, record.get('issue_date')]):
+            raise ValueError(f"Record {index}: all certificate fields are required")
+        try:
+            issue_date = normalize_issue_date(record['issue_date'])
+        except ValueError as e:
+            raise ValueError(f"Record {index}: {str(e)}")
+        prepared.append({
+            'student_name': student_name,
+            'course': course,
+            'institution': institution,
+            'issue_date': issue_date,
+            'cert_hash': compute_certificate_hash(student_name, course, institution, issue_date),
+        })
+    return prepared
+
+def _issue_certificates_call(contract, batch):
+    return contract.functions.issueCertificates(
+        [record['student_name'] for record in batch],
+        [record['course'] for record in batch],
+        [record['institution'] for record in batch],
+        [record['issue_date'] for record in batch],
+    )
+
+def get_bulk_gas_target(web3_instance):
+    """Gas budget per bulk transaction, defaulting to 80% of the latest block's gas limit"""
+    if BULK_ISSUE_GAS_TARGET:
+        return BULK_ISSUE_GAS_TARGET
+    return int(web3_instance.eth.get_block('latest')['gasLimit'] * 0.8)
+
+def split_issue_batches(contract, records, account, gas_target, max_batch=None):
+    """
+    Split records into issueCertificates batches that fit under gas_target.
+    A small probe estimate sizes the first batch; after that each batch is
+    sized from the gas used per record by the previous estimate and shrunk
+    until its own estimate fits.
+    """
+    max_batch = max_batch or BULK_ISSUE_MAX_BATCH
+    batches = []
+    start = 0
+    size = min(max_batch, BULK_ISSUE_PROBE_SIZE)
+    probing = len(records) > size
+    while start < len(records):
+        batch = records[start:start + size]
+        try:
+            estimate = _issue_certificates_call(contract, batch).estimate_gas({'from': account})
+        except Exception as e:
+            # Nodes refuse to estimate a call over the block gas limit ("gas required exceeds allowance")
+            if len(batch) == 1:
+                raise
+            print(f"Gas estimate failed for a batch of {len(batch)}, halving it: {str(e)}")
+            size = max_batch = len(batch) // 2
+            probing = False
+            continue
+        if probing:
+            # The probe only measures gas per record; it is not sent as a batch of its own
+            probing = False
+            size = max(1, min(max_batch, len(batch) * gas_target // estimate))
+            continue
+        if estimate > gas_target and len(batch) > 1:
+            size = max(1, min(len(batch) - 1, len(batch) * gas_target // estimate))
+            continue
+        batches.append(batch)
+        start += len(batch)
+        size = max(1, min(max_batch, len(batch) * gas_target // estimate))
+    return batches
+
+def submit_certificates_bulk(records):
+    """
+    Send issueCertificates transactions for prepared records without waiting for them.
+    Returns a list of (batch, transaction_hash) pairs; batches go out pipelined across the sender pool.
+    """
+    web3_instance = get_web3()
+    contract = get_current_contract()
+    account = sender_pool.accounts(web3_instance)[0]
+    gas_target = get_bulk_gas_target(web3_instance)
+    batches = split_issue_batches(contract, records, account, gas_target)
+    print(f"Issuing {len(records)} certificates in {len(batches)} transactions")
+
+    submissions = []
+    for batch in batches:
+        tx_hash = send_transaction(_issue_certificates_call(contract, batch))
+        submissions.append((batch, Web3.to_hex(tx_hash)))
+    return submissions
+
+def issue_certificates_bulk(records):
+    """
+    Issue many certificates with as few transactions as the block gas limit allows.
+
+    Returns one result per input record, in order, with cert_hash,
+    transaction_hash, status (issued, already_exists or failed) and error.
+    Certificates already on chain are skipped by the contract and reported
+    as already_exists.
+    """
+    from web3.logs import DISCARD
+
+    prepared = prepare_bulk_records(records)
+    unique = list({record['cert_hash']: record for record in prepared}.values())
+    if is_test_mode():
+        return [{'cert_hash': record['cert_hash'], 'transaction_hash': None,
+                 'status': BULK_STATUS_ISSUED, 'error': None} for record in prepared]
+
+    web3_instance = get_web3()
+    try:
+        submissions = submit_certificates_bulk(unique)
+    except Exception as e:
+        raise_issuance_error(e)
+
+    contract = get_current_contract()
+    outcomes = {}
+    for batch, tx_hash in submissions:
+        try:
+            receipt = wait_for_receipt(web3_instance, tx_hash)
+        except Exception as e:
+            for record in batch:
+                outcomes[record['cert_hash']] = (tx_hash, BULK_STATUS_FAILED, f"No receipt: {str(e)}")
+            continue
+
+        if receipt.status != 1:
+            for record in batch:
+                outcomes[record['cert_hash']] = (tx_hash, BULK_STATUS_FAILED, "Transaction reverted")
+            continue
+
+        issued = {
+            Web3.to_hex(event['args']['certHash']).lower()
+            for event in contract.events.CertificateIssued().process_receipt(receipt, errors=DISCARD)
+        }
+        for record in batch:
+            if record['cert_hash'].lower() in issued:
+                outcomes[record['cert_hash']] = (tx_hash, BULK_STATUS_ISSUED, None)
+            else:
+                outcomes[record['cert_hash']] = (tx_hash, BULK_STATUS_ALREADY_EXISTS, None)
+
+    results = []
+    for record in prepared:
+        tx_hash, outcome, error = outcomes[record['cert_hash']]
+        results.append({'cert_hash': record['cert_hash'], 'transaction_hash': tx_hash,
+                        'status': outcome, 'error': error})
+    return results
+
+def anchor_merkle_root(root, certificate_count):
+    """Send an anchorRoot transaction and return its hash without waiting for it"""
+    get_web3()
+    contract = get_current_contract()
+    try:
+        tx_hash = send_transaction(contract.functions.anchorRoot(cert_hash_to_bytes(root), certificate_count))
+    except Exception as e:
+        raise_issuance_error(e)
+    print(f"Anchoring Merkle root {root} for {certificate_count} certificates: {Web3.to_hex(tx_hash)}")
+    return Web3.to_hex(tx_hash)
+
+class AnchoredRootCache:
+    """
+    Cache of Merkle roots known to be anchored, keyed by contract address and root.
+
+    Anchored roots can never change or be removed, so positive lookups are
+    kept for the life of the process and verification normally needs no RPC
+    at all. Roots that are not anchored yet are always asked again.
+    """
+
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._anchored_at = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_anchored_at(self, root):
+        """Unix time the root was anchored, or 0 if it is not anchored"""
+        contract = get_current_contract()
+        key = (contract.address, root.lower())
+        with self._lock:
+            anchored_at = self._anchored_at.get(key)
+            if anchored_at:
+                self.hits += 1
+                return anchored_at
+            self.misses += 1
+
+        anchored_at = contract.functions.anchoredRoots(cert_hash_to_bytes(root)).call()
+        if anchored_at:
+            with self._lock:
+                if len(self._anchored_at) >= self.max_entries:
+                    self._anchored_at.clear()
+                self._anchored_at[key] = anchored_at
+        return anchored_at
+
+    def invalidate(self):
+        with self._lock:
+            self._anchored_at.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'roots': len(self._anchored_at), 'hits': self.hits, 'misses': self.misses}
+
+anchored_roots = AnchoredRootCache()
+
+def get_transaction_receipts(tx_hashes):
+    """
+    Fetch receipts for many transactions in one JSON-RPC batch.
+    Returns {tx_hash: receipt} where receipt is the raw RPC dict, or None while still pending.
+    """
+    if not tx_hashes:
+        return {}
+    # Certificates issued in bulk share a transaction, so ask for each receipt once
+    tx_hashes = list(dict.fromkeys(tx_hashes))
+    web3_instance = get_web3()
+    payload = [
+        {'jsonrpc': '2.0', 'id': index, 'method': 'eth_getTransactionReceipt', 'params': [tx_hash]}
+        for index, tx_hash in enumerate(tx_hashes)
+    ]
+    try:
+        replies = post_rpc_batch(web3_instance, payload)
+    except SmartContractError:
+        raise
+    except Exception as e:
+        if is_connection_error(e):
+            connection.mark_unavailable(e)
+        raise BlockchainConnectionError(f"Receipt lookup failed: {str(e)}")
+    return {tx_hash: replies.get(index, {}).get('result') for index, tx_hash in enumerate(tx_hashes)}
+
+CONFIRMATION_DEPTH = getattr(settings, 'BLOCKCHAIN_CONFIRMATION_DEPTH', 1)
+
+def get_block_headers(block_numbers):
+    """
+    Fetch hash and timestamp for many blocks in JSON-RPC batches.
+    Returns {block_number: {'hash': ..., 'timestamp': ...}}, or None for blocks the node does not have.
+    """
+    block_numbers = sorted(set(block_numbers))
+    if not block_numbers:
+        return {}
+    web3_instance = get_web3()
+    headers = {}
+    for start in range(0, len(block_numbers), RPC_BATCH_SIZE):
+        chunk = block_numbers[start:start + RPC_BATCH_SIZE]
+        payload = [
+            {'jsonrpc': '2.0', 'id': index, 'method': 'eth_getBlockByNumber', 'params': [hex(number), False]}
+            for index, number in enumerate(chunk)
+        ]
+        try:
+            replies = post_rpc_batch(web3_instance, payload)
+        except SmartContractError:
+            raise
+        except Exception as e:
+            if is_connection_error(e):
+                connection.mark_unavailable(e)
+            raise BlockchainConnectionError(f"Block header lookup failed: {str(e)}")
+        for index, number in enumerate(chunk):
+            block = replies.get(index, {}).get('result')
+            headers[number] = {'hash': block['hash'], 'timestamp': int(block['timestamp'], 16)} if block else None
+    return headers
+
+VERIFY_CACHE_SIZE = getattr(settings, 'CERTIFICATE_VERIFY_CACHE_SIZE', 10000)
+VERIFY_CACHE_TTL = getattr(settings, 'CERTIFICATE_VERIFY_CACHE_TTL', 60)
+VERIFY_CACHE_SHARED_TTL = getattr(settings, 'CERTIFICATE_VERIFY_CACHE_SHARED_TTL', 0)
+VERIFY_CACHE_ALIAS = getattr(settings, 'CERTIFICATE_VERIFY_CACHE_ALIAS', 'default')
+
+class VerificationCache:
+    """
+    Read-through cache of verifyCertificate results.
+
+    A certificate's on-chain record only changes when it is revoked, so found
+    results are cached in a bounded in-process LRU with a TTL, and optionally
+    in a shared Django cache tier (shared_ttl > 0) so workers can fill each
+    other. Entries are keyed by chain id and the contract address the handle
+    actually resolved to, so switching networks or redeploying never serves
+    another contract's results. Revocation invalidates both tiers; other
+    workers' local entries expire after ttl. "Not found" is never cached
+    because the certificate may be issued a moment later.
+    """
+
+    def __init__(self, max_entries=VERIFY_CACHE_SIZE, ttl=VERIFY_CACHE_TTL,
+                 shared_ttl=VERIFY_CACHE_SHARED_TTL, cache_alias=VERIFY_CACHE_ALIAS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.shared_ttl = shared_ttl
+        self.cache_alias = cache_alias
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._last_scope = None
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def scope(self):
+        """(chain id, resolved contract address) results are cached under, or None when unknown"""
+        configured_address = get_configured_contract_address()
+        web3_instance = get_web3_or_none()
+        if web3_instance is not None:
+            try:
+                scope = contract_registry.scope(web3_instance)
+            except Exception as e:
+                print(f"Verification cache bypassed, contract not resolved: {str(e)}")
+                return None
+            self._last_scope = (configured_address, scope)
+            return scope
+        # While the node is unreachable keep answering for the contract it last resolved to
+        last_scope = self._last_scope
+        if last_scope is not None and last_scope[0] == configured_address:
+            return last_scope[1]
+        return None
+
+    def _normalize(self, cert_hash):
+        cert_hash = cert_hash.lower()
+        return cert_hash if cert_hash.startswith('0x') else '0x' + cert_hash
+
+    def _key(self, cert_hash, scope):
+        chain_id, contract_address = scope
+        return f"certverify:{chain_id}:{contract_address.lower()}:{self._normalize(cert_hash)}"
+
+    def _shared(self):
+        from django.core.cache import caches
+        return caches[self.cache_alias]
+
+    def get(self, cert_hash):
+        """Cached result for cert_hash, or None"""
+        return self.get_many([cert_hash]).get(cert_hash)
+
+    def get_many(self, cert_hashes):
+        """{cert_hash: result} for the hashes that are cached; the shared tier is read in one round-trip"""
+        if self.max_entries <= 0:
+            return {}
+        scope = self.scope()
+        if scope is None:
+            with self._lock:
+                self.misses += len(cert_hashes)
+            return {}
+        keys = {cert_hash: self._key(cert_hash, scope) for cert_hash in cert_hashes}
+        found = {}
+        now = time.monotonic()
+        with self._lock:
+            for cert_hash, key in keys.items():
+                entry = self._entries.get(key)
+                if entry is not None:
+                    if entry[1] > now:
+                        self._entries.move_to_end(key)
+                        self.hits += 1
+                        found[cert_hash] = entry[0]
+                        continue
+                    del self._entries[key]
+
+        missing = {key: cert_hash for cert_hash, key in keys.items() if cert_hash not in found}
+        if missing and self.shared_ttl > 0:
+            try:
+                shared = self._shared().get_many(list(missing))
+            except Exception as e:
+                print(f"Shared verification cache unavailable: {str(e)}")
+                shared = {}
+            for key, result in shared.items():
+                if result is None:
+                    continue
+                result = tuple(result)
+                self._store_local(key, result)
+                found[missing.pop(key)] = result
+                with self._lock:
+                    self.shared_hits += 1
+
+        with self._lock:
+            self.misses += len(missing)
+        return found
+
+    def _store_local(self, key, result):
+        with self._lock:
+            self._entries[key] = (result, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def set(self, cert_hash, result):
+        self.set_many({cert_hash: result})
+
+    def set_many(self, results):
+        """Cache {cert_hash: result} in both tiers"""
+        if self.max_entries <= 0 or not results:
+            return
+        scope = self.scope()
+        if scope is None:
+            return
+        entries = {self._key(cert_hash, scope): tuple(result) for cert_hash, result in results.items()}
+        for key, result in entries.items():
+            self._store_local(key, result)
+        if self.shared_ttl > 0:
+            try:
+                self._shared().set_many(entries, self.shared_ttl)
+            except Exception as e:
+                print(f"Shared verification cache unavailable: {str(e)}")
+
+    def invalidate(self, cert_hash):
+        """Drop cert_hash from both tiers, e.g. after it was revoked"""
+        scope = self.scope()
+        if scope is None:
+            # The contract cannot be resolved; drop every local entry for this hash
+            suffix = ':' + self._normalize(cert_hash)
+            with self._lock:
+                for key in [key for key in self._entries if key.endswith(suffix)]:
+                    del self._entries[key]
+            return
+        key = self._key(cert_hash, scope)
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.shared_ttl > 0:
+            try:
+                self._shared().delete(key)
+            except Exception as e:
+                print(f"Shared verification cache unavailable: {str(e)}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+            }
+
+verification_cache = VerificationCache()
+
 def verify_certificate_on_chain(cert_hash):
+    """Verify a certificate on the blockchain, answering from the verification cache when possible"""
+    result = verification_cache.get(cert_hash)
+    if result is not None:
+        return result
+    result = fetch_certificate_from_chain(cert_hash)
+    verification_cache.set(cert_hash, result)
+    return result
+
+def fetch_certificate_from_chain(cert_hash):
     """Verify a certificate on the blockchain"""
-    if not web3:
+    if not get_web3_or_none():
         print("Error: Web3 connection not available")
         raise BlockchainConnectionError("Web3 connection not available")
     
@@ -357,6 +1423,11 @@ def verify_certificate_on_chain(cert_hash):
                 raise SmartContractError("Certificate not found on blockchain")
             elif "revert" in error_msg:
                 raise SmartContractError(f"Contract reverted: {error_msg}")
+            elif isinstance(contract_error, (RPCDeadlineExceeded, requests.exceptions.Timeout)):
+                raise BlockchainConnectionError(f"Blockchain node timed out: {error_msg}")
+            elif is_connection_error(contract_error):
+                connection.mark_unavailable(contract_error)
+                raise BlockchainConnectionError("Failed to connect to blockchain")
             else:
                 raise SmartContractError(f"Contract call failed: {error_msg}")
     except Exception as e:
@@ -365,29 +1436,253 @@ def verify_certificate_on_chain(cert_hash):
             
         error_msg = str(e)
         print(f"Error during blockchain verification: {error_msg}")
-        if "connection" in error_msg.lower():
+        if is_connection_error(e):
+            connection.mark_unavailable(e)
             raise BlockchainConnectionError("Failed to connect to blockchain")
         
         raise SmartContractError(f"Blockchain verification failed: {error_msg}")
 
-def revoke_certificate(cert_hash):
-    """Revoke a certificate on the blockchain"""
-    if not web3 or not contract:
+def cert_hash_to_bytes(cert_hash):
+    """Convert a 0x-prefixed or bare hex certificate hash to bytes32"""
+    hex_hash = cert_hash[2:] if cert_hash.startswith('0x') else cert_hash
+    if len(hex_hash) != 64:
+        raise SmartContractError(f"Invalid certificate hash length: expected 64 hex chars, got {len(hex_hash)}")
+    try:
+        return bytes.fromhex(hex_hash)
+    except ValueError as e:
+        raise SmartContractError(f"Invalid certificate hash format: {str(e)}")
+
+def post_rpc_batch(web3_instance, payload):
+    """Send a list of JSON-RPC requests to the node in a single HTTP round-trip"""
+    provider = web3_instance.provider
+    session = getattr(provider, 'session', None) or rpc_session
+    response = session.post(
+        provider.endpoint_uri,
+        json=payload,
+        headers={'Content-Type': 'application/json'},
+        timeout=get_rpc_timeout(),
+    )
+    response.raise_for_status()
+    replies = response.json()
+    if not isinstance(replies, list):
+        raise SmartContractError(f"Node does not support JSON-RPC batches: {replies}")
+    return {reply.get('id'): reply for reply in replies}
+
+RPC_BATCH_SIZE = getattr(settings, 'BLOCKCHAIN_RPC_BATCH_SIZE', 200)
+
+def verify_certificates_rpc_batch(cert_hashes, batch_size=None):
+    """
+    Verify many certificates with batched verifyCertificate eth_calls.
+
+    Returns {cert_hash: (result, error)} where result is the same tuple
+    verify_certificate_on_chain returns, or None with an error message.
+    Results in the verification cache skip the node, and found ones are cached.
+    """
+    cached = verification_cache.get_many(cert_hashes)
+    results = {cert_hash: (result, None) for cert_hash, result in cached.items()}
+    if len(results) == len(set(cert_hashes)):
+        return results
+
+    web3_instance = get_web3()
+    contract = get_current_contract()
+    batch_size = batch_size or RPC_BATCH_SIZE
+    output_types = [
+        output['type'] for output in contract.get_function_by_name('verifyCertificate').abi['outputs']
+    ]
+
+    calls = []
+    for cert_hash in cert_hashes:
+        if cert_hash in results:
+            continue
+        try:
+            cert_hash_bytes = cert_hash_to_bytes(cert_hash)
+        except SmartContractError as e:
+            results[cert_hash] = (None, str(e))
+            continue
+        calldata = contract.encodeABI(fn_name='verifyCertificate', args=[cert_hash_bytes])
+        calls.append((cert_hash, calldata))
+
+    for start in range(0, len(calls), batch_size):
+        chunk = calls[start:start + batch_size]
+        payload = [
+            {
+                'jsonrpc': '2.0',
+                'id': index,
+                'method': 'eth_call',
+                'params': [{'to': contract.address, 'data': calldata}, 'latest'],
+            }
+            for index, (cert_hash, calldata) in enumerate(chunk)
+        ]
+        try:
+            replies = post_rpc_batch(web3_instance, payload)
+        except SmartContractError:
+            raise
+        except Exception as e:
+            if is_connection_error(e):
+                connection.mark_unavailable(e)
+            raise BlockchainConnectionError(f"Batch verification request failed: {str(e)}")
+        print(f"Verified batch of {len(chunk)} certificates in one RPC round-trip")
+
+        for index, (cert_hash, calldata) in enumerate(chunk):
+            reply = replies.get(index, {})
+            data = reply.get('result')
+            if 'error' in reply or not data or data == '0x':
+                message = (reply.get('error') or {}).get('message', '')
+                if not message or 'revert' in message.lower():
+                    results[cert_hash] = (None, "Certificate not found on blockchain")
+                else:
+                    results[cert_hash] = (None, f"Contract call failed: {message}")
+                continue
+            try:
+                decoded = list(web3_instance.codec.decode(output_types, bytes.fromhex(data[2:])))
+            except Exception as e:
+                results[cert_hash] = (None, f"Could not decode verification result: {str(e)}")
+                continue
+            try:
+                datetime.fromtimestamp(decoded[4])
+            except Exception:
+                decoded[0] = False  # Mark as invalid if date is incorrect
+            results[cert_hash] = (tuple(decoded), None)
+
+    verification_cache.set_many({
+        cert_hash: result for cert_hash, (result, _) in results.items()
+        if result is not None and cert_hash not in cached
+    })
+    return results
+
+# Status codes returned by the contract's verifyCertificates batch view
+CERT_STATUS_NOT_FOUND = 0
+CERT_STATUS_VALID = 1
+CERT_STATUS_REVOKED = 2
+
+VERIFY_CHUNK_SIZE = getattr(settings, 'BLOCKCHAIN_VERIFY_CHUNK_SIZE', 250)
+
+def is_gas_limit_error(error):
+    """Whether an eth_call failed because it ran into the node's gas cap"""
+    error_msg = str(error).lower()
+    return 'out of gas' in error_msg or 'gas cap' in error_msg or 'gas limit' in error_msg
+
+def _call_verify_certificates(contract, hashes_bytes):
+    try:
+        return contract.functions.verifyCertificates(hashes_bytes).call()
+    except Exception as e:
+        if is_gas_limit_error(e) and len(hashes_bytes) > 1:
+            # Split the chunk until each half fits under the node's gas cap
+            middle = len(hashes_bytes) // 2
+            first = _call_verify_certificates(contract, hashes_bytes[:middle])
+            second = _call_verify_certificates(contract, hashes_bytes[middle:])
+            return [a + b for a, b in zip(first, second)]
+        raise
+
+def verify_certificates_on_chain(cert_hashes, chunk_size=None):
+    """
+    Verify many certificates with the contract's verifyCertificates view.
+
+    One eth_call covers up to chunk_size hashes; chunks that hit the node's
+    gas cap are split in half and retried. Returns {cert_hash: (result, error)}
+    in the same shape as verify_certificates_rpc_batch, sharing its use of the
+    verification cache.
+    """
+    cached = verification_cache.get_many(cert_hashes)
+    results = {cert_hash: (result, None) for cert_hash, result in cached.items()}
+    if len(results) == len(set(cert_hashes)):
+        return results
+
+    get_web3()
+    contract = get_current_contract()
+    if not hasattr(contract.functions, 'verifyCertificates'):
+        raise ContractFunctionUnavailable("Contract ABI has no verifyCertificates function")
+    chunk_size = chunk_size or VERIFY_CHUNK_SIZE
+
+    valid_hashes = []
+    for cert_hash in cert_hashes:
+        if cert_hash in results:
+            continue
+        try:
+            valid_hashes.append((cert_hash, cert_hash_to_bytes(cert_hash)))
+        except SmartContractError as e:
+            results[cert_hash] = (None, str(e))
+
+    for start in range(0, len(valid_hashes), chunk_size):
+        chunk = valid_hashes[start:start + chunk_size]
+        try:
+            statuses, names, courses, institutions, issue_dates = _call_verify_certificates(
+                contract, [cert_hash_bytes for _, cert_hash_bytes in chunk]
+            )
+        except Exception as e:
+            error_msg = str(e)
+            if isinstance(e, (RPCDeadlineExceeded, requests.exceptions.Timeout)):
+                raise BlockchainConnectionError(f"Blockchain node timed out: {error_msg}")
+            if is_connection_error(e):
+                connection.mark_unavailable(e)
+                raise BlockchainConnectionError("Failed to connect to blockchain")
+            if start == 0 and ("revert" in error_msg.lower() or "InsufficientDataBytes" in error_msg):
+                # Older deployments have no verifyCertificates function
+                raise ContractFunctionUnavailable(f"verifyCertificates call failed: {error_msg}")
+            raise SmartContractError(f"Batch verification failed: {error_msg}")
+        print(f"Verified {len(chunk)} certificates with one verifyCertificates call")
+
+        for index, (cert_hash, _) in enumerate(chunk):
+            if statuses[index] == CERT_STATUS_NOT_FOUND:
+                results[cert_hash] = (None, "Certificate not found on blockchain")
+                continue
+            is_valid = statuses[index] == CERT_STATUS_VALID
+            try:
+                datetime.fromtimestamp(issue_dates[index])
+            except Exception:
+                is_valid = False  # Mark as invalid if date is incorrect
+            results[cert_hash] = (
+                (is_valid, names[index], courses[index], institutions[index], issue_dates[index]),
+                None,
+            )
+
+    verification_cache.set_many({
+        cert_hash: result for cert_hash, (result, _) in results.items()
+        if result is not None and cert_hash not in cached
+    })
+    return results
+
+def revoke_certificate(cert_hash, anchored=False):
+    """
+    Revoke a certificate on the blockchain.
+    Certificates issued through Merkle anchoring are revoked with revokeAnchoredCertificate.
+    """
+    web3 = get_web3_or_none()
+    if not web3:
         raise BlockchainConnectionError("Blockchain connection not available")
         
     try:
-        # Get the first account to use as sender (assuming it's an admin account)
-        account = web3.eth.accounts[0]
-        
-        # Call the smart contract's revokeCertificate function
-        tx_hash = contract.functions.revokeCertificate(cert_hash).transact({'from': account})
+        contract = get_current_contract()
+
+        # Call the smart contract's revokeCertificate function from a pooled sender
+        revoke = contract.functions.revokeAnchoredCertificate if anchored else contract.functions.revokeCertificate
+        tx_hash = send_transaction(revoke(cert_hash))
         
         # Wait for transaction to be mined
-        tx_receipt = web3.eth.wait_for_transaction_receipt(tx_hash)
+        tx_receipt = wait_for_receipt(web3, tx_hash)
         
         if tx_receipt.status != 1:
             raise SmartContractError("Revocation transaction failed")
-            
+
+        verification_cache.invalidate(cert_hash)
         return True
     except Exception as e:
-        raise SmartContractError(f"Certificate revocation failed: {str(e)}")
\ No newline at end of file
+        raise SmartContractError(f"Certificate revocation failed: {str(e)}")
+
+
+def submit_revocation(cert_hash, anchored=False):
+    """
+    Send the revocation transaction and return its hash without waiting for it to be mined.
+    The receipt tracker marks the certificate revoked once the transaction is confirmed.
+    """
+    web3 = get_web3_or_none()
+    if not web3:
+        raise BlockchainConnectionError("Blockchain connection not available")
+    try:
+        contract = get_current_contract()
+        revoke = contract.functions.revokeAnchoredCertificate if anchored else contract.functions.revokeCertificate
+        tx_hash = send_transaction(revoke(cert_hash))
+    except Exception as e:
+        raise SmartContractError(f"Certificate revocation failed: {str(e)}")
+    print(f"Revocation of {cert_hash} sent with hash: {Web3.to_hex(tx_hash)}")
+    return Web3.to_hex(tx_hash)
@@ -0,0 +1,302 @@
+# certificates/bloom.py
+"""
+Bloom filter of every known certificate hash.
+
+verify/<hash>/ asks the filter first and answers 404 when a hash is
+definitely absent, so typos, scraped hashes and probes never reach the node
+and only cost one indexed lookup of recent rows. Hashes are added as
+certificates are saved in this process. The filter is built and refreshed
+by a daemon thread, started on first use, and each finished build is
+swapped in whole, so requests never wait on a table scan. Certificates
+created elsewhere (other workers, bulk inserts by the indexer) are picked
+up by that thread's refresh every refresh_interval; until then a negative
+answer is checked against rows created since the last refresh.
+
+Ids are handed out before a transaction commits, so on Postgres a row can
+become visible after rows with higher ids. A refresh therefore re-scans
+every id it first saw less than BLOOM_SETTLE_SECONDS ago, which covers any
+insert transaction that stays open for less than that.
+
+When a hash snapshot (certificates.snapshot) is mapped, hashes it holds are
+answered from the snapshot and the filter only covers certificates after the
+snapshot's safe id.
+"""
+
+import hashlib
+import math
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db import connection as db_connection
+from django.utils import timezone
+
+from .hashes import normalize_hash
+
+BLOOM_CAPACITY = getattr(settings, 'CERTIFICATE_BLOOM_CAPACITY', 1000000)
+BLOOM_ERROR_RATE = getattr(settings, 'CERTIFICATE_BLOOM_ERROR_RATE', 0.001)
+BLOOM_REFRESH_INTERVAL = getattr(settings, 'CERTIFICATE_BLOOM_REFRESH_INTERVAL', 1.0)
+BLOOM_SETTLE_SECONDS = getattr(settings, 'CERTIFICATE_INSERT_SETTLE_SECONDS', 60.0)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter sized for capacity items at error_rate"""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(math.ceil(-self.capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / self.capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item, digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def estimated_false_positive_rate(self):
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+
+class KnownHashFilter:
+    """
+    Process-wide Bloom filter over Certificate.cert_hash, built from the
+    database by a background thread and grown (rebuilt at twice the size)
+    when it fills past its capacity. Certificates up to the hash snapshot's
+    safe id are left out.
+    """
+
+    def __init__(self, capacity=BLOOM_CAPACITY, error_rate=BLOOM_ERROR_RATE,
+                 refresh_interval=BLOOM_REFRESH_INTERVAL, snapshot=None, settle_seconds=BLOOM_SETTLE_SECONDS):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.refresh_interval = refresh_interval
+        self.settle_seconds = settle_seconds
+        self.snapshot = snapshot
+        self._lock = threading.RLock()
+        self._filter = None
+        self._base_id = 0
+        self._last_id = 0
+        # Ids up to _settled_id are visible for good; (scan start, highest id seen) for later scans
+        self._settled_id = 0
+        self._scans = deque()
+        # Wall-clock start of the last completed scan; rows created after it less settle_seconds may be missing
+        self._scanned_at = None
+        # Hashes added while a build is scanning, replayed into the new filter
+        self._building = None
+        self._needs_rebuild = False
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self.checks = 0
+        self.rejected = 0
+        self.recent_lookups = 0
+        self.builds = 0
+        self.refreshes = 0
+
+    def _get_snapshot(self):
+        if self.snapshot is None:
+            from .snapshot import hash_snapshot
+            self.snapshot = hash_snapshot
+        return self.snapshot
+
+    def build(self):
+        """(Re)build the filter from every certificate newer than the hash snapshot and swap it in"""
+        from .models import Certificate
+
+        with self._lock:
+            self._building = []
+        started = time.monotonic()
+        scanned_at = timezone.now()
+        base_id = self._get_snapshot().safe_id
+        rows = Certificate.objects.filter(id__gt=base_id)
+        total = rows.count()
+        bloom = BloomFilter(max(self.capacity, total * 2), self.error_rate)
+        last_id = base_id
+        for row_id, cert_hash in rows.order_by('id').values_list('id', 'cert_hash').iterator(chunk_size=10000):
+            item = normalize_hash(cert_hash)
+            if item is not None:
+                bloom.add(item)
+            last_id = row_id
+
+        with self._lock:
+            for item in self._building:
+                if item not in bloom:
+                    bloom.add(item)
+            self._building = None
+            self._filter = bloom
+            self._base_id = base_id
+            self._last_id = last_id
+            self._settled_id = base_id
+            self._scans = deque([(started, last_id)])
+            self._scanned_at = scanned_at
+            self._needs_rebuild = False
+            self.builds += 1
+        print(f"Built certificate Bloom filter: {bloom.count} hashes, {bloom.num_bits} bits")
+
+    def refresh(self):
+        """Add certificates that became visible since the last build or refresh"""
+        from .models import Certificate
+
+        if self._filter is None:
+            self.build()
+            return
+        started = time.monotonic()
+        scanned_at = timezone.now()
+        rows = list(
+            Certificate.objects.filter(id__gt=self._settled_id).order_by('id').values_list('id', 'cert_hash')
+        )
+        with self._lock:
+            for row_id, cert_hash in rows:
+                self._add_locked(normalize_hash(cert_hash))
+                self._last_id = max(self._last_id, row_id)
+            # Every id up to the highest one an earlier scan saw was handed out before that scan
+            # started; once settle_seconds have passed since, those rows have committed and this
+            # scan has seen them
+            while self._scans and self._scans[0][0] + self.settle_seconds <= started:
+                self._settled_id = max(self._settled_id, self._scans.popleft()[1])
+            self._scans.append((started, self._last_id))
+            self._scanned_at = scanned_at
+            self.refreshes += 1
+
+    def maintain(self):
+        """One round of the background thread: build when needed, otherwise refresh"""
+        if self._filter is None or self._needs_rebuild or self._get_snapshot().safe_id < self._base_id:
+            self.build()
+        else:
+            self.refresh()
+
+    def start(self):
+        """Start the thread that builds and refreshes the filter, if it is not running"""
+        from .blockchain import is_test_mode
+
+        if is_test_mode():
+            return
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='bloom-refresh', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                try:
+                    self.maintain()
+                except Exception as e:
+                    print(f"Bloom filter refresh failed: {str(e)}")
+                finally:
+                    close_old_connections()
+                self._wake.wait(self.refresh_interval)
+                self._wake.clear()
+        finally:
+            db_connection.close()
+
+    def stop(self):
+        """Stop the background thread after its current round"""
+        with self._thread_lock:
+            thread = self._thread
+            self._stop.set()
+            self._wake.set()
+        if thread is not None:
+            thread.join()
+
+    def _add_locked(self, item):
+        if item is None:
+            return
+        if self._building is not None:
+            self._building.append(item)
+        if self._filter is None or item in self._filter:
+            # Refreshes see recent rows more than once
+            return
+        self._filter.add(item)
+        if self._filter.count > self._filter.capacity and not self._needs_rebuild:
+            # Still no false negatives, only more false positives until the thread grows it
+            self._needs_rebuild = True
+            self._wake.set()
+
+    def add(self, cert_hash):
+        """Record a newly issued certificate hash"""
+        with self._lock:
+            self._add_locked(normalize_hash(cert_hash))
+
+    def _recently_created(self, cert_hash):
+        """Whether cert_hash is a row the last scan may have missed; one indexed lookup"""
+        from .models import Certificate
+
+        since = self._scanned_at - timedelta(seconds=self.settle_seconds)
+        return Certificate.objects.filter(cert_hash=cert_hash, created_at__gte=since).exists()
+
+    def might_contain(self, cert_hash):
+        """False only when cert_hash is definitely not a known certificate"""
+        item = normalize_hash(cert_hash)
+        with self._lock:
+            self.checks += 1
+            if item is None:
+                self.rejected += 1
+                return False
+        self.start()
+        snapshot = self._get_snapshot()
+        if snapshot.status(cert_hash) is not None:
+            return True
+        with self._lock:
+            # Not built yet, or a snapshot older than the one the filter was built on leaves a gap
+            if self._filter is None or snapshot.safe_id < self._base_id:
+                self._wake.set()
+                return True
+            if item in self._filter:
+                return True
+            self.recent_lookups += 1
+        if self._recently_created(cert_hash):
+            return True
+        with self._lock:
+            self.rejected += 1
+        return False
+
+    def reset(self):
+        with self._lock:
+            self._filter = None
+            self._base_id = 0
+            self._last_id = 0
+            self._settled_id = 0
+            self._scans.clear()
+            self._scanned_at = None
+            self._needs_rebuild = False
+
+    def stats(self):
+        with self._lock:
+            bloom = self._filter
+            return {
+                'built': bloom is not None,
+                'capacity': bloom.capacity if bloom else self.capacity,
+                'target_error_rate': self.error_rate,
+                'size_bytes': len(bloom.bits) if bloom else 0,
+                'hash_functions': bloom.num_hashes if bloom else 0,
+                'hashes': bloom.count if bloom else 0,
+                'base_id': self._base_id,
+                'settled_id': self._settled_id,
+                'estimated_error_rate': bloom.estimated_false_positive_rate() if bloom else 0.0,
+                'checks': self.checks,
+                'rejected': self.rejected,
+                'recent_lookups': self.recent_lookups,
+                'builds': self.builds,
+                'refreshes': self.refreshes,
+                'refreshing': self._thread is not None and self._thread.is_alive(),
+            }
+
+
+known_hashes = KnownHashFilter()
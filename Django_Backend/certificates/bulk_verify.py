@@ -0,0 +1,276 @@
+# certificates/bulk_verify.py
+"""
+Streaming verification of an uploaded CSV file of certificates.
+
+Each row names a certificate by cert_hash, or by student_name, course,
+institution and issue_date (YYYY-MM-DD, optionally narrowed by timezone or
+issue_date_timestamp as on verify-details/). The file is parsed a line at a
+time and verified BULK_VERIFY_CHUNK_SIZE rows at a time: one query finds the
+chunk's certificates by hash and one by details, and the certificates that
+need the chain are checked with batched contract calls. A chunk's results are
+sent before the next chunk is read, so memory is bounded by the chunk size
+whatever the size of the file and results arrive while the rest is checked.
+"""
+
+import codecs
+import csv
+import io
+import json
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+from django.conf import settings
+from rest_framework import serializers
+
+from .export import CONTENT_TYPES, EXPORT_FORMATS, FORMAT_CSV, FORMAT_NDJSON, csv_value
+from .hashes import format_hash
+from .models import Certificate
+from .verification import find_certificates_by_details, issue_date_candidates, verify_certificate_records
+
+BULK_VERIFY_CHUNK_SIZE = getattr(settings, 'CERTIFICATE_BULK_VERIFY_CHUNK_SIZE', 500)
+BULK_VERIFY_MAX_ROWS = getattr(settings, 'CERTIFICATE_BULK_VERIFY_MAX_ROWS', 200000)
+
+DETAIL_COLUMNS = ('student_name', 'course', 'institution')
+# Header spellings accepted for each column, after lower-casing and turning spaces and dashes into underscores
+COLUMN_ALIASES = {
+    'hash': 'cert_hash', 'certhash': 'cert_hash', 'certificate_hash': 'cert_hash',
+    'name': 'student_name', 'studentname': 'student_name',
+    'date': 'issue_date', 'issuedate': 'issue_date',
+    'issuedatetimestamp': 'issue_date_timestamp',
+}
+
+STATUS_VALID = 'valid'
+STATUS_REVOKED = 'revoked'
+STATUS_CHAIN_INVALID = 'chain_invalid'
+STATUS_UNVERIFIED = 'unverified'
+STATUS_NOT_FOUND = 'not_found'
+STATUS_ERROR = 'error'
+STATUSES = (STATUS_VALID, STATUS_REVOKED, STATUS_CHAIN_INVALID, STATUS_UNVERIFIED, STATUS_NOT_FOUND, STATUS_ERROR)
+
+RESULT_COLUMNS = (
+    'row', 'cert_hash', 'status', 'is_valid', 'database_valid', 'blockchain_valid', 'certificate_id',
+    'student_name', 'course', 'institution', 'issue_date', 'matched_timestamp', 'error',
+)
+
+
+def spool_body(stream):
+    """
+    Copy a request body into a temporary file, kept in memory up to
+    FILE_UPLOAD_MAX_MEMORY_SIZE, so the response can stream results after
+    the request itself is finished with.
+    """
+    body = tempfile.SpooledTemporaryFile(max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+    shutil.copyfileobj(stream, body, 64 * 1024)
+    body.seek(0)
+    return body
+
+
+def normalize_column(name):
+    name = name.strip().lower().replace(' ', '_').replace('-', '_')
+    return COLUMN_ALIASES.get(name, name)
+
+
+class BulkVerification:
+    """
+    An iterable of bytes with one verification result per data row of a CSV
+    file. lines is any iterable of byte lines (an uploaded file or the
+    request body). The header is read on construction, so a file that names
+    no usable columns raises ValueError before anything is sent. NDJSON
+    output has a progress line after every chunk and a summary line at the end.
+    """
+
+    def __init__(self, lines, export_format=FORMAT_NDJSON, deadline=5.0,
+                 chunk_size=BULK_VERIFY_CHUNK_SIZE, max_rows=BULK_VERIFY_MAX_ROWS):
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Invalid output format: {export_format} (expected {' or '.join(EXPORT_FORMATS)})")
+        self.export_format = export_format
+        self.deadline = deadline
+        self.chunk_size = max(1, chunk_size)
+        self.max_rows = max_rows
+
+        self.lines = lines
+        self.reader = csv.reader(codecs.iterdecode(lines, 'utf-8-sig'))
+        try:
+            header = next(self.reader, None)
+        except (csv.Error, UnicodeDecodeError) as e:
+            raise ValueError(f"Could not read the CSV header: {str(e)}")
+        if not header:
+            raise ValueError("The CSV file is empty")
+        self.columns = [normalize_column(column) for column in header]
+        if 'cert_hash' not in self.columns and not (
+                all(column in self.columns for column in DETAIL_COLUMNS)
+                and ('issue_date' in self.columns or 'issue_date_timestamp' in self.columns)):
+            raise ValueError("The CSV file needs a cert_hash column or student_name, course, "
+                             "institution and issue_date columns")
+
+        self.counts = dict.fromkeys(STATUSES, 0)
+        self.rows_read = 0
+        self.truncated = False
+        self.started = None
+        self._datetime_field = serializers.DateTimeField()
+
+    @property
+    def content_type(self):
+        return CONTENT_TYPES[self.export_format]
+
+    def parse_row(self, number, values):
+        """The lookup a CSV row asks for: a cert_hash, details, or an error"""
+        row = dict(zip(self.columns, (value.strip() for value in values)))
+        entry = {'row': number}
+        if row.get('cert_hash'):
+            cert_hash = format_hash(row['cert_hash'])
+            if cert_hash is None:
+                entry['error'] = f"Invalid certificate hash: {row['cert_hash']}"
+            else:
+                entry['cert_hash'] = cert_hash
+            return entry
+
+        details = [row.get(column, '') for column in DETAIL_COLUMNS]
+        issue_date = row.get('issue_date', '')
+        issue_date_timestamp = row.get('issue_date_timestamp', '')
+        if not all(details) or not (issue_date or issue_date_timestamp):
+            entry['error'] = "Row needs a cert_hash or student_name, course, institution and issue_date"
+            return entry
+        try:
+            if issue_date_timestamp:
+                timestamps = [int(issue_date_timestamp)]
+            else:
+                timestamps = issue_date_candidates(datetime.strptime(issue_date, '%Y-%m-%d').date(),
+                                                   row.get('timezone') or None)
+        except (ValueError, TypeError, LookupError) as e:
+            entry['error'] = f"Invalid issue date or timezone: {str(e)}"
+            return entry
+        entry['details'] = (*details, timestamps)
+        return entry
+
+    def verify_chunk(self, entries):
+        """Results for a chunk of parsed rows, in row order"""
+        hashes = [entry['cert_hash'] for entry in entries if 'cert_hash' in entry]
+        certificates = Certificate.objects.in_bulk(hashes, field_name='cert_hash') if hashes else {}
+
+        detail_entries = [entry for entry in entries if 'details' in entry]
+        matches = find_certificates_by_details([entry['details'] for entry in detail_entries])
+        for entry, (certificate, timestamp) in zip(detail_entries, matches):
+            if certificate is not None:
+                entry['cert_hash'] = certificate.cert_hash
+                entry['matched_timestamp'] = timestamp
+                certificates[certificate.cert_hash] = certificate
+
+        chain_results = verify_certificate_records(certificates.values(), self.deadline) if certificates else {}
+        return [self.build_result(entry, certificates, chain_results) for entry in entries]
+
+    def build_result(self, entry, certificates, chain_results):
+        result = dict.fromkeys(RESULT_COLUMNS)
+        result['row'] = entry['row']
+        result['cert_hash'] = entry.get('cert_hash')
+        certificate = certificates.get(entry.get('cert_hash'))
+        if 'error' in entry:
+            result['status'] = STATUS_ERROR
+            result['error'] = entry['error']
+        elif certificate is None:
+            result['status'] = STATUS_NOT_FOUND
+            result['error'] = 'Certificate not found'
+        else:
+            blockchain_result, blockchain_error = chain_results.get(certificate.cert_hash, (None, None))
+            database_valid = not certificate.is_revoked
+            blockchain_valid = bool(blockchain_result and blockchain_result[0])
+            if not database_valid:
+                result['status'] = STATUS_REVOKED
+            elif blockchain_valid:
+                result['status'] = STATUS_VALID
+            elif blockchain_error:
+                result['status'] = STATUS_UNVERIFIED
+            else:
+                result['status'] = STATUS_CHAIN_INVALID
+            result.update({
+                'is_valid': database_valid and blockchain_valid,
+                'database_valid': database_valid,
+                'blockchain_valid': blockchain_valid,
+                'certificate_id': certificate.id,
+                'student_name': certificate.student_name,
+                'course': certificate.course,
+                'institution': certificate.institution,
+                'issue_date': self._datetime_field.to_representation(certificate.issue_date),
+                'matched_timestamp': entry.get('matched_timestamp'),
+                'error': blockchain_error,
+            })
+        self.counts[result['status']] += 1
+        return result
+
+    def read_chunks(self):
+        """Parsed rows, chunk_size at a time; stops at max_rows or an unreadable line"""
+        entries = []
+        try:
+            for values in self.reader:
+                if not any(value.strip() for value in values):
+                    continue
+                if self.rows_read >= self.max_rows:
+                    self.truncated = True
+                    entries.append({'row': self.reader.line_num,
+                                    'error': f"Row limit of {self.max_rows} reached; the rest of the file was not read"})
+                    break
+                self.rows_read += 1
+                entries.append(self.parse_row(self.reader.line_num, values))
+                if len(entries) >= self.chunk_size:
+                    yield entries
+                    entries = []
+        except (csv.Error, UnicodeDecodeError) as e:
+            self.truncated = True
+            entries.append({'row': self.reader.line_num + 1, 'error': f"Could not read the CSV file: {str(e)}"})
+        if entries:
+            yield entries
+
+    def progress(self):
+        return {
+            'rows': self.rows_read,
+            **self.counts,
+            'seconds': round(time.monotonic() - self.started, 3),
+        }
+
+    def blocks(self):
+        """Output text, one block per verified chunk"""
+        self.started = time.monotonic()
+        if self.export_format == FORMAT_CSV:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(RESULT_COLUMNS)
+            for entries in self.read_chunks():
+                for result in self.verify_chunk(entries):
+                    writer.writerow([csv_value(result[column]) for column in RESULT_COLUMNS])
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                self.log_progress()
+            if buffer.tell():
+                yield buffer.getvalue()
+            return
+
+        for entries in self.read_chunks():
+            lines = [json.dumps(result, ensure_ascii=False, separators=(',', ':'))
+                     for result in self.verify_chunk(entries)]
+            lines.append(json.dumps({'progress': self.progress()}, separators=(',', ':')))
+            yield '\n'.join(lines) + '\n'
+            self.log_progress()
+        yield json.dumps({'summary': {**self.progress(), 'truncated': self.truncated}}, separators=(',', ':')) + '\n'
+
+    def log_progress(self):
+        progress = self.progress()
+        print(f"Bulk verification: {progress['rows']} rows, {progress[STATUS_VALID]} valid, "
+              f"{progress[STATUS_NOT_FOUND]} not found in {progress['seconds']:.1f}s")
+
+    def close(self):
+        """Close the file the rows are read from; called when the response is closed"""
+        if hasattr(self.lines, 'close'):
+            self.lines.close()
+
+    def __iter__(self):
+        try:
+            for block in self.blocks():
+                if block:
+                    yield block.encode('utf-8')
+        except Exception as e:
+            # Headers are already sent; the client sees the stream end without a summary
+            print(f"Bulk verification failed after {self.rows_read} rows: {str(e)}")
+            raise
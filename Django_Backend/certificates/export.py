@@ -0,0 +1,168 @@
+# certificates/export.py
+"""
+Streaming export of the certificate registry as NDJSON or CSV.
+
+Rows are read in id order with QuerySet.iterator(chunk_size=...), turned
+into text by CertificateRowSerializer and handed out in small blocks, so
+memory stays flat however large the registry is and the first rows leave
+before the rest have been read. With compress=True the output is a single
+gzip stream, flushed after every block.
+
+Every row carries its id and the export stops at the highest id that
+existed when it started, so an interrupted download is resumed by asking
+again with after_id set to the last id received. include_chain adds the
+on-chain columns and whether the locally indexed chain already covers each
+certificate's block.
+"""
+
+import csv
+import io
+import json
+import zlib
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+
+from .indexer import CHECKPOINT_NAME
+from .models import Certificate, ChainCheckpoint
+from .serializers import CertificateRowSerializer
+
+EXPORT_CHUNK_SIZE = getattr(settings, 'CERTIFICATE_EXPORT_CHUNK_SIZE', 2000)
+EXPORT_BLOCK_BYTES = getattr(settings, 'CERTIFICATE_EXPORT_BLOCK_BYTES', 64 * 1024)
+
+FORMAT_NDJSON = 'ndjson'
+FORMAT_CSV = 'csv'
+EXPORT_FORMATS = (FORMAT_NDJSON, FORMAT_CSV)
+CONTENT_TYPES = {FORMAT_NDJSON: 'application/x-ndjson', FORMAT_CSV: 'text/csv; charset=utf-8'}
+
+# Registry columns exported when no fields are requested
+EXPORT_FIELDS = (
+    'id', 'cert_hash', 'student_name', 'course', 'institution', 'issue_date', 'issue_date_timestamp',
+    'is_revoked', 'revocation_timestamp', 'pdf_hash', 'ipfs_hash', 'created_at',
+)
+# Added by include_chain, followed by the computed 'indexed' column
+CHAIN_FIELDS = (
+    'chain_status', 'blockchain_verified', 'blockchain_timestamp', 'transaction_hash',
+    'block_number', 'block_hash', 'merkle_root',
+)
+
+
+def csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, separators=(',', ':'))
+    return value
+
+
+class CertificateExport:
+    """
+    An iterable of bytes holding every certificate in queryset with an id
+    above after_id, in id order. Usable as a StreamingHttpResponse body or
+    written to a file.
+    """
+
+    def __init__(self, queryset=None, export_format=FORMAT_NDJSON, fields=None, include_chain=False,
+                 after_id=0, compress=False, request=None, chunk_size=EXPORT_CHUNK_SIZE):
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Invalid export format: {export_format} (expected {' or '.join(EXPORT_FORMATS)})")
+        if after_id < 0:
+            raise ValueError("after_id must not be negative")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.queryset = queryset if queryset is not None else Certificate.objects.all()
+        self.export_format = export_format
+        self.include_chain = include_chain
+        self.after_id = after_id
+        self.compress = compress
+        self.chunk_size = chunk_size
+
+        fields = list(fields or EXPORT_FIELDS)
+        # The id is what a resumed export starts after, so it is always included
+        if 'id' not in fields:
+            fields.insert(0, 'id')
+        if include_chain:
+            fields += [field for field in CHAIN_FIELDS if field not in fields]
+        self.serializer = CertificateRowSerializer(request, fields)
+        self.columns = fields + ['indexed'] if include_chain else fields
+
+        # Rows created while the export runs are left for the next one
+        self.last_id = Certificate.objects.using(self.queryset.db).aggregate(last_id=Max('id'))['last_id'] or 0
+        self.indexed_block = None
+        if include_chain:
+            checkpoint = ChainCheckpoint.objects.filter(name=CHECKPOINT_NAME).first()
+            self.indexed_block = checkpoint.last_block if checkpoint else -1
+        self.rows_written = 0
+
+    @property
+    def content_type(self):
+        return 'application/gzip' if self.compress else CONTENT_TYPES[self.export_format]
+
+    @property
+    def filename(self):
+        name = f"certificates-{timezone.now():%Y%m%d}.{self.export_format}"
+        return name + '.gz' if self.compress else name
+
+    def rows(self):
+        """Serialized certificates, one dict per row"""
+        queryset = self.queryset.filter(id__gt=self.after_id, id__lte=self.last_id).order_by('id')
+        extra_columns = ['block_number'] if self.include_chain else []
+        for row in self.serializer.values(queryset, *extra_columns).iterator(chunk_size=self.chunk_size):
+            data = self.serializer.to_representation(row)
+            if self.include_chain:
+                block_number = row['block_number']
+                data['indexed'] = block_number is not None and block_number <= self.indexed_block
+            yield data
+
+    def blocks(self):
+        """Export text in blocks of about EXPORT_BLOCK_BYTES; the first row goes out on its own"""
+        if self.export_format == FORMAT_CSV:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(self.columns)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+            def encode(data):
+                writer.writerow([csv_value(data.get(column)) for column in self.columns])
+                line = buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                return line
+        else:
+            def encode(data):
+                return json.dumps(data, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+        pending = []
+        pending_size = 0
+        for data in self.rows():
+            line = encode(data)
+            pending.append(line)
+            pending_size += len(line)
+            self.rows_written += 1
+            if pending_size >= EXPORT_BLOCK_BYTES or self.rows_written == 1:
+                yield ''.join(pending)
+                pending = []
+                pending_size = 0
+        if pending:
+            yield ''.join(pending)
+
+    def __iter__(self):
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if self.compress else None
+        try:
+            for block in self.blocks():
+                data = block.encode('utf-8')
+                if compressor:
+                    data = compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+                if data:
+                    yield data
+            if compressor:
+                yield compressor.flush()
+        except Exception as e:
+            # Headers are already sent; the client sees a truncated stream and resumes with after_id
+            print(f"Certificate export failed after {self.rows_written} rows: {str(e)}")
+            raise
@@ -0,0 +1,60 @@
+# certificates/fields.py
+from django.core.exceptions import ValidationError
+from django.db import models
+
+from .hashes import HASH_BYTES, format_hash, normalize_hash
+
+
+class HashField(models.BinaryField):
+    """
+    A 32-byte hash stored as binary. In Python the value is the canonical
+    0x-prefixed lowercase hex string, and lookups accept any case with or
+    without the prefix. Saving something that is not a 32-byte hash raises
+    ValueError; looking one up simply matches nothing.
+    """
+
+    description = '32-byte hash'
+
+    def __init__(self, *args, **kwargs):
+        kwargs['max_length'] = HASH_BYTES
+        kwargs.setdefault('editable', True)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs.pop('max_length', None)
+        kwargs.pop('editable', None)
+        return name, path, args, kwargs
+
+    def db_type(self, connection):
+        if connection.vendor == 'mysql':
+            return 'binary(%d)' % HASH_BYTES
+        return super().db_type(connection)
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return None
+        return format_hash(value)
+
+    def to_python(self, value):
+        if value is None:
+            return None
+        formatted = format_hash(value)
+        if formatted is None:
+            raise ValidationError('%(value)s is not a 32-byte hash', code='invalid', params={'value': value})
+        return formatted
+
+    def get_prep_value(self, value):
+        value = models.Field.get_prep_value(self, value)
+        if value is None:
+            return None
+        # An impossible key, so malformed hashes match no row
+        return normalize_hash(value) or b''
+
+    def get_db_prep_save(self, value, connection):
+        if value is not None and not hasattr(value, 'resolve_expression') and normalize_hash(value) is None:
+            raise ValueError(f"Invalid certificate hash: {value!r}")
+        return super().get_db_prep_save(value, connection)
+
+    def value_to_string(self, obj):
+        return self.value_from_object(obj)
@@ -0,0 +1,55 @@
+# certificates/hashes.py
+"""
+The one place certificate hashes are normalised.
+
+Hashes arrive with or without a 0x prefix and in either case (URLs, QR
+codes, contract events, JSON bodies). Certificate.cert_hash stores the 32
+raw bytes; in Python a hash is always the 0x-prefixed lowercase hex string
+returned by format_hash().
+"""
+
+HASH_BYTES = 32
+HEX_DIGITS = frozenset('0123456789abcdef')
+
+
+def normalize_hash(cert_hash):
+    """32-byte form of a certificate hash, or None if it cannot be one"""
+    if isinstance(cert_hash, (bytes, bytearray, memoryview)):
+        cert_hash = bytes(cert_hash)
+        return cert_hash if len(cert_hash) == HASH_BYTES else None
+    cert_hash = str(cert_hash).strip().lower()
+    if cert_hash.startswith('0x'):
+        cert_hash = cert_hash[2:]
+    # bytes.fromhex() skips whitespace, so check the digits rather than rely on it failing
+    if len(cert_hash) != HASH_BYTES * 2 or not HEX_DIGITS.issuperset(cert_hash):
+        return None
+    return bytes.fromhex(cert_hash)
+
+
+def format_hash(cert_hash):
+    """Canonical 0x-prefixed lowercase form of a certificate hash, or None if it cannot be one"""
+    item = normalize_hash(cert_hash)
+    if item is None:
+        return None
+    return '0x' + item.hex()
+
+
+def hash_prefix_range(prefix):
+    """
+    Bounds of the certificate hashes starting with a hex prefix, as
+    (lowest, upper) canonical hashes: matching hashes satisfy
+    lowest <= hash < upper. upper is None when the prefix is all f's.
+    Raises ValueError if the prefix is not hex or longer than a hash.
+    """
+    prefix = str(prefix).strip().lower()
+    if prefix.startswith('0x'):
+        prefix = prefix[2:]
+    if not prefix or len(prefix) > HASH_BYTES * 2 or not HEX_DIGITS.issuperset(prefix):
+        raise ValueError(f"Hash prefix must be 1 to {HASH_BYTES * 2} hex characters")
+    value = int(prefix, 16)
+    shift = 4 * (HASH_BYTES * 2 - len(prefix))
+    lowest = value << shift
+    upper = (value + 1) << shift
+    if upper >= 1 << (8 * HASH_BYTES):
+        return format_hash(lowest.to_bytes(HASH_BYTES, 'big')), None
+    return format_hash(lowest.to_bytes(HASH_BYTES, 'big')), format_hash(upper.to_bytes(HASH_BYTES, 'big'))
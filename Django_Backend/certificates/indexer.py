@@ -0,0 +1,360 @@
+# certificates/indexer.py
+"""
+Contract event indexer.
+
+Polls eth_getLogs for CertificateIssued, CertificateRevoked and
+AnchoredCertificateRevoked in block ranges and applies them to Certificate
+rows. CertificateRevoked only revokes individually issued rows and
+AnchoredCertificateRevoked only Merkle-anchored ones. The last processed block is
+kept in a ChainCheckpoint row that is saved in the same database
+transaction as the events, so the indexer can be stopped and restarted at
+any point and replaying a range is harmless.
+
+Catching up (for example after rebuilding the database) runs several
+eth_getLogs windows in parallel. The window grows while responses are small
+and shrinks when the node rejects a range or returns too many logs. Results
+are applied in block order, so the checkpoint only ever covers a contiguous
+prefix of the chain. Only blocks at least BLOCKCHAIN_CONFIRMATION_DEPTH deep
+are indexed, and rows are stamped with their block's own timestamp.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone as dt_timezone
+
+import requests
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from eth_utils import event_abi_to_log_topic
+from web3 import Web3
+
+from .blockchain import (
+    CONFIRMATION_DEPTH,
+    RPCDeadlineExceeded,
+    get_block_headers,
+    get_current_contract,
+    get_web3,
+    verification_cache,
+)
+from .bloom import known_hashes
+from .models import Certificate, ChainCheckpoint
+from .search import sync_search_index
+
+CHECKPOINT_NAME = 'certificate_events'
+START_BLOCK = getattr(settings, 'BLOCKCHAIN_INDEX_START_BLOCK', 0)
+BLOCK_RANGE = getattr(settings, 'BLOCKCHAIN_INDEX_BLOCK_RANGE', 2000)
+POLL_INTERVAL = getattr(settings, 'BLOCKCHAIN_INDEX_POLL_INTERVAL', 5.0)
+MAX_BLOCK_RANGE = getattr(settings, 'BLOCKCHAIN_INDEX_MAX_BLOCK_RANGE', 100000)
+TARGET_LOGS = getattr(settings, 'BLOCKCHAIN_INDEX_TARGET_LOGS', 5000)
+CONCURRENCY = getattr(settings, 'BLOCKCHAIN_INDEX_CONCURRENCY', 4)
+
+EVENT_NAMES = ('CertificateIssued', 'CertificateRevoked', 'AnchoredCertificateRevoked')
+
+
+def get_event_topics(contract):
+    """Map topic0 to event name for the events the indexer applies"""
+    topics = {}
+    for name in EVENT_NAMES:
+        event_abi = getattr(contract.events, name)().abi
+        topics[Web3.to_hex(event_abi_to_log_topic(event_abi))] = name
+    return topics
+
+
+def fetch_certificate_events(web3_instance, contract, from_block, to_block, topics=None):
+    """Decoded certificate events between two blocks (inclusive), in chain order"""
+    topics = topics or get_event_topics(contract)
+    logs = web3_instance.eth.get_logs({
+        'address': contract.address,
+        'fromBlock': from_block,
+        'toBlock': to_block,
+        'topics': [list(topics)],
+    })
+    events = []
+    for log in logs:
+        name = topics.get(Web3.to_hex(log['topics'][0]))
+        if name:
+            events.append(getattr(contract.events, name)().process_log(log))
+    events.sort(key=lambda event: (event['blockNumber'], event['logIndex']))
+    return events
+
+
+def fetch_block_times(events):
+    """Block timestamps for the blocks events were emitted in"""
+    headers = get_block_headers(event['blockNumber'] for event in events)
+    return {
+        number: datetime.fromtimestamp(header['timestamp'], tz=dt_timezone.utc)
+        for number, header in headers.items() if header
+    }
+
+
+def fetch_window(web3_instance, contract, from_block, to_block, topics):
+    """Events in a block range together with their block timestamps"""
+    events = fetch_certificate_events(web3_instance, contract, from_block, to_block, topics)
+    return events, fetch_block_times(events)
+
+
+def apply_certificate_events(events, block_times=None):
+    """
+    Apply decoded contract events to the database in one transaction.
+    Certificates issued outside this backend get a row created from the
+    event. block_times maps block numbers to timestamps; when missing they
+    are fetched from the node. Returns the number of events applied.
+    """
+    if not events:
+        return 0
+    if block_times is None:
+        block_times = fetch_block_times(events)
+
+    issued = {}
+    revoked = {}
+    anchored_revoked = {}
+    for event in events:
+        cert_hash = Web3.to_hex(event['args']['certHash'])
+        if event['event'] == 'CertificateIssued':
+            issued[cert_hash] = event
+        elif event['event'] == 'CertificateRevoked':
+            revoked[cert_hash] = event
+        elif event['event'] == 'AnchoredCertificateRevoked':
+            anchored_revoked[cert_hash] = event
+
+    now = timezone.now()
+
+    def event_time(event):
+        return block_times.get(event['blockNumber'], now)
+
+    with transaction.atomic():
+        if issued:
+            existing = Certificate.objects.in_bulk(list(issued), field_name='cert_hash')
+            Certificate.objects.bulk_create([
+                Certificate(
+                    student_name=event['args']['studentName'],
+                    course=event['args']['course'],
+                    institution=event['args']['institution'],
+                    issue_date=datetime.fromtimestamp(event['args']['issueDate'], tz=dt_timezone.utc),
+                    cert_hash=cert_hash,
+                    chain_status=Certificate.CHAIN_STATUS_CONFIRMED,
+                    blockchain_verified=True,
+                    blockchain_timestamp=event_time(event),
+                    transaction_hash=Web3.to_hex(event['transactionHash']),
+                    block_number=event['blockNumber'],
+                    block_hash=Web3.to_hex(event['blockHash']),
+                )
+                for cert_hash, event in issued.items() if cert_hash not in existing
+            ], batch_size=500, ignore_conflicts=True)
+            for cert_hash in issued:
+                if cert_hash not in existing:
+                    known_hashes.add(cert_hash)
+            sync_search_index()
+
+            updated = []
+            for cert_hash, certificate in existing.items():
+                event = issued[cert_hash]
+                certificate.chain_status = Certificate.CHAIN_STATUS_CONFIRMED
+                certificate.chain_error = None
+                certificate.blockchain_verified = True
+                certificate.blockchain_timestamp = event_time(event)
+                certificate.block_number = event['blockNumber']
+                certificate.block_hash = Web3.to_hex(event['blockHash'])
+                updated.append(certificate)
+            Certificate.objects.bulk_update(updated, [
+                'chain_status', 'chain_error', 'blockchain_verified', 'blockchain_timestamp',
+                'block_number', 'block_hash',
+            ], batch_size=500)
+
+        if revoked or anchored_revoked:
+            # Each revoke function only applies to certificates recorded its way
+            revoked_rows = list(Certificate.objects.filter(
+                Q(cert_hash__in=revoked, merkle_root__isnull=True)
+                | Q(cert_hash__in=anchored_revoked, merkle_root__isnull=False),
+                is_revoked=False,
+            ))
+            for certificate in revoked_rows:
+                event = (anchored_revoked if certificate.merkle_root else revoked)[certificate.cert_hash]
+                certificate.is_revoked = True
+                certificate.revocation_timestamp = event_time(event)
+                # The block is kept so detect_reorgs can undo the revocation
+                certificate.revocation_status = Certificate.REVOCATION_STATUS_CONFIRMED
+                certificate.revocation_tx_hash = certificate.revocation_tx_hash or Web3.to_hex(event['transactionHash'])
+                certificate.revocation_error = None
+                certificate.revocation_block_number = event['blockNumber']
+                certificate.revocation_block_hash = Web3.to_hex(event['blockHash'])
+            Certificate.objects.bulk_update(revoked_rows, [
+                'is_revoked', 'revocation_timestamp', 'revocation_status', 'revocation_tx_hash',
+                'revocation_error', 'revocation_block_number', 'revocation_block_hash',
+            ], batch_size=500)
+
+    for cert_hash in list(revoked) + list(anchored_revoked):
+        verification_cache.invalidate(cert_hash)
+
+    return len(events)
+
+
+def get_checkpoint(contract):
+    """The indexer checkpoint, reset when the contract address changes"""
+    checkpoint, _ = ChainCheckpoint.objects.get_or_create(
+        name=CHECKPOINT_NAME,
+        defaults={'contract_address': contract.address, 'last_block': START_BLOCK - 1},
+    )
+    if checkpoint.contract_address != contract.address:
+        print(f"Contract changed from {checkpoint.contract_address} to {contract.address}; reindexing")
+        checkpoint.contract_address = contract.address
+        checkpoint.last_block = START_BLOCK - 1
+        checkpoint.save()
+    return checkpoint
+
+
+def is_range_error(error):
+    """Whether the node refused an eth_getLogs range as too large or too slow"""
+    if isinstance(error, (requests.exceptions.Timeout, RPCDeadlineExceeded)):
+        return True
+    error_msg = str(error).lower()
+    return any(marker in error_msg for marker in (
+        'query returned more than', 'block range', 'range is too large', 'range too large',
+        'too many', 'limit exceeded', 'response size', 'exceeds', 'timeout', 'timed out',
+    ))
+
+
+class BlockWindow:
+    """
+    Size of the next eth_getLogs block range.
+    Doubles while responses stay under half of target_logs and halves on
+    oversized responses or rejected ranges.
+    """
+
+    def __init__(self, size, minimum=1, maximum=MAX_BLOCK_RANGE, target_logs=TARGET_LOGS):
+        self.minimum = minimum
+        self.maximum = max(maximum, minimum)
+        self.size = min(max(size, minimum), self.maximum)
+        self.target_logs = target_logs
+        self._lock = threading.Lock()
+
+    def record_success(self, blocks, log_count):
+        with self._lock:
+            if log_count > self.target_logs:
+                self.size = max(self.minimum, blocks // 2)
+            elif log_count < self.target_logs // 2 and blocks >= self.size:
+                self.size = min(self.maximum, self.size * 2)
+
+    def record_failure(self, blocks):
+        with self._lock:
+            self.size = max(self.minimum, min(self.size, blocks // 2))
+
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+
+def backfill(to_block=None, block_range=BLOCK_RANGE, concurrency=CONCURRENCY, progress=None):
+    """
+    Index every block from the checkpoint up to to_block (default: the newest confirmed block)
+    with up to concurrency eth_getLogs requests in flight.
+
+    progress, if given, is called after each applied stretch of blocks with
+    a dict of blocks done and total, events applied, current window size,
+    throughput and ETA. Returns (events_applied, last_block).
+    """
+    web3_instance = get_web3()
+    contract = get_current_contract()
+    topics = get_event_topics(contract)
+    checkpoint = get_checkpoint(contract)
+    if to_block is None:
+        head = web3_instance.eth.block_number - (CONFIRMATION_DEPTH - 1)
+    else:
+        head = to_block
+
+    first_block = checkpoint.last_block + 1
+    if first_block > head:
+        return 0, checkpoint.last_block
+
+    window = BlockWindow(block_range)
+    retries = deque()
+    in_flight = {}
+    completed = {}
+    next_block = first_block
+    apply_from = first_block
+    applied = 0
+    started = time.monotonic()
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix='backfill') as executor:
+        while True:
+            while len(in_flight) < max(1, concurrency) and (retries or next_block <= head):
+                if retries:
+                    block_span = retries.popleft()
+                else:
+                    block_span = (next_block, min(next_block + window.size - 1, head))
+                    next_block = block_span[1] + 1
+                future = executor.submit(fetch_window, web3_instance, contract,
+                                         block_span[0], block_span[1], topics)
+                in_flight[future] = block_span
+            if not in_flight:
+                break
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                span_start, span_end = in_flight.pop(future)
+                try:
+                    events, times = future.result()
+                except Exception as e:
+                    if span_start == span_end or not is_range_error(e):
+                        raise
+                    # Split the rejected range and fetch both halves before anything newer
+                    window.record_failure(span_end - span_start + 1)
+                    middle = (span_start + span_end) // 2
+                    retries.extendleft([(middle + 1, span_end), (span_start, middle)])
+                    continue
+                window.record_success(span_end - span_start + 1, len(events))
+                completed[span_start] = (span_end, events, times)
+
+            # Apply whatever is now contiguous with the checkpoint, in block order
+            ready_events = []
+            ready_times = {}
+            last_block = None
+            while apply_from in completed:
+                span_end, events, times = completed.pop(apply_from)
+                ready_events.extend(events)
+                ready_times.update(times)
+                last_block = span_end
+                apply_from = span_end + 1
+            if last_block is None:
+                continue
+
+            with transaction.atomic():
+                applied += apply_certificate_events(ready_events, ready_times)
+                checkpoint.last_block = last_block
+                checkpoint.save(update_fields=['last_block', 'updated_at'])
+
+            if progress:
+                blocks_done = last_block - first_block + 1
+                blocks_total = head - first_block + 1
+                elapsed = time.monotonic() - started
+                rate = blocks_done / elapsed if elapsed > 0 else 0
+                progress({
+                    'last_block': last_block,
+                    'head': head,
+                    'blocks_done': blocks_done,
+                    'blocks_total': blocks_total,
+                    'events': applied,
+                    'window': window.size,
+                    'blocks_per_second': rate,
+                    'eta_seconds': (blocks_total - blocks_done) / rate if rate else None,
+                })
+
+    return applied, checkpoint.last_block
+
+
+def index_once(block_range=BLOCK_RANGE, to_block=None, concurrency=1, progress=None):
+    """
+    Index every block from the checkpoint up to to_block (default: the newest confirmed block).
+    Returns (events_applied, last_block).
+    """
+    return backfill(to_block=to_block, block_range=block_range, concurrency=concurrency, progress=progress)
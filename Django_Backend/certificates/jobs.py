@@ -0,0 +1,295 @@
+# certificates/jobs.py
+"""
+Database-backed job queue.
+
+Slow work (sending the issuance transaction, rendering the QR code, hashing
+the uploaded PDF) is stored as Job rows and run by manage.py run_workers,
+so it needs no broker and workers scale separately from web processes.
+
+A worker leases the highest-priority due job with SELECT ... FOR UPDATE SKIP
+LOCKED, so concurrent workers never wait on each other's rows, and claims it
+with a conditional UPDATE that also keeps leasing safe on databases without
+row locks (SQLite). A lease runs out after JOB_LEASE_SECONDS; jobs whose
+worker died are then leased again. Failed jobs are retried with exponential
+backoff until max_attempts, after which the job type's on_failure hook runs.
+Each job type can cap how many of its jobs one worker process runs at once.
+"""
+
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection as db_connection, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import Job
+
+JOB_LEASE_SECONDS = getattr(settings, 'CERTIFICATE_JOB_LEASE_SECONDS', 300)
+JOB_RETRY_BACKOFF = getattr(settings, 'CERTIFICATE_JOB_RETRY_BACKOFF', 5.0)
+JOB_RETRY_MAX_BACKOFF = getattr(settings, 'CERTIFICATE_JOB_RETRY_MAX_BACKOFF', 600.0)
+JOB_POLL_INTERVAL = getattr(settings, 'CERTIFICATE_JOB_POLL_INTERVAL', 1.0)
+JOB_CONCURRENCY_LIMITS = getattr(settings, 'CERTIFICATE_JOB_CONCURRENCY_LIMITS', {})
+JOB_RETENTION_DAYS = getattr(settings, 'CERTIFICATE_JOB_RETENTION_DAYS', 7)
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler when retrying cannot help; the job fails straight away"""
+    pass
+
+
+class JobType:
+    def __init__(self, name, handler, max_attempts=5, priority=0, concurrency=None, on_failure=None):
+        self.name = name
+        self.handler = handler
+        self.max_attempts = max_attempts
+        self.priority = priority
+        self.concurrency = JOB_CONCURRENCY_LIMITS.get(name, concurrency)
+        self.on_failure = on_failure
+
+
+job_types = {}
+
+
+def job_type(name, **options):
+    """Register the decorated function as the handler for jobs of this type"""
+    def register(handler):
+        job_types[name] = JobType(name, handler, **options)
+        return handler
+    return register
+
+
+def get_job_type(name):
+    # Handlers live in certificates.tasks and register themselves on import
+    from . import tasks  # noqa: F401
+    try:
+        return job_types[name]
+    except KeyError:
+        raise ValueError(f"Unknown job type: {name}")
+
+
+def enqueue(name, payload=None, priority=None, delay=0):
+    """Queue a job; it becomes visible to workers when the current transaction commits"""
+    definition = get_job_type(name)
+    return Job.objects.create(
+        job_type=name,
+        payload=payload or {},
+        priority=definition.priority if priority is None else priority,
+        max_attempts=definition.max_attempts,
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def retry_delay(attempts):
+    """Seconds before the next try after attempts failures"""
+    return min(JOB_RETRY_MAX_BACKOFF, JOB_RETRY_BACKOFF * 2 ** max(0, attempts - 1))
+
+
+def lease_job(worker_id, types=None, lease_seconds=JOB_LEASE_SECONDS):
+    """
+    Claim the next due job, or return None. types limits the job types
+    considered. Queued jobs go by priority, then age; running jobs whose
+    lease has run out are taken over.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        due = Job.objects.select_for_update(skip_locked=True).filter(
+            Q(status=Job.STATUS_QUEUED, run_after__lte=now) | Q(status=Job.STATUS_RUNNING, locked_until__lt=now)
+        )
+        if types is not None:
+            due = due.filter(job_type__in=types)
+        job = due.order_by('-priority', 'run_after', 'id').first()
+        if job is None:
+            return None
+        claimed = Job.objects.filter(id=job.id, status=job.status, attempts=job.attempts).update(
+            status=Job.STATUS_RUNNING,
+            locked_by=worker_id,
+            locked_until=now + timedelta(seconds=lease_seconds),
+            attempts=F('attempts') + 1,
+            started_at=now,
+        )
+    if not claimed:
+        return None
+    job.refresh_from_db()
+    return job
+
+
+def complete_job(job, worker_id):
+    Job.objects.filter(id=job.id, locked_by=worker_id).update(
+        status=Job.STATUS_SUCCEEDED, locked_until=None, last_error=None, finished_at=timezone.now())
+
+
+def fail_job(job, worker_id, error, permanent=False):
+    """Requeue job with backoff, or mark it failed once it is out of attempts"""
+    error_msg = str(error) or error.__class__.__name__
+    if not permanent and job.attempts < job.max_attempts:
+        Job.objects.filter(id=job.id, locked_by=worker_id).update(
+            status=Job.STATUS_QUEUED, locked_by=None, locked_until=None, last_error=error_msg,
+            run_after=timezone.now() + timedelta(seconds=retry_delay(job.attempts)))
+        print(f"Job {job} failed (attempt {job.attempts}/{job.max_attempts}), retrying: {error_msg}")
+        return False
+    Job.objects.filter(id=job.id, locked_by=worker_id).update(
+        status=Job.STATUS_FAILED, locked_until=None, last_error=error_msg, finished_at=timezone.now())
+    print(f"❌ Job {job} failed after {job.attempts} attempt(s): {error_msg}")
+    definition = job_types.get(job.job_type)
+    if definition and definition.on_failure:
+        try:
+            definition.on_failure(job.payload, error_msg)
+        except Exception as e:
+            print(f"on_failure hook for {job} failed: {str(e)}")
+    return True
+
+
+def run_job(job, worker_id):
+    """Run a leased job and record the outcome. Returns True when it succeeded."""
+    try:
+        definition = get_job_type(job.job_type)
+    except ValueError as e:
+        fail_job(job, worker_id, e, permanent=True)
+        return False
+    if job.attempts > job.max_attempts:
+        # Leased again after its worker died on the last attempt
+        fail_job(job, worker_id, job.last_error or 'Worker lease expired', permanent=True)
+        return False
+    try:
+        definition.handler(job.payload)
+    except PermanentJobError as e:
+        fail_job(job, worker_id, e, permanent=True)
+        return False
+    except Exception as e:
+        fail_job(job, worker_id, e)
+        return False
+    complete_job(job, worker_id)
+    return True
+
+
+def queue_stats():
+    """Counts of unfinished and failed jobs by type and status"""
+    counts = {}
+    rows = Job.objects.exclude(status=Job.STATUS_SUCCEEDED).values('job_type', 'status')
+    for row in rows.annotate(count=Count('id')).order_by():
+        counts.setdefault(row['job_type'], {})[row['status']] = row['count']
+    return counts
+
+
+def purge_jobs(retention_days=JOB_RETENTION_DAYS):
+    """Delete succeeded jobs finished more than retention_days ago; failed jobs are kept"""
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    deleted, _ = Job.objects.filter(status=Job.STATUS_SUCCEEDED, finished_at__lt=cutoff).delete()
+    return deleted
+
+
+class WorkerPool:
+    """
+    concurrency threads in this process, each leasing and running one job
+    at a time. A job type with a concurrency limit is not leased while that
+    many of its jobs are already running in the pool.
+    """
+
+    def __init__(self, concurrency=1, types=None, poll_interval=JOB_POLL_INTERVAL, lease_seconds=JOB_LEASE_SECONDS):
+        self.concurrency = max(1, concurrency)
+        self.types = list(types) if types else None
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.name = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._lease_lock = threading.Lock()
+        self._running = {}
+        self._stop = threading.Event()
+        self.succeeded = 0
+        self.failed = 0
+
+    def leasable_types(self):
+        """Job types this pool may lease now, or None for any"""
+        from . import tasks  # noqa: F401
+
+        limited = {name: definition.concurrency for name, definition in job_types.items()
+                   if definition.concurrency is not None}
+        if not limited:
+            return self.types
+        names = self.types if self.types is not None else list(job_types)
+        return [name for name in names
+                if name not in limited or self._running.get(name, 0) < limited[name]]
+
+    def lease(self, worker_id):
+        # Picking the types and counting the lease happen together, so limits hold across threads
+        with self._lease_lock:
+            types = self.leasable_types()
+            if types is not None and not types:
+                return None
+            job = lease_job(worker_id, types, self.lease_seconds)
+            if job is not None:
+                self._running[job.job_type] = self._running.get(job.job_type, 0) + 1
+            return job
+
+    def release(self, job, succeeded):
+        with self._lease_lock:
+            self._running[job.job_type] -= 1
+            if succeeded:
+                self.succeeded += 1
+            else:
+                self.failed += 1
+
+    def run_next(self, worker_id):
+        """Lease and run one job. Returns False when no job could be leased."""
+        job = self.lease(worker_id)
+        if job is None:
+            return False
+        succeeded = False
+        try:
+            succeeded = run_job(job, worker_id)
+        finally:
+            self.release(job, succeeded)
+        return True
+
+    def work(self, index, once=False):
+        """One worker thread: run jobs until stopped (or, with once, until none are due)"""
+        worker_id = f"{self.name}/{index}"
+        try:
+            while not self._stop.is_set():
+                close_old_connections()
+                try:
+                    ran = self.run_next(worker_id)
+                except Exception as e:
+                    # e.g. "database is locked" when SQLite workers lease at the same moment
+                    print(f"Could not lease a job: {str(e)}")
+                    self._stop.wait(self.poll_interval)
+                    continue
+                if not ran:
+                    if once:
+                        return
+                    self._stop.wait(self.poll_interval)
+        finally:
+            db_connection.close()
+
+    def run(self, once=False):
+        """Run the worker threads until stop() is called, or until the queue is drained with once"""
+        threads = [threading.Thread(target=self.work, args=(index, once), name=f'job-worker-{index}', daemon=True)
+                   for index in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        purged_at = None
+        try:
+            while any(thread.is_alive() for thread in threads):
+                if not once and (purged_at is None or time.monotonic() - purged_at >= 3600):
+                    purged_at = time.monotonic()
+                    try:
+                        purge_jobs()
+                    except Exception as e:
+                        print(f"Could not purge finished jobs: {str(e)}")
+                    finally:
+                        db_connection.close()
+                for thread in threads:
+                    thread.join(timeout=0.5)
+        except KeyboardInterrupt:
+            self.stop()
+            for thread in threads:
+                thread.join()
+        return self.succeeded, self.failed
+
+    def stop(self):
+        """Let running jobs finish and stop leasing new ones"""
+        self._stop.set()
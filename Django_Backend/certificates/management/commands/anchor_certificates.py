@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from certificates.anchoring import ANCHOR_BATCH_SIZE, anchor_pending
+from certificates.receipts import process_pending
+
+
+class Command(BaseCommand):
+    help = 'Anchor queued certificates on chain as Merkle roots (CERTIFICATE_ANCHORING_MODE = merkle)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Anchor the queued certificates once and exit')
+        parser.add_argument('--interval', type=float, default=60.0,
+                            help='Seconds between anchoring rounds')
+        parser.add_argument('--batch-size', type=int, default=ANCHOR_BATCH_SIZE,
+                            help='Most certificates under one root')
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                anchored = anchor_pending(options['batch_size'])
+                while anchored:
+                    self.stdout.write(f"Anchored {anchored} certificate(s)")
+                    anchored = anchor_pending(options['batch_size'])
+                still_pending = process_pending()
+                self.stdout.write(f"{still_pending} anchoring transaction(s) still pending")
+            except Exception as e:
+                self.stderr.write(f"Anchoring failed: {str(e)}")
+            if options['once']:
+                return
+            time.sleep(options['interval'])
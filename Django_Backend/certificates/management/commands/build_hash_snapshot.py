@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from certificates.snapshot import SNAPSHOT_PATH, build_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Write the memory-mapped certificate hash snapshot and swap it in for running workers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default=SNAPSHOT_PATH,
+                            help='Snapshot file (defaults to CERTIFICATE_HASH_SNAPSHOT_PATH)')
+        parser.add_argument('--interval', type=float, default=None,
+                            help='Rebuild every this many seconds instead of once')
+
+    def handle(self, *args, **options):
+        if not options['path']:
+            raise CommandError('No snapshot path: pass --path or set CERTIFICATE_HASH_SNAPSHOT_PATH')
+        while True:
+            try:
+                started = time.monotonic()
+                count, safe_id = build_snapshot(options['path'])
+                self.stdout.write(f"Snapshot of {count} hash(es), complete up to id {safe_id} "
+                                  f"written in {time.monotonic() - started:.1f}s")
+            except Exception as e:
+                if options['interval'] is None:
+                    raise CommandError(f"Snapshot build failed: {str(e)}")
+                self.stderr.write(f"Snapshot build failed: {str(e)}")
+            if options['interval'] is None:
+                return
+            time.sleep(options['interval'])
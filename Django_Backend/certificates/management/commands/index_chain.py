@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from certificates.indexer import BLOCK_RANGE, CONCURRENCY, POLL_INTERVAL, format_duration, index_once
+
+
+class Command(BaseCommand):
+    help = 'Apply CertificateIssued and CertificateRevoked events from the chain to the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Catch up to the current block and exit')
+        parser.add_argument('--interval', type=float, default=POLL_INTERVAL,
+                            help='Seconds between polls once caught up')
+        parser.add_argument('--block-range', type=int, default=BLOCK_RANGE,
+                            help='Initial blocks per eth_getLogs request; adapts to the node')
+        parser.add_argument('--concurrency', type=int, default=CONCURRENCY,
+                            help='Most eth_getLogs requests in flight while catching up')
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                applied, last_block = index_once(options['block_range'], concurrency=options['concurrency'],
+                                                 progress=self.report_progress)
+                self.stdout.write(f"Indexed up to block {last_block} ({applied} event(s) applied)")
+            except Exception as e:
+                self.stderr.write(f"Indexing failed: {str(e)}")
+            if options['once']:
+                return
+            time.sleep(options['interval'])
+
+    def report_progress(self, progress):
+        percent = 100.0 * progress['blocks_done'] / progress['blocks_total']
+        eta = format_duration(progress['eta_seconds']) if progress['eta_seconds'] is not None else '?'
+        self.stdout.write(
+            f"Block {progress['last_block']}/{progress['head']} ({percent:.1f}%), "
+            f"{progress['events']} event(s), window {progress['window']} blocks, "
+            f"{progress['blocks_per_second']:.0f} blocks/s, ETA {eta}"
+        )
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from certificates.search import BACKEND_FTS5, get_search_backend, sync_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the certificate full-text search index (SQLite FTS5; PostgreSQL keeps its own index current)'
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        if backend != BACKEND_FTS5:
+            self.stdout.write(f"Search backend is {backend}; nothing to rebuild")
+            return
+        indexed = sync_search_index(rebuild=True)
+        self.stdout.write(f"Indexed {indexed} certificate(s)")
@@ -0,0 +1,33 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from certificates.jobs import JOB_POLL_INTERVAL, WorkerPool, queue_stats
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (certificate issuance, QR codes, PDF hashing)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=1,
+                            help='Jobs run at once by this process')
+        parser.add_argument('--types', default='',
+                            help='Comma-separated job types to run (default: all)')
+        parser.add_argument('--once', action='store_true',
+                            help='Run the jobs that are due and exit')
+        parser.add_argument('--poll-interval', type=float, default=JOB_POLL_INTERVAL,
+                            help='Seconds an idle worker waits before looking for jobs again')
+
+    def handle(self, *args, **options):
+        types = [name.strip() for name in options['types'].split(',') if name.strip()]
+        pool = WorkerPool(concurrency=options['concurrency'], types=types or None,
+                          poll_interval=options['poll_interval'])
+        if not options['once']:
+            # Finish the running jobs on SIGTERM; their leases would otherwise have to expire
+            signal.signal(signal.SIGTERM, lambda signum, frame: pool.stop())
+        self.stdout.write(f"Worker {pool.name} running {pool.concurrency} job(s) at a time")
+
+        succeeded, failed = pool.run(once=options['once'])
+        self.stdout.write(f"{succeeded} job(s) succeeded, {failed} failed")
+        if options['once']:
+            self.stdout.write(f"Queue: {queue_stats()}")
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from certificates.receipts import POLL_INTERVAL, process_pending
+
+
+class Command(BaseCommand):
+    help = 'Resolve pending certificate issuance transactions from their receipts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Check pending transactions once and exit')
+        parser.add_argument('--interval', type=float, default=POLL_INTERVAL,
+                            help='Seconds between polls')
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                still_pending = process_pending()
+                self.stdout.write(f"{still_pending} issuance transaction(s) still pending")
+            except Exception as e:
+                self.stderr.write(f"Receipt tracking failed: {str(e)}")
+            if options['once']:
+                return
+            time.sleep(options['interval'])
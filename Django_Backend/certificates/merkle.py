@@ -0,0 +1,72 @@
+# certificates/merkle.py
+"""
+Merkle trees over certificate hashes for the anchoring mode.
+
+Leaves are keccak256(certHash) and each parent is keccak256 of its two
+children in sorted order, so a proof is just the list of sibling hashes
+and matches the contract's verifyAnchoredCertificate(). An unpaired node is
+carried up to the next level unchanged.
+"""
+
+from web3 import Web3
+
+
+def _to_bytes(value):
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value)
+    value = value[2:] if value.startswith('0x') else value
+    return bytes.fromhex(value)
+
+
+def leaf_hash(cert_hash):
+    """Leaf for a certificate hash"""
+    return bytes(Web3.keccak(_to_bytes(cert_hash)))
+
+
+def hash_pair(left, right):
+    """Parent of two nodes, independent of their order"""
+    return bytes(Web3.keccak(b''.join(sorted([left, right]))))
+
+
+def build_merkle_tree(cert_hashes):
+    """
+    Build a tree over cert_hashes.
+    Returns (root, proofs) where root is a 0x hex string and proofs maps each
+    cert hash to its list of 0x hex sibling hashes, leaf to root.
+    """
+    cert_hashes = list(dict.fromkeys(cert_hashes))
+    if not cert_hashes:
+        raise ValueError("Cannot build a Merkle tree without certificates")
+
+    level = [leaf_hash(cert_hash) for cert_hash in cert_hashes]
+    positions = {cert_hash: index for index, cert_hash in enumerate(cert_hashes)}
+    proofs = {cert_hash: [] for cert_hash in cert_hashes}
+
+    while len(level) > 1:
+        for cert_hash, index in positions.items():
+            sibling = index ^ 1
+            if sibling < len(level):
+                proofs[cert_hash].append(Web3.to_hex(level[sibling]))
+            positions[cert_hash] = index // 2
+        level = [
+            hash_pair(level[i], level[i + 1]) if i + 1 < len(level) else level[i]
+            for i in range(0, len(level), 2)
+        ]
+
+    return Web3.to_hex(level[0]), proofs
+
+
+def compute_merkle_root(cert_hash, proof):
+    """Root implied by a certificate hash and its proof"""
+    node = leaf_hash(cert_hash)
+    for sibling in proof:
+        node = hash_pair(node, _to_bytes(sibling))
+    return Web3.to_hex(node)
+
+
+def verify_merkle_proof(cert_hash, proof, root):
+    """Whether proof links cert_hash to root"""
+    try:
+        return compute_merkle_root(cert_hash, proof).lower() == root.lower()
+    except (ValueError, TypeError):
+        return False
@@ -0,0 +1,28 @@
+# Generated by Django 4.2 on 2026-10-17 20:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificates', '0006_certificate_qr_code'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='certificate',
+            name='chain_error',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='certificate',
+            name='chain_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('failed', 'Failed')], db_index=True, default='confirmed', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='certificate',
+            name='transaction_hash',
+            field=models.CharField(blank=True, max_length=66, null=True),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2 on 2026-10-17 20:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificates', '0007_certificate_chain_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SenderNonce',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('account', models.CharField(max_length=42, unique=True)),
+                ('next_nonce', models.PositiveBigIntegerField(default=0)),
+                ('released_nonces', models.JSONField(blank=True, default=list)),
+                ('synced_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
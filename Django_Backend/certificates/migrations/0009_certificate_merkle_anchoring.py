@@ -0,0 +1,28 @@
+# Generated by Django 4.2 on 2026-10-17 20:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificates', '0008_sendernonce'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='certificate',
+            name='merkle_proof',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='certificate',
+            name='merkle_root',
+            field=models.CharField(blank=True, db_index=True, max_length=66, null=True),
+        ),
+        migrations.AlterField(
+            model_name='certificate',
+            name='chain_status',
+            field=models.CharField(choices=[('queued', 'Queued for anchoring'), ('pending', 'Pending'), ('confirmed', 'Confirmed'), ('failed', 'Failed')], db_index=True, default='confirmed', max_length=20),
+        ),
+    ]
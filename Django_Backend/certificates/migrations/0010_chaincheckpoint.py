@@ -0,0 +1,23 @@
+# Generated by Django 4.2 on 2026-10-17 21:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificates', '0009_certificate_merkle_anchoring'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChainCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('contract_address', models.CharField(blank=True, max_length=42, null=True)),
+                ('last_block', models.BigIntegerField(default=-1)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2 on 2026-10-17 21:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificates', '0010_chaincheckpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='certificate',
+            name='block_hash',
+            field=models.CharField(blank=True, max_length=66, null=True),
+        ),
+        migrations.AddField(
+            model_name='certificate',
+            name='block_number',
+            field=models.BigIntegerField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 4.2 on 2026-10-17 22:10
+
+from django.db import migrations, models
+
+import certificates.fields
+
+BATCH_SIZE = 1000
+
+
+def copy_hashes_to_binary(apps, schema_editor):
+    """Convert the hex cert_hash strings to 32-byte values, a batch of rows at a time"""
+    from certificates.hashes import normalize_hash
+
+    Certificate = apps.get_model('certificates', 'Certificate')
+    last_id = 0
+    while True:
+        batch = list(Certificate.objects.filter(id__gt=last_id).order_by('id').only('id', 'cert_hash')[:BATCH_SIZE])
+        if not batch:
+            return
+        invalid = [certificate.id for certificate in batch if normalize_hash(certificate.cert_hash) is None]
+        if invalid:
+            raise ValueError(f"Certificates {invalid} do not have a 32-byte cert_hash; fix them and migrate again")
+        for certificate in batch:
+            certificate.cert_hash_binary = certificate.cert_hash
+        Certificate.objects.bulk_update(batch, ['cert_hash_binary'])
+        last_id = batch[-1].id
+
+
+def copy_hashes_to_text(apps, schema_editor):
+    Certificate = apps.get_model('certificates', 'Certificate')
+    last_id = 0
+    while True:
+        batch = list(Certificate.objects.filter(id__gt=last_id).order_by('id').only('id', 'cert_hash_binary')[:BATCH_SIZE])
+        if not batch:
+            return
+        for certificate in batch:
+            certificate.cert_hash = certificate.cert_hash_binary
+        Certificate.objects.bulk_update(batch, ['cert_hash'])
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificates', '0011_certificate_block'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='certificate',
+            name='cert_hash',
+            field=models.CharField(max_length=66, null=True),
+        ),
+        migrations.AddField(
+            model_name='certificate',
+            name='cert_hash_binary',
+            field=certificates.fields.HashField(null=True),
+        ),
+        migrations.RunPython(copy_hashes_to_binary, copy_hashes_to_text),
+        migrations.RemoveField(
+            model_name='certificate',
+            name='cert_hash',
+        ),
+        migrations.RenameField(
+            model_name='certificate',
+            old_name='cert_hash_binary',
+            new_name='cert_hash',
+        ),
+        migrations.AlterField(
+            model_name='certificate',
+            name='cert_hash',
+            field=certificates.fields.HashField(unique=True),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2 on 2026-10-17 21:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificates', '0012_certificate_cert_hash_binary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='certificate',
+            index=models.Index(fields=['issue_date', 'id'], name='cert_issue_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='certificate',
+            index=models.Index(fields=['institution', 'issue_date', 'id'], name='cert_institution_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='certificate',
+            index=models.Index(fields=['course', 'issue_date', 'id'], name='cert_course_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='certificate',
+            index=models.Index(fields=['is_revoked', 'issue_date', 'id'], name='cert_revoked_date_idx'),
+        ),
+    ]
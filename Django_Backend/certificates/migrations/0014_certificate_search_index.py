@@ -0,0 +1,57 @@
+# Generated by Django 4.2 on 2026-10-17 21:20
+
+from django.db import migrations
+
+# The DDL is written out here rather than imported from certificates.search,
+# so later changes to that module cannot change what this migration does.
+SEARCH_TABLE = 'certificates_certificate_fts'
+SEARCH_DOCUMENT = "(student_name || ' ' || course || ' ' || institution)"
+
+
+def has_fts5(cursor):
+    try:
+        cursor.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(probe)")
+        cursor.execute("DROP TABLE temp.fts5_probe")
+        return True
+    except Exception:
+        return False
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite' and has_fts5(cursor):
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} "
+                f"USING fts5(student_name, course, institution, tokenize='unicode61 remove_diacritics 2')"
+            )
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, student_name, course, institution) "
+                f"SELECT id, student_name, course, institution FROM certificates_certificate"
+            )
+        elif connection.vendor == 'postgresql':
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS certificates_certificate_search_trgm "
+                f"ON certificates_certificate USING gin ({SEARCH_DOCUMENT} gin_trgm_ops)"
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+        elif connection.vendor == 'postgresql':
+            cursor.execute("DROP INDEX IF EXISTS certificates_certificate_search_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificates', '0013_certificate_list_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-17 21:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificates', '0014_certificate_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='certificate',
+            index=models.Index(fields=['student_name', 'issue_date'], name='cert_student_date_idx'),
+        ),
+    ]
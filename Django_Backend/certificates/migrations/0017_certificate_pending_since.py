@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-17 21:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificates', '0016_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='certificate',
+            name='pending_since',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
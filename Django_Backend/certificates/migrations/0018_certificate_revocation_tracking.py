@@ -0,0 +1,43 @@
+# Generated by Django 4.2 on 2026-10-17 21:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificates', '0017_certificate_pending_since'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='certificate',
+            name='revocation_block_hash',
+            field=models.CharField(blank=True, max_length=66, null=True),
+        ),
+        migrations.AddField(
+            model_name='certificate',
+            name='revocation_block_number',
+            field=models.BigIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='certificate',
+            name='revocation_error',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='certificate',
+            name='revocation_pending_since',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='certificate',
+            name='revocation_status',
+            field=models.CharField(blank=True, choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('failed', 'Failed')], db_index=True, max_length=20, null=True),
+        ),
+        migrations.AddField(
+            model_name='certificate',
+            name='revocation_tx_hash',
+            field=models.CharField(blank=True, max_length=66, null=True),
+        ),
+    ]
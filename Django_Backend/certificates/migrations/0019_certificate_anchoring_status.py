@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-17 22:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificates', '0018_certificate_revocation_tracking'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='certificate',
+            name='chain_status',
+            field=models.CharField(choices=[('queued', 'Queued for anchoring'), ('anchoring', 'Being anchored'), ('pending', 'Pending'), ('confirmed', 'Confirmed'), ('failed', 'Failed')], db_index=True, default='confirmed', max_length=20),
+        ),
+    ]
@@ -1,11 +1,34 @@
 from django.db import models
 
+from .fields import HashField
+
 class Certificate(models.Model):
+    CHAIN_STATUS_PENDING = 'pending'
+    CHAIN_STATUS_CONFIRMED = 'confirmed'
+    CHAIN_STATUS_FAILED = 'failed'
+    CHAIN_STATUS_QUEUED = 'queued'
+    CHAIN_STATUS_ANCHORING = 'anchoring'
+    CHAIN_STATUS_CHOICES = [
+        (CHAIN_STATUS_QUEUED, 'Queued for anchoring'),
+        (CHAIN_STATUS_ANCHORING, 'Being anchored'),
+        (CHAIN_STATUS_PENDING, 'Pending'),
+        (CHAIN_STATUS_CONFIRMED, 'Confirmed'),
+        (CHAIN_STATUS_FAILED, 'Failed'),
+    ]
+    REVOCATION_STATUS_PENDING = 'pending'
+    REVOCATION_STATUS_CONFIRMED = 'confirmed'
+    REVOCATION_STATUS_FAILED = 'failed'
+    REVOCATION_STATUS_CHOICES = [
+        (REVOCATION_STATUS_PENDING, 'Pending'),
+        (REVOCATION_STATUS_CONFIRMED, 'Confirmed'),
+        (REVOCATION_STATUS_FAILED, 'Failed'),
+    ]
+
     student_name = models.CharField(max_length=200)
     course = models.CharField(max_length=200)
     institution = models.CharField(max_length=200)
     issue_date = models.DateTimeField()
-    cert_hash = models.CharField(max_length=66, unique=True)
+    cert_hash = HashField(unique=True)
     ipfs_hash = models.CharField(max_length=64, null=True, blank=True)
     certificate_pdf = models.FileField(upload_to='certificates/', null=True, blank=True)
     pdf_hash = models.CharField(max_length=66, null=True, blank=True)
@@ -15,6 +38,103 @@ class Certificate(models.Model):
     blockchain_verified = models.BooleanField(default=False)
     blockchain_timestamp = models.DateTimeField(null=True, blank=True)
     revocation_timestamp = models.DateTimeField(null=True, blank=True)
+    chain_status = models.CharField(max_length=20, choices=CHAIN_STATUS_CHOICES,
+                                    default=CHAIN_STATUS_CONFIRMED, db_index=True)
+    transaction_hash = models.CharField(max_length=66, null=True, blank=True)
+    # When the issuance transaction was sent, or put back to pending by a reorg;
+    # the pending timeout counts from here
+    pending_since = models.DateTimeField(null=True, blank=True)
+    chain_error = models.TextField(null=True, blank=True)
+    # Set when the certificate was anchored as part of a Merkle root
+    merkle_root = models.CharField(max_length=66, null=True, blank=True, db_index=True)
+    merkle_proof = models.JSONField(null=True, blank=True)
+    # Block the issuing transaction was mined in, used to detect reorgs
+    block_number = models.BigIntegerField(null=True, blank=True, db_index=True)
+    block_hash = models.CharField(max_length=66, null=True, blank=True)
+    # Revocation transaction, tracked like issuance: is_revoked is only set once
+    # it is confirmed, and rolled back if its block is reorganised away
+    revocation_status = models.CharField(max_length=20, choices=REVOCATION_STATUS_CHOICES,
+                                         null=True, blank=True, db_index=True)
+    revocation_tx_hash = models.CharField(max_length=66, null=True, blank=True)
+    revocation_pending_since = models.DateTimeField(null=True, blank=True)
+    revocation_block_number = models.BigIntegerField(null=True, blank=True, db_index=True)
+    revocation_block_hash = models.CharField(max_length=66, null=True, blank=True)
+    revocation_error = models.TextField(null=True, blank=True)
+
+    class Meta:
+        # Keyset pagination walks (issue_date, id); each list filter has its own prefix
+        indexes = [
+            models.Index(fields=['issue_date', 'id'], name='cert_issue_date_id_idx'),
+            models.Index(fields=['institution', 'issue_date', 'id'], name='cert_institution_date_idx'),
+            models.Index(fields=['course', 'issue_date', 'id'], name='cert_course_date_idx'),
+            models.Index(fields=['is_revoked', 'issue_date', 'id'], name='cert_revoked_date_idx'),
+            # Bulk verification by details finds candidate rows by student name
+            models.Index(fields=['student_name', 'issue_date'], name='cert_student_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.student_name} - {self.course} ({self.cert_hash})"
+
+
+class SenderNonce(models.Model):
+    """Next transaction nonce reserved locally for a sending account"""
+    account = models.CharField(max_length=42, unique=True)
+    next_nonce = models.PositiveBigIntegerField(default=0)
+    released_nonces = models.JSONField(default=list, blank=True)
+    synced_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.account} (next nonce {self.next_nonce})"
+
+
+class ChainCheckpoint(models.Model):
+    """Last block whose contract events have been applied to the database"""
+    name = models.CharField(max_length=50, unique=True)
+    contract_address = models.CharField(max_length=42, null=True, blank=True)
+    last_block = models.BigIntegerField(default=-1)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} at block {self.last_block}"
+
+
+class Job(models.Model):
+    """A unit of background work leased by manage.py run_workers"""
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    job_type = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    # Higher runs first
+    priority = models.SmallIntegerField(default=0)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    # Not leased before this time; pushed back by the retry backoff
+    run_after = models.DateTimeField()
+    # Worker holding the lease and when the lease runs out
+    locked_by = models.CharField(max_length=100, null=True, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        # Leasing scans queued jobs by priority, and running ones by lease expiry
+        indexes = [
+            models.Index(fields=['status', 'priority', 'run_after'], name='job_lease_idx'),
+            models.Index(fields=['status', 'locked_until'], name='job_lease_expiry_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.job_type} #{self.id} ({self.status})"
@@ -0,0 +1,74 @@
+# certificates/pagination.py
+"""
+Keyset (cursor) pagination over (issue_date, id), newest first.
+
+A page is fetched with a WHERE on the last row of the previous page rather
+than an OFFSET, so every page costs the same index range scan however deep
+into the table it is. The cursor is an opaque token encoding that row's
+issue_date and id.
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+
+LIST_PAGE_SIZE = getattr(settings, 'CERTIFICATE_LIST_PAGE_SIZE', 50)
+LIST_MAX_PAGE_SIZE = getattr(settings, 'CERTIFICATE_LIST_MAX_PAGE_SIZE', 500)
+
+KEYSET_ORDERING = ('-issue_date', '-id')
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor token cannot be decoded"""
+    pass
+
+
+def encode_cursor(row):
+    """Cursor pointing after row, a Certificate or a values() dict"""
+    if isinstance(row, dict):
+        issue_date, row_id = row['issue_date'], row['id']
+    else:
+        issue_date, row_id = row.issue_date, row.id
+    position = json.dumps([issue_date.isoformat(), row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(position.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(issue_date, id) of the row a cursor points after"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        issue_date, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(issue_date), int(row_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {str(e)}")
+
+
+def get_page_size(value):
+    """Page size from a query parameter, clamped to LIST_MAX_PAGE_SIZE"""
+    if value in (None, ''):
+        return LIST_PAGE_SIZE
+    page_size = int(value)
+    if page_size < 1:
+        raise ValueError("page_size must be at least 1")
+    return min(page_size, LIST_MAX_PAGE_SIZE)
+
+
+def paginate_keyset(queryset, cursor=None, page_size=LIST_PAGE_SIZE):
+    """
+    One page of queryset in KEYSET_ORDERING, starting after cursor.
+    A values() queryset must include issue_date and id.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    queryset = queryset.order_by(*KEYSET_ORDERING)
+    if cursor:
+        issue_date, row_id = decode_cursor(cursor)
+        queryset = queryset.filter(Q(issue_date__lt=issue_date) | Q(issue_date=issue_date, id__lt=row_id))
+    # One extra row tells whether there is a next page without a COUNT
+    rows = list(queryset[:page_size + 1])
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    return rows, encode_cursor(rows[-1])
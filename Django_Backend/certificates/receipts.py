@@ -0,0 +1,293 @@
+# certificates/receipts.py
+"""
+Background tracking of issuance and revocation transactions.
+
+IssueCertificateView and revoke_certificate_view submit the transaction and
+return straight away. The tracker fetches receipts for pending certificates
+and revocations in JSON-RPC batches and marks each row failed, or confirmed
+once its block is BLOCKCHAIN_CONFIRMATION_DEPTH deep. The block number and
+hash are stored per row, and recent ones are re-checked against the
+canonical chain in batched header fetches; rows whose block was reorganised
+away go back to pending, and the event indexer's checkpoint is moved back
+before the orphaned block so its events are indexed again.
+"""
+
+import threading
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db import connection as db_connection
+from django.utils import timezone
+
+from .blockchain import (
+    CONFIRMATION_DEPTH,
+    get_block_headers,
+    get_transaction_receipts,
+    get_web3,
+    sender_pool,
+    verification_cache,
+)
+from .indexer import CHECKPOINT_NAME
+from .models import Certificate, ChainCheckpoint
+
+POLL_INTERVAL = getattr(settings, 'BLOCKCHAIN_RECEIPT_POLL_INTERVAL', 2.0)
+PENDING_TIMEOUT = getattr(settings, 'BLOCKCHAIN_PENDING_TX_TIMEOUT', 600)
+REORG_CHECK_DEPTH = getattr(settings, 'BLOCKCHAIN_REORG_CHECK_DEPTH', 64)
+BATCH_SIZE = 100
+
+
+def block_time(header):
+    return datetime.fromtimestamp(header['timestamp'], tz=dt_timezone.utc) if header else timezone.now()
+
+
+def apply_receipts(certificates, head=None):
+    """Resolve pending certificates from their receipts; returns how many are still pending"""
+    receipts = get_transaction_receipts([certificate.transaction_hash for certificate in certificates])
+    now = timezone.now()
+    mined = [receipt for receipt in receipts.values() if receipt and int(receipt['status'], 16) == 1]
+    if mined and head is None:
+        head = get_web3().eth.block_number
+    deep_enough = {
+        int(receipt['blockNumber'], 16) for receipt in mined
+        if head - int(receipt['blockNumber'], 16) + 1 >= CONFIRMATION_DEPTH
+    }
+    headers = get_block_headers(deep_enough)
+    still_pending = 0
+    resolved = []
+
+    for certificate in certificates:
+        receipt = receipts.get(certificate.transaction_hash)
+        if receipt is None:
+            certificate.block_number = None
+            certificate.block_hash = None
+            pending_since = certificate.pending_since or certificate.created_at
+            if pending_since and pending_since < now - timedelta(seconds=PENDING_TIMEOUT):
+                certificate.chain_status = Certificate.CHAIN_STATUS_FAILED
+                certificate.chain_error = f"Transaction was not mined within {PENDING_TIMEOUT} seconds"
+            else:
+                still_pending += 1
+                continue
+        elif int(receipt['status'], 16) == 1:
+            certificate.block_number = int(receipt['blockNumber'], 16)
+            certificate.block_hash = receipt['blockHash']
+            if certificate.block_number not in deep_enough:
+                # Mined, but not yet deep enough to be safe from a reorg
+                still_pending += 1
+                certificate.save(update_fields=['block_number', 'block_hash'])
+                continue
+            certificate.chain_status = Certificate.CHAIN_STATUS_CONFIRMED
+            certificate.chain_error = None
+            certificate.blockchain_verified = True
+            certificate.blockchain_timestamp = block_time(headers.get(certificate.block_number))
+        else:
+            certificate.chain_status = Certificate.CHAIN_STATUS_FAILED
+            certificate.chain_error = "Transaction reverted. Possible duplicate certificate or invalid data."
+
+        resolved.append(certificate.transaction_hash)
+        print(f"Certificate {certificate.cert_hash} is {certificate.chain_status} "
+              f"(transaction {certificate.transaction_hash})")
+        certificate.save(update_fields=[
+            'chain_status', 'chain_error', 'blockchain_verified', 'blockchain_timestamp',
+            'block_number', 'block_hash',
+        ])
+
+    sender_pool.complete(resolved)
+    return still_pending
+
+
+def apply_revocation_receipts(certificates, head=None):
+    """Resolve pending revocations from their receipts; returns how many are still pending"""
+    receipts = get_transaction_receipts([certificate.revocation_tx_hash for certificate in certificates])
+    now = timezone.now()
+    mined = [receipt for receipt in receipts.values() if receipt and int(receipt['status'], 16) == 1]
+    if mined and head is None:
+        head = get_web3().eth.block_number
+    deep_enough = {
+        int(receipt['blockNumber'], 16) for receipt in mined
+        if head - int(receipt['blockNumber'], 16) + 1 >= CONFIRMATION_DEPTH
+    }
+    headers = get_block_headers(deep_enough)
+    still_pending = 0
+    resolved = []
+
+    for certificate in certificates:
+        receipt = receipts.get(certificate.revocation_tx_hash)
+        if receipt is None:
+            certificate.revocation_block_number = None
+            certificate.revocation_block_hash = None
+            pending_since = certificate.revocation_pending_since or now
+            if pending_since < now - timedelta(seconds=PENDING_TIMEOUT):
+                certificate.revocation_status = Certificate.REVOCATION_STATUS_FAILED
+                certificate.revocation_error = f"Transaction was not mined within {PENDING_TIMEOUT} seconds"
+            else:
+                still_pending += 1
+                continue
+        elif int(receipt['status'], 16) == 1:
+            certificate.revocation_block_number = int(receipt['blockNumber'], 16)
+            certificate.revocation_block_hash = receipt['blockHash']
+            if certificate.revocation_block_number not in deep_enough:
+                still_pending += 1
+                certificate.save(update_fields=['revocation_block_number', 'revocation_block_hash'])
+                continue
+            certificate.revocation_status = Certificate.REVOCATION_STATUS_CONFIRMED
+            certificate.revocation_error = None
+            certificate.is_revoked = True
+            certificate.revocation_timestamp = block_time(headers.get(certificate.revocation_block_number))
+        else:
+            certificate.revocation_status = Certificate.REVOCATION_STATUS_FAILED
+            certificate.revocation_error = "Transaction reverted. The certificate may not exist or is already revoked."
+
+        resolved.append(certificate.revocation_tx_hash)
+        print(f"Revocation of {certificate.cert_hash} is {certificate.revocation_status} "
+              f"(transaction {certificate.revocation_tx_hash})")
+        certificate.save(update_fields=[
+            'revocation_status', 'revocation_error', 'is_revoked', 'revocation_timestamp',
+            'revocation_block_number', 'revocation_block_hash',
+        ])
+        verification_cache.invalidate(certificate.cert_hash)
+
+    sender_pool.complete(resolved)
+    return still_pending
+
+
+def detect_reorgs(head=None, depth=REORG_CHECK_DEPTH):
+    """
+    Compare the stored block hashes of recently mined issuances and
+    revocations with the canonical chain and roll orphaned rows back to
+    pending. Returns how many rows were rolled back.
+    """
+    if head is None:
+        head = get_web3().eth.block_number
+    recent = list(
+        Certificate.objects.filter(block_number__gt=head - depth, block_hash__isnull=False)
+        .values_list('id', 'block_number', 'block_hash', 'cert_hash')
+    )
+    recent_revocations = list(
+        Certificate.objects.filter(revocation_block_number__gt=head - depth, revocation_block_hash__isnull=False)
+        .values_list('id', 'revocation_block_number', 'revocation_block_hash', 'cert_hash')
+    )
+    if not recent and not recent_revocations:
+        return 0
+
+    headers = get_block_headers(block_number for _, block_number, _, _ in recent + recent_revocations)
+
+    def find_orphaned(rows):
+        return {
+            row_id: (block_number, cert_hash) for row_id, block_number, block_hash, cert_hash in rows
+            if not headers.get(block_number) or headers[block_number]['hash'].lower() != block_hash.lower()
+        }
+
+    orphaned = find_orphaned(recent)
+    orphaned_revocations = find_orphaned(recent_revocations)
+    if orphaned:
+        print(f"Reorg detected: rolling back {len(orphaned)} certificate(s) to pending")
+        # The transaction is usually back in the mempool; give it a full timeout to be mined again
+        Certificate.objects.filter(id__in=orphaned).update(
+            chain_status=Certificate.CHAIN_STATUS_PENDING,
+            pending_since=timezone.now(),
+            chain_error="Block was reorganised away; waiting for the transaction to be mined again",
+            blockchain_verified=False,
+            blockchain_timestamp=None,
+            block_number=None,
+            block_hash=None,
+        )
+    if orphaned_revocations:
+        print(f"Reorg detected: rolling back {len(orphaned_revocations)} revocation(s)")
+        rows = Certificate.objects.filter(id__in=orphaned_revocations)
+        rows.update(
+            is_revoked=False,
+            revocation_timestamp=None,
+            revocation_block_number=None,
+            revocation_block_hash=None,
+        )
+        # Revocations sent from here wait for their transaction again; ones only seen in logs are cleared
+        rows.filter(revocation_tx_hash__isnull=False).update(
+            revocation_status=Certificate.REVOCATION_STATUS_PENDING,
+            revocation_pending_since=timezone.now(),
+            revocation_error="Block was reorganised away; waiting for the transaction to be mined again",
+        )
+        rows.filter(revocation_tx_hash__isnull=True).update(revocation_status=None)
+
+    orphaned_blocks = [block_number for block_number, _ in orphaned.values()]
+    orphaned_blocks += [block_number for block_number, _ in orphaned_revocations.values()]
+    if orphaned_blocks:
+        # Let the event indexer see the canonical chain's events for these blocks
+        first_block = min(orphaned_blocks)
+        ChainCheckpoint.objects.filter(name=CHECKPOINT_NAME, last_block__gte=first_block).update(
+            last_block=first_block - 1)
+        for _, cert_hash in list(orphaned.values()) + list(orphaned_revocations.values()):
+            verification_cache.invalidate(cert_hash)
+    return len(orphaned) + len(orphaned_revocations)
+
+
+def process_pending(batch_size=BATCH_SIZE):
+    """Check every pending issuance and revocation once; returns how many are still pending"""
+    pending = Certificate.objects.filter(
+        chain_status=Certificate.CHAIN_STATUS_PENDING, transaction_hash__isnull=False)
+    pending_revocations = Certificate.objects.filter(
+        revocation_status=Certificate.REVOCATION_STATUS_PENDING, revocation_tx_hash__isnull=False)
+    if not pending.exists() and not pending_revocations.exists() \
+            and not Certificate.objects.filter(block_hash__isnull=False).exists() \
+            and not Certificate.objects.filter(revocation_block_hash__isnull=False).exists():
+        return 0
+
+    head = get_web3().eth.block_number
+    detect_reorgs(head)
+    still_pending = 0
+    for rows, apply in ((pending, apply_receipts), (pending_revocations, apply_revocation_receipts)):
+        last_id = 0
+        while True:
+            batch = list(rows.filter(id__gt=last_id).order_by('id')[:batch_size])
+            if not batch:
+                break
+            still_pending += apply(batch, head)
+            last_id = batch[-1].id
+    return still_pending
+
+
+class ReceiptTracker:
+    """
+    In-process daemon thread that polls receipts while issuances are pending.
+
+    The thread starts when track() is called and exits once nothing is left
+    pending, so idle workers do not poll the node.
+    """
+
+    def __init__(self, poll_interval=POLL_INTERVAL):
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def track(self):
+        """Make sure pending issuances are being tracked"""
+        with self._lock:
+            self._wake.set()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='receipt-tracker', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        try:
+            while True:
+                self._wake.clear()
+                try:
+                    still_pending = process_pending()
+                except Exception as e:
+                    print(f"Receipt tracking failed: {str(e)}")
+                    still_pending = 1
+                finally:
+                    close_old_connections()
+
+                if not still_pending:
+                    with self._lock:
+                        if not self._wake.is_set():
+                            self._thread = None
+                            return
+                self._wake.wait(self.poll_interval)
+        finally:
+            db_connection.close()
+
+
+receipt_tracker = ReceiptTracker()
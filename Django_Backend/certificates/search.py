@@ -0,0 +1,172 @@
+# certificates/search.py
+"""
+Full-text search over student name, course and institution.
+
+The backend is picked from the database connection:
+
+- SQLite: an FTS5 table (SEARCH_TABLE) with the certificate id as rowid,
+  kept in sync by the post_save/post_delete signals and by
+  sync_search_index() after bulk inserts. Results are ranked with bm25.
+- PostgreSQL: a pg_trgm GIN index over the three columns, ranked by
+  word_similarity.
+- Anything else: icontains filters, unranked.
+
+Every word in a query must match, and the last characters typed are
+treated as a prefix, so results narrow as the user types.
+"""
+
+import re
+
+from django.db import connections, router
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Certificate
+
+SEARCH_TABLE = 'certificates_certificate_fts'
+SEARCH_FIELDS = frozenset(['student_name', 'course', 'institution'])
+SEARCH_DOCUMENT = "(student_name || ' ' || course || ' ' || institution)"
+
+BACKEND_FTS5 = 'fts5'
+BACKEND_TRIGRAM = 'trigram'
+BACKEND_BASIC = 'basic'
+
+# Relative bm25 weights of student_name, course and institution
+FTS5_WEIGHTS = (10.0, 2.0, 1.0)
+
+_backends = {}
+
+
+def search_terms(query):
+    """Words of a search query, lower-cased"""
+    return re.findall(r'\w+', str(query).lower())
+
+
+def get_search_backend(using=None):
+    """Search backend for a database alias, detected once per alias"""
+    using = using or router.db_for_read(Certificate)
+    if using not in _backends:
+        connection = connections[using]
+        if connection.vendor == 'sqlite' and SEARCH_TABLE in connection.introspection.table_names():
+            _backends[using] = BACKEND_FTS5
+        elif connection.vendor == 'postgresql':
+            _backends[using] = BACKEND_TRIGRAM
+        else:
+            _backends[using] = BACKEND_BASIC
+    return _backends[using]
+
+
+def index_certificate(certificate, using=None):
+    """Add or replace one certificate in the FTS5 table"""
+    using = using or router.db_for_write(Certificate)
+    if get_search_backend(using) != BACKEND_FTS5:
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"INSERT OR REPLACE INTO {SEARCH_TABLE} (rowid, student_name, course, institution) "
+            f"VALUES (%s, %s, %s, %s)",
+            [certificate.id, certificate.student_name, certificate.course, certificate.institution],
+        )
+
+
+def unindex_certificate(certificate_id, using=None):
+    using = using or router.db_for_write(Certificate)
+    if get_search_backend(using) != BACKEND_FTS5:
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [certificate_id])
+
+
+def sync_search_index(using=None, rebuild=False):
+    """
+    Index certificates inserted without signals (bulk_create), i.e. every
+    id above the highest one already indexed. rebuild=True reindexes
+    everything. Returns the number of rows added.
+    """
+    using = using or router.db_for_write(Certificate)
+    if get_search_backend(using) != BACKEND_FTS5:
+        return 0
+    with connections[using].cursor() as cursor:
+        if rebuild:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, student_name, course, institution) "
+            f"SELECT id, student_name, course, institution FROM certificates_certificate "
+            f"WHERE id > (SELECT COALESCE(MAX(rowid), 0) FROM {SEARCH_TABLE})"
+        )
+        return cursor.rowcount
+
+
+def fts5_query(terms):
+    """FTS5 MATCH expression requiring every term, the last one as a prefix"""
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def like_pattern(term):
+    return '%' + term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+def filter_by_terms(queryset, terms):
+    """Fallback without a search index: every term in one of the three columns"""
+    for term in terms:
+        queryset = queryset.filter(
+            Q(student_name__icontains=term) | Q(course__icontains=term) | Q(institution__icontains=term)
+        )
+    return queryset
+
+
+def search_certificate_ids(query, limit, using=None):
+    """Ids of certificates matching query, best match first"""
+    terms = search_terms(query)
+    if not terms:
+        return []
+    using = using or router.db_for_read(Certificate)
+    backend = get_search_backend(using)
+
+    if backend == BACKEND_BASIC:
+        queryset = filter_by_terms(Certificate.objects.using(using), terms)
+        return list(queryset.order_by('-issue_date', '-id').values_list('id', flat=True)[:limit])
+
+    with connections[using].cursor() as cursor:
+        if backend == BACKEND_FTS5:
+            weights = ', '.join(str(weight) for weight in FTS5_WEIGHTS)
+            cursor.execute(
+                f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s "
+                f"ORDER BY bm25({SEARCH_TABLE}, {weights}), rowid DESC LIMIT %s",
+                [fts5_query(terms), limit],
+            )
+        else:
+            matches = ' AND '.join([f"{SEARCH_DOCUMENT} ILIKE %s"] * len(terms))
+            cursor.execute(
+                f"SELECT id FROM certificates_certificate WHERE {matches} "
+                f"ORDER BY word_similarity(%s, {SEARCH_DOCUMENT}) DESC, id DESC LIMIT %s",
+                [like_pattern(term) for term in terms] + [' '.join(terms), limit],
+            )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_certificates(query, limit=20, using=None):
+    """Certificates matching query, best match first"""
+    ids = search_certificate_ids(query, limit, using=using)
+    certificates = Certificate.objects.using(using or router.db_for_read(Certificate)).in_bulk(ids)
+    return [certificates[certificate_id] for certificate_id in ids if certificate_id in certificates]
+
+
+def filter_by_search(queryset, query):
+    """Narrow a queryset to certificates matching query, keeping its ordering"""
+    terms = search_terms(query)
+    if not terms:
+        return queryset
+    backend = get_search_backend(queryset.db)
+    if backend == BACKEND_FTS5:
+        return queryset.filter(id__in=RawSQL(
+            f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s", [fts5_query(terms)]
+        ))
+    if backend == BACKEND_TRIGRAM:
+        matches = ' AND '.join([f"{SEARCH_DOCUMENT} ILIKE %s"] * len(terms))
+        return queryset.filter(id__in=RawSQL(
+            f"SELECT id FROM certificates_certificate WHERE {matches}", [like_pattern(term) for term in terms]
+        ))
+    return filter_by_terms(queryset, terms)
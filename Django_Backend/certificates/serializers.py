@@ -1,4 +1,9 @@
 # certificates/serializers.py
+import re
+
+from django.core.files.storage import FileSystemStorage
+from django.utils import timezone
+from django.utils.encoding import iri_to_uri
 from rest_framework import serializers
 from .models import Certificate
 import time
@@ -7,6 +12,8 @@ class CertificateSerializer(serializers.ModelSerializer):
     # Add a serialized timestamp field for issue_date
     issue_date_timestamp = serializers.SerializerMethodField()
     qr_code_url = serializers.SerializerMethodField()
+    # Stored as 32 bytes, always rendered as 0x-prefixed lowercase hex
+    cert_hash = serializers.CharField(read_only=True)
     
     class Meta:
         model = Certificate
@@ -31,3 +38,113 @@ class CertificateSerializer(serializers.ModelSerializer):
             return None
         except (AttributeError, ValueError, TypeError):
             return None
+
+
+# Output keys of CertificateSerializer, in order
+CERTIFICATE_FIELDS = (
+    'id', 'issue_date_timestamp', 'qr_code_url', 'cert_hash', 'student_name', 'course', 'institution',
+    'issue_date', 'ipfs_hash', 'certificate_pdf', 'pdf_hash', 'qr_code', 'created_at', 'is_revoked',
+    'blockchain_verified', 'blockchain_timestamp', 'revocation_timestamp', 'chain_status',
+    'transaction_hash', 'pending_since', 'chain_error', 'merkle_root', 'merkle_proof', 'block_number', 'block_hash',
+    'revocation_status', 'revocation_tx_hash', 'revocation_pending_since', 'revocation_block_number',
+    'revocation_block_hash', 'revocation_error',
+)
+DATETIME_FIELDS = {'issue_date', 'created_at', 'blockchain_timestamp', 'revocation_timestamp', 'pending_since',
+                   'revocation_pending_since'}
+FILE_FIELDS = {'certificate_pdf', 'qr_code'}
+# Computed output fields and the column each one is read from
+COMPUTED_FIELDS = {'issue_date_timestamp': 'issue_date', 'qr_code_url': 'qr_code'}
+# File names that FileSystemStorage.url() would append to its base URL unchanged
+PLAIN_FILE_NAME = re.compile(r"[A-Za-z0-9_\-./~!*()']+")
+
+
+def parse_fields(value):
+    """Requested output fields from a comma-separated ?fields= value, or None for all"""
+    if not value:
+        return None
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in CERTIFICATE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return [field for field in CERTIFICATE_FIELDS if field in fields]
+
+
+class CertificateRowSerializer:
+    """
+    Serializes rows read with values() into exactly what CertificateSerializer
+    produces for the same certificates, without DRF's per-field machinery.
+    Used for list, search and export responses. Media URLs are made absolute
+    with a scheme and host computed once, and fields limits the output to
+    the requested keys (and the columns read to the ones they need).
+    """
+
+    def __init__(self, request=None, fields=None):
+        self.request = request
+        self.fields = list(fields or CERTIFICATE_FIELDS)
+        self.columns = list(dict.fromkeys(COMPUTED_FIELDS.get(field, field) for field in self.fields))
+        self.timezone = timezone.get_current_timezone()
+        self.host = request.build_absolute_uri('/')[:-1] if request is not None else None
+        self._converters = [(field, COMPUTED_FIELDS.get(field, field), self._converter(field))
+                            for field in self.fields]
+
+    def _converter(self, field):
+        if field == 'issue_date_timestamp':
+            return self._timestamp
+        if field in FILE_FIELDS or field == 'qr_code_url':
+            return self._file_converter(Certificate._meta.get_field(COMPUTED_FIELDS.get(field, field)).storage)
+        if field in DATETIME_FIELDS:
+            return self._datetime
+        return None
+
+    def _timestamp(self, value):
+        try:
+            return int(value.timestamp())
+        except (AttributeError, ValueError, TypeError):
+            return None
+
+    def _datetime(self, value):
+        if value is None:
+            return None
+        if timezone.is_aware(value):
+            value = value.astimezone(self.timezone)
+        value = value.isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+
+    def _absolute(self, url):
+        """request.build_absolute_uri(url) without re-reading the request each time"""
+        if self.host is None:
+            return url
+        if url.startswith('/') and not url.startswith('//'):
+            return iri_to_uri(self.host + url)
+        return self.request.build_absolute_uri(url)
+
+    def _file_converter(self, storage):
+        # The media base URL is resolved once; plain relative names are simply appended to it
+        base_url = getattr(storage, 'base_url', None)
+        prefix = None
+        if isinstance(storage, FileSystemStorage) and base_url and base_url.endswith('/'):
+            prefix = self._absolute(base_url)
+
+        def file_url(name):
+            if not name:
+                return None
+            if prefix is not None and not name.startswith('/') and '/.' not in '/' + name \
+                    and PLAIN_FILE_NAME.fullmatch(name):
+                return prefix + name
+            return self._absolute(storage.url(name))
+        return file_url
+
+    def values(self, queryset, *extra_columns):
+        """queryset as values() dicts holding every column this serializer reads"""
+        return queryset.values(*dict.fromkeys(self.columns + list(extra_columns)))
+
+    def to_representation(self, row):
+        return {
+            field: converter(row[column]) if converter else row[column]
+            for field, column, converter in self._converters
+        }
+
+    def serialize(self, rows):
+        return [self.to_representation(row) for row in rows]
@@ -0,0 +1,26 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .bloom import known_hashes
+from .models import Certificate
+from .search import SEARCH_FIELDS, index_certificate, unindex_certificate
+
+
+@receiver(post_save, sender=Certificate)
+def add_known_hash(sender, instance, created, **kwargs):
+    """Keep the known-hash Bloom filter current for certificates saved in this process"""
+    if created:
+        known_hashes.add(instance.cert_hash)
+
+
+@receiver(post_save, sender=Certificate)
+def update_search_index(sender, instance, using, update_fields=None, **kwargs):
+    """Keep the full-text search index in step with the certificate table"""
+    if update_fields and not SEARCH_FIELDS.intersection(update_fields):
+        return
+    index_certificate(instance, using=using)
+
+
+@receiver(post_delete, sender=Certificate)
+def remove_from_search_index(sender, instance, using, **kwargs):
+    unindex_certificate(instance.id, using=using)
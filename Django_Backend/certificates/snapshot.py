@@ -0,0 +1,223 @@
+# certificates/snapshot.py
+"""
+Memory-mapped snapshot of every certificate hash.
+
+The file holds a small header, all 32-byte certificate hashes in sorted
+order and a parallel bitmap with one bit per hash set when the certificate
+is revoked. Workers map it read-only, so the operating system shares one
+copy of the pages between them, and a lookup is a binary search over the
+mapping without building a Python object per entry.
+
+build_snapshot() writes a new file next to the old one and swaps it in
+with os.replace(). Readers notice the new file on their next check and
+remap it; lookups that are already running finish against the old mapping.
+Certificates after the snapshot's safe id are covered by the Bloom filter
+in certificates.bloom. The safe id is not simply the highest id in the file:
+ids are handed out before commit, so on Postgres a row with a lower id can
+commit after the snapshot is read. Only ids handed out more than
+SNAPSHOT_SETTLE_SECONDS before the build started are treated as complete.
+"""
+
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .hashes import HASH_BYTES, normalize_hash
+
+SNAPSHOT_PATH = getattr(settings, 'CERTIFICATE_HASH_SNAPSHOT_PATH', '')
+SNAPSHOT_CHECK_INTERVAL = getattr(settings, 'CERTIFICATE_HASH_SNAPSHOT_CHECK_INTERVAL', 5.0)
+SNAPSHOT_SETTLE_SECONDS = getattr(settings, 'CERTIFICATE_INSERT_SETTLE_SECONDS', 60.0)
+
+SNAPSHOT_MAGIC = b'CERTHSH1'
+# magic, hash count, safe id (every certificate up to it is included), build time (unix seconds)
+HEADER = struct.Struct('<8sQQQ')
+HASH_SIZE = HASH_BYTES
+
+HASH_VALID = 'valid'
+HASH_REVOKED = 'revoked'
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot file is missing, truncated or not a snapshot"""
+    pass
+
+
+def build_snapshot(path, settle_seconds=SNAPSHOT_SETTLE_SECONDS):
+    """
+    Write a snapshot of the certificate table to path, replacing any
+    existing file atomically. Returns (hash_count, safe_id).
+    """
+    from .models import Certificate
+
+    settled_before = timezone.now() - timedelta(seconds=settle_seconds)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    # cert_hash is stored as raw bytes, so the database already returns rows in snapshot order
+    rows = (
+        Certificate.objects.order_by('cert_hash')
+        .values_list('id', 'cert_hash', 'is_revoked', 'created_at')
+        .iterator(chunk_size=10000)
+    )
+    snapshot_fd, snapshot_path = tempfile.mkstemp(dir=directory, suffix='.snapshot')
+    try:
+        with os.fdopen(snapshot_fd, 'wb') as snapshot:
+            snapshot.write(b'\0' * HEADER.size)
+            revoked_bits = bytearray()
+            count = 0
+            safe_id = 0
+            for row_id, cert_hash, is_revoked, created_at in rows:
+                # Any lower id was handed out before this row was created, so has committed by now
+                if created_at <= settled_before:
+                    safe_id = max(safe_id, row_id)
+                if count % 8 == 0:
+                    revoked_bits.append(0)
+                if is_revoked:
+                    revoked_bits[-1] |= 1 << (count % 8)
+                snapshot.write(normalize_hash(cert_hash))
+                count += 1
+            snapshot.write(revoked_bits)
+            snapshot.seek(0)
+            snapshot.write(HEADER.pack(SNAPSHOT_MAGIC, count, safe_id, int(time.time())))
+            snapshot.flush()
+            os.fsync(snapshot.fileno())
+        os.replace(snapshot_path, path)
+    except BaseException:
+        if os.path.exists(snapshot_path):
+            os.remove(snapshot_path)
+        raise
+
+    print(f"Wrote certificate hash snapshot {path}: {count} hashes, complete up to id {safe_id}")
+    return count, safe_id
+
+
+class HashSnapshot:
+    """A read-only mapping of one snapshot file"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.stat = os.fstat(f.fileno())
+            if self.stat.st_size < HEADER.size:
+                raise SnapshotError(f"{path} is too short to be a hash snapshot")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, self.safe_id, self.built_at = HEADER.unpack_from(self._map, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise SnapshotError(f"{path} is not a certificate hash snapshot")
+        self._bitmap_offset = HEADER.size + self.count * HASH_SIZE
+        if len(self._map) != self._bitmap_offset + (self.count + 7) // 8:
+            raise SnapshotError(f"{path} is truncated")
+
+    def find(self, item):
+        """Position of a 32-byte hash in the snapshot, or -1"""
+        data = self._map
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            offset = HEADER.size + middle * HASH_SIZE
+            if data[offset:offset + HASH_SIZE] < item:
+                low = middle + 1
+            else:
+                high = middle
+        offset = HEADER.size + low * HASH_SIZE
+        if low < self.count and data[offset:offset + HASH_SIZE] == item:
+            return low
+        return -1
+
+    def is_revoked(self, position):
+        return bool(self._map[self._bitmap_offset + position // 8] & (1 << (position % 8)))
+
+    def __len__(self):
+        return self.count
+
+
+class SnapshotReader:
+    """
+    The current snapshot at path, remapped when the file is swapped.
+    Does nothing when no path is configured or the file does not exist yet.
+    """
+
+    def __init__(self, path=SNAPSHOT_PATH, check_interval=SNAPSHOT_CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._checked_at = None
+        self.lookups = 0
+        self.hits = 0
+        self.loads = 0
+
+    def current(self):
+        """The mapped snapshot, or None"""
+        if not self.path:
+            return None
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return self._snapshot
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self.check_interval:
+                return self._snapshot
+            self._checked_at = now
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                self._snapshot = None
+                return None
+            loaded = self._snapshot
+            if loaded is None or (loaded.stat.st_ino, loaded.stat.st_mtime_ns, loaded.stat.st_size) != \
+                    (stat.st_ino, stat.st_mtime_ns, stat.st_size):
+                try:
+                    self._snapshot = HashSnapshot(self.path)
+                    self.loads += 1
+                except (OSError, SnapshotError) as e:
+                    print(f"Could not load certificate hash snapshot: {str(e)}")
+            return self._snapshot
+
+    def reload(self):
+        """Check the file again on the next lookup"""
+        with self._lock:
+            self._checked_at = None
+
+    @property
+    def safe_id(self):
+        snapshot = self.current()
+        return snapshot.safe_id if snapshot else 0
+
+    def status(self, cert_hash):
+        """HASH_VALID or HASH_REVOKED for a hash in the snapshot, otherwise None"""
+        snapshot = self.current()
+        if snapshot is None:
+            return None
+        item = normalize_hash(cert_hash)
+        if item is None:
+            return None
+        self.lookups += 1
+        position = snapshot.find(item)
+        if position < 0:
+            return None
+        self.hits += 1
+        return HASH_REVOKED if snapshot.is_revoked(position) else HASH_VALID
+
+    def stats(self):
+        snapshot = self.current()
+        return {
+            'path': self.path,
+            'loaded': snapshot is not None,
+            'hashes': len(snapshot) if snapshot else 0,
+            'safe_id': snapshot.safe_id if snapshot else 0,
+            'built_at': snapshot.built_at if snapshot else None,
+            'size_bytes': snapshot.stat.st_size if snapshot else 0,
+            'lookups': self.lookups,
+            'hits': self.hits,
+            'loads': self.loads,
+        }
+
+
+hash_snapshot = SnapshotReader()
@@ -0,0 +1,110 @@
+# certificates/tasks.py
+"""
+Background jobs that finish issuing a certificate (see certificates.jobs).
+
+A job can run more than once for the same certificate, after a failed
+attempt or a lost lease, so every handler first checks whether its work
+is already done.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.utils import timezone
+
+from .blockchain import SmartContractError, rpc_deadline, submit_certificate, verify_certificate_on_chain
+from .jobs import PermanentJobError, enqueue, job_type
+from .models import Certificate
+from .qr_generator import generate_qr_code
+from .receipts import receipt_tracker
+
+ISSUE_DEADLINE = getattr(settings, 'BLOCKCHAIN_ISSUE_DEADLINE', 130.0)
+
+JOB_ISSUE_CERTIFICATE = 'issue_certificate'
+JOB_GENERATE_QR_CODE = 'generate_qr_code'
+JOB_HASH_CERTIFICATE_PDF = 'hash_certificate_pdf'
+
+
+def get_certificate(payload):
+    return Certificate.objects.filter(id=payload['certificate_id']).first()
+
+
+def mark_issuance_failed(payload, error):
+    """Give up on a certificate whose transaction could not be sent"""
+    Certificate.objects.filter(
+        id=payload['certificate_id'], chain_status=Certificate.CHAIN_STATUS_PENDING, transaction_hash__isnull=True,
+    ).update(chain_status=Certificate.CHAIN_STATUS_FAILED, chain_error=error)
+
+
+@job_type(JOB_ISSUE_CERTIFICATE, max_attempts=5, priority=10, on_failure=mark_issuance_failed)
+def issue_certificate_job(payload):
+    """Send the issueCertificate transaction; the receipt tracker confirms it"""
+    certificate = get_certificate(payload)
+    if certificate is None or certificate.chain_status != Certificate.CHAIN_STATUS_PENDING \
+            or certificate.transaction_hash:
+        return
+    try:
+        with rpc_deadline(ISSUE_DEADLINE):
+            tx_result = submit_certificate(certificate.student_name, certificate.course,
+                                           certificate.institution, payload['issue_date'])
+    except SmartContractError as e:
+        error_msg = str(e).lower()
+        if 'already exists' in error_msg:
+            # An earlier attempt may have got its transaction through before failing
+            with rpc_deadline(ISSUE_DEADLINE):
+                result = verify_certificate_on_chain(certificate.cert_hash)
+            if result and result[0]:
+                certificate.chain_status = Certificate.CHAIN_STATUS_CONFIRMED
+                certificate.blockchain_verified = True
+                certificate.chain_error = None
+                certificate.save(update_fields=['chain_status', 'blockchain_verified', 'chain_error'])
+                return
+            raise PermanentJobError(str(e))
+        if 'revert' in error_msg:
+            raise PermanentJobError(str(e))
+        raise
+
+    certificate.transaction_hash = tx_result['transaction_hash']
+    certificate.ipfs_hash = tx_result.get('ipfs_hash', '')
+    certificate.pending_since = timezone.now()
+    certificate.save(update_fields=['transaction_hash', 'ipfs_hash', 'pending_since'])
+    if certificate.transaction_hash:
+        receipt_tracker.track()
+
+
+@job_type(JOB_GENERATE_QR_CODE, max_attempts=3)
+def generate_qr_code_job(payload):
+    """Render and store the certificate's verification QR code"""
+    certificate = get_certificate(payload)
+    if certificate is None or certificate.qr_code:
+        return
+    certificate.qr_code = generate_qr_code(certificate.cert_hash)
+    certificate.save(update_fields=['qr_code'])
+    print(f"QR code generated and saved for certificate: {certificate.cert_hash}")
+
+
+@job_type(JOB_HASH_CERTIFICATE_PDF, max_attempts=3, priority=-10)
+def hash_certificate_pdf_job(payload):
+    """Store the SHA-256 of the uploaded certificate PDF as pdf_hash"""
+    certificate = get_certificate(payload)
+    if certificate is None or not certificate.certificate_pdf or certificate.pdf_hash:
+        return
+    digest = hashlib.sha256()
+    with certificate.certificate_pdf.open('rb') as pdf:
+        for chunk in pdf.chunks():
+            digest.update(chunk)
+    certificate.pdf_hash = '0x' + digest.hexdigest()
+    certificate.save(update_fields=['pdf_hash'])
+
+
+def queue_issuance_jobs(certificate, issue_date_timestamp):
+    """Queue the work left after a certificate row is created; returns the jobs by type"""
+    payload = {'certificate_id': certificate.id}
+    jobs = {}
+    # Merkle-anchored certificates are sent by anchor_certificates instead
+    if certificate.chain_status == Certificate.CHAIN_STATUS_PENDING:
+        jobs[JOB_ISSUE_CERTIFICATE] = enqueue(JOB_ISSUE_CERTIFICATE, {**payload, 'issue_date': issue_date_timestamp})
+    jobs[JOB_GENERATE_QR_CODE] = enqueue(JOB_GENERATE_QR_CODE, payload)
+    if certificate.certificate_pdf:
+        jobs[JOB_HASH_CERTIFICATE_PDF] = enqueue(JOB_HASH_CERTIFICATE_PDF, payload)
+    return jobs
@@ -0,0 +1,678 @@
+"""
+Tests for the blockchain plumbing that does not need a running node
+Run with: python manage.py test certificates.test_blockchain
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from eth_abi import decode as abi_decode, encode as abi_encode
+
+from django.db import close_old_connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from web3 import Web3
+from web3.providers.base import BaseProvider
+
+from certificates.models import SenderNonce
+from certificates.blockchain import (
+    BlockchainConnection,
+    BlockchainConnectionError,
+    ContractRegistry,
+    NonceManager,
+    PooledHTTPProvider,
+    RPCDeadlineExceeded,
+    SenderPool,
+    VerificationCache,
+    SmartContractError,
+    compute_certificate_hash,
+    create_rpc_session,
+    issue_certificates_bulk,
+    split_issue_batches,
+    rpc_deadline,
+    verification_cache,
+    verify_certificate_on_chain,
+    verify_certificates_on_chain,
+    verify_certificates_rpc_batch,
+)
+
+ABI_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'contract_abi.json')
+CONTRACT_ADDRESS = '0xe78A0F7E598Cc8b0Bb87894B0F60dD2a88d6a8Ab'
+
+
+class StubProvider(BaseProvider):
+    """Answers JSON-RPC requests from a dict and records every method called"""
+
+    def __init__(self, responses=None):
+        super().__init__()
+        self.responses = {'eth_chainId': '0x539'}
+        self.responses.update(responses or {})
+        self.calls = []
+
+    def make_request(self, method, params):
+        self.calls.append(method)
+        return {'jsonrpc': '2.0', 'id': 1, 'result': self.responses.get(method)}
+
+    def is_connected(self, show_traceback=False):
+        return True
+
+
+@override_settings(CONTRACT_ADDRESS=CONTRACT_ADDRESS)
+class ContractRegistryTests(TestCase):
+    """Test the process-wide contract handle cache"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.abi_path = os.path.join(self.tmp_dir, 'contract_abi.json')
+        shutil.copy(ABI_PATH, self.abi_path)
+        self.registry = ContractRegistry(self.abi_path)
+        self.provider = StubProvider()
+        self.web3 = Web3(self.provider)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_handle_is_built_once(self):
+        """Repeated lookups reuse the handle and skip the eth_chainId call"""
+        first = self.registry.get(self.web3)
+        second = self.registry.get(self.web3)
+
+        self.assertIs(first, second)
+        self.assertEqual(self.provider.calls.count('eth_chainId'), 1)
+        self.assertEqual(self.registry.stats()['hits'], 1)
+        self.assertEqual(self.registry.stats()['misses'], 1)
+
+    def test_abi_change_invalidates_handle(self):
+        """Rewriting the ABI artifact builds a fresh handle"""
+        first = self.registry.get(self.web3)
+
+        with open(self.abi_path) as abi_file:
+            artifact = json.load(abi_file)
+        with open(self.abi_path, 'w') as abi_file:
+            json.dump(artifact, abi_file)
+        os.utime(self.abi_path, ns=(0, os.stat(self.abi_path).st_mtime_ns + 1_000_000))
+
+        second = self.registry.get(self.web3)
+        self.assertIsNot(first, second)
+        self.assertEqual(self.registry.stats()['misses'], 2)
+
+    def test_address_change_invalidates_handle(self):
+        """Changing CONTRACT_ADDRESS builds a handle for the new address"""
+        first = self.registry.get(self.web3)
+        new_address = '0x' + '11' * 20
+        with override_settings(CONTRACT_ADDRESS=new_address):
+            second = self.registry.get(self.web3)
+
+        self.assertEqual(first.address, CONTRACT_ADDRESS)
+        self.assertEqual(second.address, Web3.to_checksum_address(new_address))
+        self.assertEqual(self.registry.stats()['cached_handles'], 1)
+
+    def test_new_web3_instance_gets_own_handle(self):
+        """A handle bound to an old connection is not reused"""
+        first = self.registry.get(self.web3)
+        second = self.registry.get(Web3(StubProvider()))
+        self.assertIsNot(first, second)
+
+    def test_missing_abi_file(self):
+        """A missing artifact is reported as a contract error"""
+        os.remove(self.abi_path)
+        with self.assertRaises(SmartContractError):
+            self.registry.get(self.web3)
+
+
+class FlakyProvider(StubProvider):
+    """Provider whose reachability can be switched on and off"""
+
+    def __init__(self, reachable=False):
+        super().__init__()
+        self.reachable = reachable
+
+    def is_connected(self, show_traceback=False):
+        return self.reachable
+
+
+class BlockchainConnectionTests(TestCase):
+    """Test the lazy connection manager"""
+
+    def setUp(self):
+        self.provider = FlakyProvider()
+        self.connection = BlockchainConnection(
+            'http://node.invalid:8545',
+            provider_factory=lambda url: self.provider,
+            min_backoff=0.01,
+            max_backoff=0.05,
+        )
+
+    def tearDown(self):
+        self.connection.close()
+
+    def test_no_connection_until_first_use(self):
+        """Creating the manager does not contact the node"""
+        self.assertEqual(self.connection.status()['state'], BlockchainConnection.DISCONNECTED)
+        self.assertEqual(self.connection.attempts, 0)
+
+    def test_unreachable_node_fails_fast(self):
+        """While the node is down callers get an error instead of blocking"""
+        started = time.monotonic()
+        with self.assertRaises(BlockchainConnectionError):
+            self.connection.get_web3()
+        with self.assertRaises(BlockchainConnectionError):
+            self.connection.get_web3()
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(self.connection.status()['state'], BlockchainConnection.RECONNECTING)
+
+    def test_recovers_in_background(self):
+        """The reconnect thread picks the node up once it comes back"""
+        with self.assertRaises(BlockchainConnectionError):
+            self.connection.get_web3()
+
+        self.provider.reachable = True
+        deadline = time.monotonic() + 5
+        while self.connection.state != BlockchainConnection.CONNECTED and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(self.connection.state, BlockchainConnection.CONNECTED)
+        self.assertIsNotNone(self.connection.get_web3())
+
+    def test_mark_unavailable_triggers_reconnect(self):
+        """A connection error during a call drops the instance and reconnects"""
+        self.provider.reachable = True
+        first = self.connection.get_web3()
+        self.connection.mark_unavailable(ConnectionError('connection reset'))
+
+        deadline = time.monotonic() + 5
+        while self.connection.state != BlockchainConnection.CONNECTED and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertIsNot(self.connection.get_web3(), first)
+
+
+class RPCHandler(BaseHTTPRequestHandler):
+    """Minimal JSON-RPC endpoint that answers every call with block number 0x10"""
+
+    protocol_version = 'HTTP/1.1'
+    delay = 0
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def handle_call(self, request):
+        return {'jsonrpc': '2.0', 'id': request['id'], 'result': '0x10'}
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        time.sleep(self.delay)
+        self.server.posts += 1
+        if isinstance(request, list):
+            reply = [self.handle_call(call) for call in request]
+        else:
+            reply = self.handle_call(request)
+        body = json.dumps(reply).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class QuietHTTPServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        pass
+
+
+class RPCServerMixin:
+    """Runs a local JSON-RPC server and a Web3 instance on the pooled provider"""
+
+    handler = RPCHandler
+
+    def setUp(self):
+        self.server = QuietHTTPServer(('127.0.0.1', 0), self.handler)
+        self.server.connections = 0
+        self.server.posts = 0
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.session, self.adapter = create_rpc_session(pool_size=2)
+        url = f'http://127.0.0.1:{self.server.server_address[1]}'
+        self.web3 = Web3(PooledHTTPProvider(url, session=self.session))
+
+    def tearDown(self):
+        RPCHandler.delay = 0
+        self.session.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class PooledProviderTests(RPCServerMixin, TestCase):
+    """Test connection reuse, timeouts and deadlines of the pooled provider"""
+
+    def test_connections_are_reused(self):
+        """Sequential calls share one keep-alive connection"""
+        for _ in range(5):
+            self.assertEqual(self.web3.eth.block_number, 16)
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(self.adapter.metrics()['total_requests'], 5)
+
+    def test_deadline_bounds_slow_node(self):
+        """A slow node fails the call once the caller's deadline is used up"""
+        RPCHandler.delay = 1
+        started = time.monotonic()
+        with rpc_deadline(0.2):
+            # web3 retries the timed out call, which then finds the deadline spent
+            with self.assertRaises((requests.exceptions.Timeout, RPCDeadlineExceeded)):
+                self.web3.eth.block_number
+        self.assertLess(time.monotonic() - started, 0.9)
+        self.assertEqual(self.adapter.metrics()['timeouts'], 1)
+
+    def test_expired_deadline_skips_request(self):
+        """No request is sent once the deadline has already passed"""
+        with rpc_deadline(0.01):
+            time.sleep(0.02)
+            with self.assertRaises(RPCDeadlineExceeded):
+                self.web3.eth.block_number
+        self.assertEqual(self.adapter.metrics()['total_requests'], 0)
+
+
+ISSUED = {
+    bytes.fromhex('11' * 32): (True, 'Alice', 'Computer Science', 'University of Blockchain', 1735689600),
+    bytes.fromhex('22' * 32): (False, 'Bob', 'Mathematics', 'University of Blockchain', 1735689600),
+}
+
+
+VERIFY_CERTIFICATES_SELECTOR = Web3.keccak(text='verifyCertificates(bytes32[])')[:4]
+
+
+class ContractRPCHandler(RPCHandler):
+    """Answers verifyCertificate(s) eth_calls for the certificates in ISSUED"""
+
+    gas_cap_hashes = None
+
+    def handle_verify_certificates(self, request, calldata):
+        (cert_hashes,) = abi_decode(['bytes32[]'], calldata[4:])
+        self.server.batch_sizes.append(len(cert_hashes))
+        if self.gas_cap_hashes and len(cert_hashes) > self.gas_cap_hashes:
+            return {'jsonrpc': '2.0', 'id': request['id'],
+                    'error': {'code': -32000, 'message': 'out of gas'}}
+        columns = [[], [], [], [], []]
+        for cert_hash in cert_hashes:
+            is_valid, name, course, institution, issue_date = ISSUED.get(cert_hash, (None, '', '', '', 0))
+            columns[0].append(0 if is_valid is None else (1 if is_valid else 2))
+            for column, value in zip(columns[1:], (name, course, institution, issue_date)):
+                column.append(value)
+        encoded = abi_encode(['uint8[]', 'string[]', 'string[]', 'string[]', 'uint256[]'], columns)
+        return {'jsonrpc': '2.0', 'id': request['id'], 'result': '0x' + encoded.hex()}
+
+    def handle_call(self, request):
+        if request['method'] == 'eth_chainId':
+            return {'jsonrpc': '2.0', 'id': request['id'], 'result': '0x539'}
+        calldata = bytes.fromhex(request['params'][0]['data'][2:])
+        if calldata[:4] == VERIFY_CERTIFICATES_SELECTOR:
+            return self.handle_verify_certificates(request, calldata)
+        cert_hash = calldata[4:36]
+        if cert_hash not in ISSUED:
+            return {'jsonrpc': '2.0', 'id': request['id'],
+                    'error': {'code': -32000, 'message': 'execution reverted: Certificate not found!'}}
+        encoded = abi_encode(['bool', 'string', 'string', 'string', 'uint256'], ISSUED[cert_hash])
+        return {'jsonrpc': '2.0', 'id': request['id'], 'result': '0x' + encoded.hex()}
+
+
+@override_settings(CONTRACT_ADDRESS=CONTRACT_ADDRESS)
+class BatchVerificationRPCTests(RPCServerMixin, TestCase):
+    """Test batched verifyCertificate calls"""
+
+    handler = ContractRPCHandler
+
+    def setUp(self):
+        super().setUp()
+        self.server.batch_sizes = []
+        with open(ABI_PATH) as abi_file:
+            abi = json.load(abi_file)['abi']
+        self.contract = self.web3.eth.contract(address=CONTRACT_ADDRESS, abi=abi)
+        patcher_web3 = patch('certificates.blockchain.get_web3', return_value=self.web3)
+        patcher_contract = patch('certificates.blockchain.get_current_contract', return_value=self.contract)
+        patcher_web3.start()
+        patcher_contract.start()
+        self.addCleanup(patcher_web3.stop)
+        self.addCleanup(patcher_contract.stop)
+        patcher_scope = patch.object(VerificationCache, 'scope', return_value=(1337, CONTRACT_ADDRESS))
+        patcher_scope.start()
+        self.addCleanup(patcher_scope.stop)
+        verification_cache.clear()
+        self.addCleanup(verification_cache.clear)
+
+    def test_results_per_hash(self):
+        """Found, revoked and missing certificates are reported per hash"""
+        missing = '0x' + '33' * 32
+        results = verify_certificates_rpc_batch(['0x' + '11' * 32, '22' * 32, missing, '0x1234'])
+
+        self.assertEqual(results['0x' + '11' * 32][0][1], 'Alice')
+        self.assertFalse(results['22' * 32][0][0])
+        self.assertEqual(results[missing], (None, 'Certificate not found on blockchain'))
+        self.assertIsNone(results['0x1234'][0])
+
+    def test_calls_are_batched(self):
+        """Hashes are sent in as few HTTP requests as the batch size allows"""
+        hashes = ['0x%064x' % i for i in range(25)]
+        verify_certificates_rpc_batch(hashes, batch_size=10)
+        self.assertEqual(self.server.posts, 3)
+
+    def test_verify_certificates_view_function(self):
+        """The contract's batch view reports valid, revoked and missing hashes"""
+        missing = '0x' + '33' * 32
+        results = verify_certificates_on_chain(['0x' + '11' * 32, '0x' + '22' * 32, missing])
+
+        self.assertEqual(results['0x' + '11' * 32][0], ISSUED[bytes.fromhex('11' * 32)])
+        self.assertFalse(results['0x' + '22' * 32][0][0])
+        self.assertEqual(results[missing], (None, 'Certificate not found on blockchain'))
+        self.assertEqual(self.server.batch_sizes, [3])
+
+    def test_batches_use_the_verification_cache(self):
+        """Found results are cached by both batch paths; only the rest go to the node"""
+        missing = '0x' + '33' * 32
+        hashes = ['0x' + '11' * 32, '0x' + '22' * 32, missing]
+        first = verify_certificates_on_chain(hashes)
+        self.assertEqual(verify_certificates_on_chain(hashes), first)
+        self.assertEqual(self.server.batch_sizes, [3, 1])
+
+        posts = self.server.posts
+        self.assertEqual(verify_certificates_rpc_batch(hashes)['0x' + '11' * 32], first['0x' + '11' * 32])
+        self.assertEqual(self.server.posts, posts + 1)
+        self.assertEqual(verify_certificate_on_chain('0x' + '22' * 32), first['0x' + '22' * 32][0])
+
+    def test_chunks_split_at_gas_cap(self):
+        """Chunks the node rejects for gas are halved until they fit"""
+        ContractRPCHandler.gas_cap_hashes = 4
+        self.addCleanup(setattr, ContractRPCHandler, 'gas_cap_hashes', None)
+        hashes = ['0x%064x' % i for i in range(20)]
+        results = verify_certificates_on_chain(hashes, chunk_size=10)
+
+        self.assertEqual(len(results), 20)
+        accepted = [size for size in self.server.batch_sizes if size <= 4]
+        self.assertEqual(sum(accepted), 20)
+
+
+SENDER = '0x90F8bf6A479f320ead074411a4B0e7944Ea8c9C1'
+
+
+class NonceManagerTests(TestCase):
+    def setUp(self):
+        self.provider = StubProvider({'eth_getTransactionCount': '0x5'})
+        self.web3 = Web3(self.provider)
+        self.manager = NonceManager(resync_after=60)
+
+    def test_reserves_sequential_nonces_after_one_sync(self):
+        """The node is asked once and later nonces are handed out locally"""
+        nonces = [self.manager.reserve(self.web3, SENDER) for _ in range(4)]
+        self.assertEqual(nonces, [5, 6, 7, 8])
+        self.assertEqual(self.provider.calls.count('eth_getTransactionCount'), 1)
+
+    def test_released_nonces_fill_gaps(self):
+        """A nonce whose transaction was never sent is reused before new ones"""
+        first, second, third = [self.manager.reserve(self.web3, SENDER) for _ in range(3)]
+        self.manager.release(SENDER, second)
+        self.assertEqual(self.manager.reserve(self.web3, SENDER), second)
+        self.manager.release(SENDER, third)
+        self.assertEqual(self.manager.reserve(self.web3, SENDER), third)
+        self.assertEqual(self.manager.reserve(self.web3, SENDER), third + 1)
+
+    def test_idle_account_resyncs_from_node(self):
+        """After the idle window the node's pending count wins, dropping lost transactions"""
+        for _ in range(3):
+            self.manager.reserve(self.web3, SENDER)
+        SenderNonce.objects.filter(account=SENDER).update(synced_at=None)
+        self.provider.responses['eth_getTransactionCount'] = '0x6'
+        self.assertEqual(self.manager.reserve(self.web3, SENDER), 6)
+
+    def test_resync_resets_counter(self):
+        self.manager.reserve(self.web3, SENDER)
+        self.provider.responses['eth_getTransactionCount'] = '0x9'
+        self.manager.resync(self.web3, SENDER)
+        self.assertEqual(self.manager.reserve(self.web3, SENDER), 9)
+
+
+class NonceManagerConcurrencyTests(TransactionTestCase):
+    def test_threads_never_share_a_nonce(self):
+        web3 = Web3(StubProvider({'eth_getTransactionCount': '0x0'}))
+        manager = NonceManager(resync_after=60)
+        nonces = []
+
+        def reserve():
+            try:
+                for _ in range(5):
+                    nonces.append(manager.reserve(web3, SENDER))
+            finally:
+                close_old_connections()
+
+        threads = [threading.Thread(target=reserve) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(nonces), list(range(40)))
+
+
+SENDER_KEYS = ['0x' + '%064x' % (i + 1) for i in range(3)]
+
+
+class SenderPoolTests(TestCase):
+    def setUp(self):
+        self.pool = SenderPool(private_keys=SENDER_KEYS)
+        self.web3 = Web3(StubProvider({'eth_sendRawTransaction': '0x' + 'ab' * 32}))
+
+    def test_routes_to_least_loaded_account(self):
+        """Transactions are spread evenly while none have been mined"""
+        accounts = [self.pool.acquire(self.web3) for _ in range(6)]
+        self.assertEqual(len(set(accounts)), 3)
+        for account in set(accounts):
+            self.assertEqual(accounts.count(account), 2)
+
+    def test_mined_transactions_free_their_account(self):
+        first = self.pool.acquire(self.web3)
+        second = self.pool.acquire(self.web3)
+        self.pool.record(first, '0x' + '01' * 32)
+        self.pool.record(second, '0x' + '02' * 32)
+        self.pool.acquire(self.web3)
+        self.pool.complete(['0x' + '01' * 32])
+        self.assertEqual(self.pool.acquire(self.web3), first)
+        self.assertEqual(self.pool.stats()['accounts'][second]['in_flight'], 1)
+
+    def test_stale_transactions_expire(self):
+        self.pool.pending_timeout = 0.01
+        account = self.pool.acquire(self.web3)
+        self.pool.record(account, '0x' + '01' * 32)
+        time.sleep(0.02)
+        self.pool.acquire(self.web3)
+        self.assertEqual(self.pool.stats()['pending_transactions'], 0)
+
+    def test_local_accounts_sign_offline(self):
+        """Key-backed senders submit signed raw transactions"""
+        account = self.pool.acquire(self.web3)
+
+        class ContractCall:
+            def build_transaction(self, transaction):
+                return dict(transaction, to=CONTRACT_ADDRESS, data='0x', gas=100000,
+                            gasPrice=1, chainId=1337, value=0)
+
+        tx_hash = self.pool.send(self.web3, ContractCall(), account, nonce=0)
+        self.assertEqual(Web3.to_hex(tx_hash), '0x' + 'ab' * 32)
+        self.assertIn('eth_sendRawTransaction', self.web3.provider.calls)
+
+
+class GasEstimatingContract:
+    """
+    Contract stand-in whose issueCertificates gas grows with the batch size.
+    Like a real node, estimate_gas raises when the call needs more than gas_cap.
+    """
+
+    def __init__(self, base=50000, per_record=100000, gas_cap=None):
+        self.estimates = []
+        contract = self
+
+        def estimate_gas(count):
+            contract.estimates.append(count)
+            estimate = base + per_record * count
+            if gas_cap is not None and estimate > gas_cap:
+                raise ValueError({'code': -32000, 'message': f'gas required exceeds allowance ({gas_cap})'})
+            return estimate
+
+        class Functions:
+            def issueCertificates(self, names, courses, institutions, dates):
+                return SimpleNamespace(estimate_gas=lambda tx: estimate_gas(len(names)))
+
+        self.functions = Functions()
+
+
+def bulk_records(count):
+    return [{'student_name': f'Student {i}', 'course': 'Computer Science',
+             'institution': 'Test University', 'issue_date': 1700000000} for i in range(count)]
+
+
+class BulkIssuanceTests(TestCase):
+    def test_batches_fit_gas_target(self):
+        """Batches are sized from gas estimates and never exceed the target"""
+        contract = GasEstimatingContract()
+        records = bulk_records(95)
+        batches = split_issue_batches(contract, records, SENDER, gas_target=1000000, max_batch=50)
+
+        self.assertEqual(sum(len(batch) for batch in batches), 95)
+        self.assertTrue(all(50000 + 100000 * len(batch) <= 1000000 for batch in batches))
+        self.assertEqual(len(batches[0]), 9)
+        self.assertEqual(len(batches), 11)
+        self.assertEqual(contract.estimates[0], 8)
+
+    def test_batches_split_when_estimate_exceeds_block_limit(self):
+        """A batch the node refuses to estimate is halved until it fits"""
+        contract = GasEstimatingContract(per_record=120000, gas_cap=30000000)
+        records = bulk_records(1200)
+        # A gas target above what the node allows, as with a misconfigured BLOCKCHAIN_BULK_ISSUE_GAS_TARGET
+        batches = split_issue_batches(contract, records, SENDER, gas_target=60000000, max_batch=500)
+
+        self.assertEqual(sum(len(batch) for batch in batches), 1200)
+        self.assertTrue(all(50000 + 120000 * len(batch) <= 30000000 for batch in batches))
+        self.assertIn(475, contract.estimates)
+        self.assertEqual(len(batches[0]), 237)
+
+        with self.assertRaises(ValueError):
+            split_issue_batches(GasEstimatingContract(gas_cap=100000), records, SENDER, gas_target=60000000)
+
+    def test_events_map_back_to_records(self):
+        """Records are reported issued, already_exists or failed from their batch receipts"""
+        records = bulk_records(4) + bulk_records(1)
+        hashes = [compute_certificate_hash(r['student_name'], r['course'], r['institution'], r['issue_date'])
+                  for r in records]
+        event_logs = [{'args': {'certHash': bytes.fromhex(hashes[0][2:])}}]
+        contract = SimpleNamespace(events=SimpleNamespace(
+            CertificateIssued=lambda: SimpleNamespace(process_receipt=lambda receipt, errors: event_logs)))
+
+        def submit(unique):
+            self.assertEqual(len(unique), 4)
+            return [(unique[:2], '0xaa'), (unique[2:], '0xbb')]
+
+        receipts = {'0xaa': SimpleNamespace(status=1), '0xbb': SimpleNamespace(status=0)}
+        with patch('certificates.blockchain.is_test_mode', return_value=False), \
+                patch('certificates.blockchain.get_web3'), \
+                patch('certificates.blockchain.get_current_contract', return_value=contract), \
+                patch('certificates.blockchain.submit_certificates_bulk', side_effect=submit), \
+                patch('certificates.blockchain.wait_for_receipt', side_effect=lambda w3, tx: receipts[tx]):
+            results = issue_certificates_bulk(records)
+
+        self.assertEqual([r['status'] for r in results],
+                         ['issued', 'already_exists', 'failed', 'failed', 'issued'])
+        self.assertEqual(results[1]['transaction_hash'], '0xaa')
+        self.assertEqual(results[4]['cert_hash'], hashes[0])
+
+
+FOUND = (True, 'Alice', 'CS', 'Uni', 1735689600)
+SCOPE = (1337, CONTRACT_ADDRESS)
+
+
+class VerificationCacheTests(TestCase):
+    def setUp(self):
+        verification_cache.clear()
+        self.addCleanup(verification_cache.clear)
+        self.scope_patcher = patch.object(VerificationCache, 'scope', return_value=SCOPE)
+        self.scope_mock = self.scope_patcher.start()
+        self.addCleanup(self.scope_patcher.stop)
+
+    @patch('certificates.blockchain.fetch_certificate_from_chain', return_value=FOUND)
+    def test_repeat_verifications_skip_the_node(self, fetch_mock):
+        for _ in range(5):
+            self.assertEqual(verify_certificate_on_chain('0x' + '01' * 32), FOUND)
+        self.assertEqual(verify_certificate_on_chain('01' * 32), FOUND)
+        fetch_mock.assert_called_once()
+
+    @patch('certificates.blockchain.fetch_certificate_from_chain',
+           side_effect=SmartContractError('Certificate not found on blockchain'))
+    def test_not_found_is_not_cached(self, fetch_mock):
+        for _ in range(2):
+            with self.assertRaises(SmartContractError):
+                verify_certificate_on_chain('0x' + '02' * 32)
+        self.assertEqual(fetch_mock.call_count, 2)
+
+    @patch('certificates.blockchain.fetch_certificate_from_chain', return_value=FOUND)
+    def test_revocation_events_invalidate(self, fetch_mock):
+        from certificates.indexer import apply_certificate_events
+
+        verify_certificate_on_chain('0x' + '03' * 32)
+        event = {'event': 'CertificateRevoked', 'args': {'certHash': bytes.fromhex('03' * 32)},
+                 'blockNumber': 1, 'logIndex': 0}
+        apply_certificate_events([event], block_times={})
+        verify_certificate_on_chain('0x' + '03' * 32)
+        self.assertEqual(fetch_mock.call_count, 2)
+
+    def test_lru_and_ttl_bounds(self):
+        cache = VerificationCache(max_entries=2, ttl=60)
+        for index in range(3):
+            cache.set('0x%064x' % index, FOUND)
+        self.assertIsNone(cache.get('0x%064x' % 0))
+        self.assertEqual(cache.get('0x%064x' % 2), FOUND)
+
+        cache = VerificationCache(max_entries=2, ttl=0)
+        cache.set('0x' + '04' * 32, FOUND)
+        self.assertIsNone(cache.get('0x' + '04' * 32))
+
+    def test_entries_are_scoped_to_chain_and_resolved_contract(self):
+        """A result cached for one network or deployment is not served for another"""
+        cache = VerificationCache(ttl=60)
+        cache.set('0x' + '06' * 32, FOUND)
+        self.scope_mock.return_value = (1, CONTRACT_ADDRESS)
+        self.assertIsNone(cache.get('0x' + '06' * 32))
+        self.scope_mock.return_value = (1337, '0x' + '00' * 20)
+        self.assertIsNone(cache.get('0x' + '06' * 32))
+        self.scope_mock.return_value = (1337, CONTRACT_ADDRESS.lower())
+        self.assertEqual(cache.get('06' * 32), FOUND)
+
+    def test_scope_survives_node_outage(self):
+        """The contract last resolved keeps answering while the node is down, until the setting changes"""
+        self.scope_patcher.stop()
+        cache = VerificationCache(ttl=60)
+        with patch('certificates.blockchain.contract_registry.scope', return_value=SCOPE), \
+                patch('certificates.blockchain.get_web3_or_none', return_value=object()):
+            cache.set('0x' + '07' * 32, FOUND)
+        with patch('certificates.blockchain.get_web3_or_none', return_value=None):
+            self.assertEqual(cache.get('0x' + '07' * 32), FOUND)
+            with override_settings(CONTRACT_ADDRESS='0x' + '00' * 20):
+                self.assertIsNone(cache.get('0x' + '07' * 32))
+        self.scope_patcher.start()
+
+    def test_shared_tier_fills_other_workers(self):
+        first = VerificationCache(ttl=60, shared_ttl=60)
+        second = VerificationCache(ttl=60, shared_ttl=60)
+        first.set('0x' + '05' * 32, FOUND)
+        self.assertEqual(second.get('0x' + '05' * 32), FOUND)
+        self.assertEqual(second.stats()['shared_hits'], 1)
+
+        first.invalidate('0x' + '05' * 32)
+        second.clear()
+        self.assertIsNone(second.get('0x' + '05' * 32))
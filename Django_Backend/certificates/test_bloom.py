@@ -0,0 +1,143 @@
+"""
+Test the known-hash Bloom filter
+Run with: python manage.py test certificates.test_bloom
+"""
+
+import time
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from certificates.bloom import BloomFilter, KnownHashFilter, known_hashes
+from certificates.models import Certificate
+
+
+def make_certificate(index):
+    return Certificate.objects.create(
+        student_name=f'Student {index}', course='CS', institution='Uni',
+        issue_date='2025-01-01T00:00:00Z', cert_hash='0x%064x' % index)
+
+
+class BloomFilterTests(TestCase):
+    def test_no_false_negatives_and_bounded_false_positives(self):
+        bloom = BloomFilter(10000, 0.01)
+        for index in range(10000):
+            bloom.add(index.to_bytes(32, 'big'))
+        self.assertTrue(all(index.to_bytes(32, 'big') in bloom for index in range(10000)))
+        false_positives = sum((index + 10 ** 6).to_bytes(32, 'big') in bloom for index in range(10000))
+        self.assertLess(false_positives, 200)
+        self.assertAlmostEqual(bloom.estimated_false_positive_rate(), 0.01, delta=0.005)
+
+
+class KnownHashFilterTests(TestCase):
+    def test_built_from_database_and_updated_on_save(self):
+        make_certificate(1)
+        known = KnownHashFilter(capacity=100, refresh_interval=3600)
+        # Until the background build finishes nothing is turned away
+        self.assertTrue(known.might_contain('0x%064x' % 2))
+        known.build()
+        self.assertTrue(known.might_contain('0x%064x' % 1))
+        self.assertFalse(known.might_contain('0x%064x' % 2))
+
+        known.add('0x%064x' % 2)
+        self.assertTrue(known.might_contain('%064x' % 2))
+        self.assertFalse(known.might_contain('not-a-hash'))
+        self.assertEqual(known.stats()['rejected'], 2)
+
+    def test_refresh_picks_up_rows_from_other_processes(self):
+        known = KnownHashFilter(capacity=100, refresh_interval=0)
+        make_certificate(1)
+        known.build()
+        with patch('certificates.signals.known_hashes'):
+            make_certificate(3)
+        # Not in the filter yet, but created since its last scan
+        self.assertTrue(known.might_contain('0x%064x' % 3))
+        self.assertEqual(known.stats()['recent_lookups'], 1)
+        known.refresh()
+        self.assertTrue(known.might_contain('0x%064x' % 3))
+        self.assertEqual(known.stats()['recent_lookups'], 1)
+
+    def test_refresh_finds_rows_committed_out_of_id_order(self):
+        """A row whose lower id becomes visible after a higher one is still picked up"""
+        known = KnownHashFilter(capacity=100, refresh_interval=0)
+        with patch('certificates.signals.known_hashes'):
+            Certificate.objects.create(id=10, student_name='Late', course='CS', institution='Uni',
+                                       issue_date='2025-01-01T00:00:00Z', cert_hash='0x%064x' % 10)
+            known.build()
+            # Committed by a transaction that got its id before id 10 did
+            Certificate.objects.create(id=5, student_name='Early', course='CS', institution='Uni',
+                                       issue_date='2025-01-01T00:00:00Z', cert_hash='0x%064x' % 5)
+        known.refresh()
+        self.assertTrue(known.might_contain('0x%064x' % 5))
+        self.assertEqual(known.stats()['hashes'], 2)
+
+        # Once rows have settled they are not scanned again
+        known.settle_seconds = 0
+        known.refresh()
+        known.refresh()
+        self.assertEqual(known.stats()['settled_id'], 10)
+
+    def test_grows_past_capacity(self):
+        known = KnownHashFilter(capacity=4, refresh_interval=3600)
+        known.build()
+        for index in range(10):
+            make_certificate(index + 1)
+            known.add('0x%064x' % (index + 1))
+        # The background thread grows the filter; until then it only gives more false positives
+        self.assertTrue(all(known.might_contain('0x%064x' % (index + 1)) for index in range(10)))
+        known.maintain()
+        self.assertGreater(known.stats()['capacity'], 4)
+        self.assertTrue(all(known.might_contain('0x%064x' % (index + 1)) for index in range(10)))
+
+    def test_old_rows_missing_from_the_filter_are_not_looked_up(self):
+        """Only rows created since the filter's last scan, less the settle window, are checked"""
+        known = KnownHashFilter(capacity=100, refresh_interval=3600, settle_seconds=0)
+        known.build()
+        with patch('certificates.signals.known_hashes'):
+            make_certificate(7)
+        self.assertTrue(known.might_contain('0x%064x' % 7))
+        Certificate.objects.filter(cert_hash='0x%064x' % 7).update(
+            created_at=timezone.now() - timedelta(minutes=5))
+        self.assertFalse(known.might_contain('0x%064x' % 7))
+
+
+class VerifyFastPathTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        known_hashes.reset()
+        self.addCleanup(known_hashes.reset)
+
+    def test_unknown_hash_is_rejected_without_a_lookup(self):
+        make_certificate(1)
+        known_hashes.build()
+        with patch('certificates.views.Certificate.objects.get') as get_mock:
+            response = self.client.get(reverse('verify_certificate', args=['%064x' % 999]))
+        self.assertEqual(response.status_code, 404)
+        get_mock.assert_not_called()
+
+    def test_malformed_hash_is_a_bad_request(self):
+        response = self.client.get(reverse('verify_certificate', args=['0x1234']))
+        self.assertEqual(response.status_code, 400)
+
+
+class BackgroundRefreshTests(TransactionTestCase):
+    def test_thread_builds_and_refreshes_off_the_request_path(self):
+        """might_contain starts the thread and answers without waiting for the build"""
+        make_certificate(1)
+        known = KnownHashFilter(capacity=100, refresh_interval=0.05)
+        self.addCleanup(known.stop)
+        with patch('certificates.blockchain.is_test_mode', return_value=False), \
+                patch.object(KnownHashFilter, 'build', wraps=known.build) as build_mock:
+            self.assertTrue(known.might_contain('0x%064x' % 1))
+            with patch('certificates.signals.known_hashes'):
+                make_certificate(2)
+            deadline = time.monotonic() + 5
+            while known.stats()['hashes'] < 2 and time.monotonic() < deadline:
+                time.sleep(0.05)
+        self.assertEqual(known.stats()['hashes'], 2)
+        self.assertTrue(known.stats()['refreshing'])
+        self.assertEqual(build_mock.call_count, 1)
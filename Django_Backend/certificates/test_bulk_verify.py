@@ -0,0 +1,156 @@
+"""
+Test streaming CSV bulk verification
+Run with: python manage.py test certificates.test_bulk_verify
+"""
+
+import csv
+import io
+import json
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest.mock import patch
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from web3 import Web3
+
+from certificates.blockchain import compute_certificate_hash
+from certificates.bulk_verify import BulkVerification
+from certificates.models import Certificate
+from certificates.verification import (
+    find_certificate_by_details,
+    find_certificates_by_details,
+    issue_date_candidates,
+)
+
+ISSUED = datetime(2025, 3, 1, tzinfo=dt_timezone.utc)
+# Local midnight in Nairobi (UTC+3)
+NAIROBI_MIDNIGHT = ISSUED - timedelta(hours=3)
+
+
+def make_certificate(student_name, issue_date=ISSUED, **extra):
+    timestamp = int(issue_date.timestamp())
+    return Certificate.objects.create(
+        student_name=student_name, course='Computer Science', institution='Tech University', issue_date=issue_date,
+        cert_hash=compute_certificate_hash(student_name, 'Computer Science', 'Tech University', timestamp), **extra)
+
+
+def chain_results(cert_hashes):
+    return {cert_hash: ((True, '', '', '', 0), None) for cert_hash in cert_hashes}
+
+
+def upload(text):
+    return SimpleUploadedFile('claims.csv', text.encode('utf-8'), content_type='text/csv')
+
+
+@patch('certificates.verification.verify_certificates_on_chain', side_effect=chain_results)
+class BulkVerificationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('verify_certificates_bulk')
+        self.alice = make_certificate('Alice')
+        self.bob = make_certificate('Bob', is_revoked=True)
+        self.carol = make_certificate('Carol', issue_date=NAIROBI_MIDNIGHT)
+
+    def post(self, text, **params):
+        url = self.url + ('?' + '&'.join(f'{key}={value}' for key, value in params.items()) if params else '')
+        response = self.client.post(url, {'file': upload(text)}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_hash_rows(self, chain_mock):
+        text = 'Certificate Hash\n%s\n\n%s\n%s\nnot-a-hash\n' % (
+            self.alice.cert_hash.upper(), self.bob.cert_hash, '0x' + 'ab' * 32)
+        lines = [json.loads(line) for line in self.post(text).splitlines()]
+        results = [line for line in lines if 'row' in line]
+
+        self.assertEqual([(result['row'], result['status']) for result in results],
+                         [(2, 'valid'), (4, 'revoked'), (5, 'not_found'), (6, 'error')])
+        self.assertEqual(results[0]['cert_hash'], self.alice.cert_hash)
+        self.assertEqual(results[0]['certificate_id'], self.alice.id)
+        self.assertTrue(results[0]['is_valid'])
+        self.assertFalse(results[1]['is_valid'])
+        self.assertIn('Invalid certificate hash', results[3]['error'])
+        self.assertEqual(lines[-1]['summary']['rows'], 4)
+        self.assertEqual(lines[-1]['summary']['valid'], 1)
+        self.assertFalse(lines[-1]['summary']['truncated'])
+        chain_mock.assert_called_once()
+
+    def test_detail_rows_match_single_lookup(self, chain_mock):
+        text = ('student_name,course,institution,issue_date,timezone\n'
+                'Alice,Computer Science,Tech University,2025-03-01,\n'
+                'Carol,Computer Science,Tech University,2025-03-01,\n'
+                'Carol,Computer Science,Tech University,2025-03-01,Africa/Nairobi\n'
+                'Carol,Computer Science,Tech University,2025-03-01,Europe/London\n'
+                'Dave,Computer Science,Tech University,2025-03-01,\n'
+                'Alice,Computer Science,Tech University,01/03/2025,\n'
+                'Alice,Computer Science,Tech University,2025-03-01,Mars/Olympus\n')
+        rows = list(csv.DictReader(io.StringIO(self.post(text, output='csv'))))
+
+        self.assertEqual([row['status'] for row in rows],
+                         ['valid', 'valid', 'valid', 'not_found', 'not_found', 'error', 'error'])
+        self.assertEqual(rows[1]['cert_hash'], self.carol.cert_hash)
+        self.assertEqual(rows[1]['matched_timestamp'], str(int(NAIROBI_MIDNIGHT.timestamp())))
+        self.assertEqual(rows[0]['issue_date'], '2025-03-01T00:00:00Z')
+
+        entries = [(name, 'Computer Science', 'Tech University', issue_date_candidates(ISSUED.date()))
+                   for name in ('Alice', 'Carol', 'Dave')]
+        self.assertEqual(find_certificates_by_details(entries),
+                         [find_certificate_by_details(*entry) for entry in entries])
+
+    def test_hash_timestamp_differs_from_stored_issue_date(self, chain_mock):
+        """issueDateTimestamp can be local midnight while issue_date is stored as UTC midnight"""
+        kolkata_midnight = int((ISSUED - timedelta(hours=5, minutes=30)).timestamp())
+        dana = Certificate.objects.create(
+            student_name='Dana', course='Computer Science', institution='Tech University', issue_date=ISSUED,
+            cert_hash=compute_certificate_hash('Dana', 'Computer Science', 'Tech University', kolkata_midnight))
+        entry = ('Dana', 'Computer Science', 'Tech University', issue_date_candidates(ISSUED.date()))
+
+        self.assertEqual(find_certificate_by_details(*entry), (dana, kolkata_midnight))
+        self.assertEqual(find_certificates_by_details([entry]), [(dana, kolkata_midnight)])
+        rows = list(csv.DictReader(io.StringIO(self.post(
+            'student_name,course,institution,issue_date\nDana,Computer Science,Tech University,2025-03-01\n',
+            output='csv'))))
+        self.assertEqual((rows[0]['status'], rows[0]['matched_timestamp']), ('valid', str(kolkata_midnight)))
+
+    def test_request_body_chunks_and_row_limit(self, chain_mock):
+        text = 'hash\n' + '\n'.join([self.alice.cert_hash, self.bob.cert_hash, self.carol.cert_hash] * 2) + '\n'
+        verification = BulkVerification(io.BytesIO(text.encode()), chunk_size=2, max_rows=5)
+        lines = [json.loads(line) for line in b''.join(verification).decode().splitlines()]
+
+        self.assertEqual([line['progress']['rows'] for line in lines if 'progress' in line], [2, 4, 5])
+        results = [line for line in lines if 'row' in line]
+        self.assertEqual(len(results), 6)
+        self.assertEqual(results[-1]['error'], 'Row limit of 5 reached; the rest of the file was not read')
+        self.assertTrue(lines[-1]['summary']['truncated'])
+
+        response = self.client.generic('POST', self.url, text.encode(), content_type='text/csv')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(json.loads(b''.join(response.streaming_content).splitlines()[-1])['summary']['valid'], 4)
+
+    def test_request_body_is_spooled_before_streaming(self, chain_mock):
+        """A text/csv body is read in full by the view and closed with the response"""
+        text = 'hash\n' + self.alice.cert_hash + '\n'
+        with patch('certificates.views.BulkVerification', wraps=BulkVerification) as verification_mock:
+            response = self.client.generic('POST', self.url, text.encode(), content_type='text/csv')
+        body = verification_mock.call_args[0][0]
+        self.assertIsInstance(body, tempfile.SpooledTemporaryFile)
+        self.assertEqual(json.loads(b''.join(response.streaming_content).splitlines()[-1])['summary']['valid'], 1)
+        response.close()
+        self.assertTrue(body.closed)
+
+    def test_rejected_uploads(self, chain_mock):
+        for params, data in (({}, {}),
+                             ({}, {'file': upload('')}),
+                             ({}, {'file': upload('student_name,course\nAlice,CS\n')}),
+                             ({'output': 'xml'}, {'file': upload('cert_hash\n')})):
+            url = self.url + ('?output=%s' % params['output'] if params else '')
+            response = self.client.post(url, data, format='multipart')
+            self.assertEqual(response.status_code, 400)
+
+    def test_fast_hash_matches_solidity_keccak(self, chain_mock):
+        for values in (('Zoë Kariuki', 'Ingeniería', '東京大学', 1740787200), ('', '', '', 0)):
+            self.assertEqual(compute_certificate_hash(*values), Web3.to_hex(
+                Web3.solidity_keccak(['string', 'string', 'string', 'uint256'], list(values))))
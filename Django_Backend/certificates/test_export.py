@@ -0,0 +1,101 @@
+"""
+Test the streaming certificate registry export
+Run with: python manage.py test certificates.test_export
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.http import StreamingHttpResponse
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from certificates.export import EXPORT_FIELDS, CertificateExport
+from certificates.indexer import CHECKPOINT_NAME
+from certificates.models import Certificate, ChainCheckpoint
+from certificates.serializers import CertificateRowSerializer
+
+
+def make_certificate(index, **extra):
+    return Certificate.objects.create(
+        student_name=f'Stüdent {index}', course='Law, "Intro"', institution='Uni' if index % 2 else 'College',
+        issue_date='2025-01-%02dT00:00:00Z' % (index % 28 + 1), cert_hash='0x%064x' % index, **extra)
+
+
+class CertificateExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.certificates = [make_certificate(index, block_number=100 + index) for index in range(1, 8)]
+        self.url = reverse('export_certificates')
+
+    def ndjson(self, response):
+        self.assertIsInstance(response, StreamingHttpResponse)
+        return [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+
+    def test_ndjson_matches_row_serializer(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertIn('.ndjson"', response['Content-Disposition'])
+        rows = self.ndjson(response)
+
+        expected = CertificateRowSerializer(response.wsgi_request, EXPORT_FIELDS).serialize(
+            CertificateRowSerializer(None, EXPORT_FIELDS).values(Certificate.objects.order_by('id')))
+        self.assertEqual(rows, expected)
+        self.assertEqual(list(rows[0]), list(EXPORT_FIELDS))
+
+    def test_csv_gzip_with_filters(self):
+        response = self.client.get(self.url, {'output': 'csv', 'gzip': 'true', 'institution': 'Uni'})
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertTrue(response['Content-Disposition'].endswith('.csv.gz"'))
+        text = gzip.decompress(b''.join(response.streaming_content)).decode('utf-8')
+        rows = list(csv.DictReader(io.StringIO(text)))
+
+        self.assertEqual([int(row['id']) for row in rows],
+                         [certificate.id for certificate in self.certificates if certificate.institution == 'Uni'])
+        self.assertEqual(rows[0]['course'], 'Law, "Intro"')
+        self.assertEqual(rows[0]['student_name'], 'Stüdent 1')
+        self.assertEqual(rows[0]['is_revoked'], 'false')
+        self.assertEqual(rows[0]['revocation_timestamp'], '')
+
+    def test_resume_after_id_and_fixed_end(self):
+        export = CertificateExport(after_id=self.certificates[3].id, fields=['cert_hash'])
+        # Created after the export started, so left for the next run
+        make_certificate(99)
+        rows = [json.loads(line) for line in b''.join(export).decode().splitlines()]
+        self.assertEqual([row['id'] for row in rows], [certificate.id for certificate in self.certificates[4:]])
+        self.assertEqual(list(rows[0]), ['id', 'cert_hash'])
+        self.assertEqual(export.rows_written, 3)
+
+        response = self.client.get(self.url, {'after_id': self.certificates[-1].id})
+        self.assertEqual(response['X-Export-Last-Id'], str(Certificate.objects.latest('id').id))
+        self.assertEqual([row['student_name'] for row in self.ndjson(response)], ['Stüdent 99'])
+
+    def test_chain_columns_from_local_index(self):
+        ChainCheckpoint.objects.create(name=CHECKPOINT_NAME, last_block=104)
+        rows = self.ndjson(self.client.get(self.url, {'chain': 'true', 'fields': 'cert_hash'}))
+        self.assertEqual(list(rows[0]), ['id', 'cert_hash', 'chain_status', 'blockchain_verified',
+                                         'blockchain_timestamp', 'transaction_hash', 'block_number',
+                                         'block_hash', 'merkle_root', 'indexed'])
+        self.assertEqual([row['indexed'] for row in rows], [True] * 4 + [False] * 3)
+
+    def test_invalid_parameters(self):
+        for params in ({'output': 'xml'}, {'after_id': 'x'}, {'after_id': '-1'}, {'fields': 'nope'},
+                       {'gzip': 'maybe'}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 400, params)
+
+    def test_management_command(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'registry.ndjson.gz')
+            call_command('export_certificates', output=path, fields='cert_hash', stderr=io.StringIO())
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                rows = [json.loads(line) for line in f]
+        self.assertEqual([row['cert_hash'] for row in rows],
+                         [certificate.cert_hash for certificate in self.certificates])
@@ -0,0 +1,219 @@
+"""
+Test the contract event indexer
+Run with: python manage.py test certificates.test_indexer
+"""
+
+import json
+import os
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from eth_abi import encode as abi_encode
+from web3 import Web3
+from web3.providers.base import BaseProvider
+
+from certificates.indexer import BlockWindow, backfill, get_event_topics, index_once
+from certificates.models import Certificate, ChainCheckpoint
+from certificates.verification import verify_certificate_record
+
+ABI_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'contract_abi.json')
+CONTRACT_ADDRESS = '0xe78A0F7E598Cc8b0Bb87894B0F60dD2a88d6a8Ab'
+
+
+class LogsProvider(BaseProvider):
+    """Serves eth_getLogs from a list of raw logs, honouring the block range"""
+
+    def __init__(self, logs, head, max_range=None):
+        super().__init__()
+        self.logs = logs
+        self.head = head
+        self.max_range = max_range
+        self.ranges = []
+
+    def make_request(self, method, params):
+        if method == 'eth_blockNumber':
+            result = hex(self.head)
+        elif method == 'eth_getLogs':
+            from_block, to_block = int(params[0]['fromBlock'], 16), int(params[0]['toBlock'], 16)
+            self.ranges.append((from_block, to_block))
+            if self.max_range and to_block - from_block + 1 > self.max_range:
+                return {'jsonrpc': '2.0', 'id': 1,
+                        'error': {'code': -32005, 'message': f'block range too large, limit is {self.max_range}'}}
+            result = [log for log in self.logs if from_block <= int(log['blockNumber'], 16) <= to_block]
+        else:
+            result = '0x539'
+        return {'jsonrpc': '2.0', 'id': 1, 'result': result}
+
+    def is_connected(self, show_traceback=False):
+        return True
+
+
+def block_headers(block_numbers):
+    """Canonical headers matching the block hashes used in the test logs"""
+    return {number: {'hash': '0x%064x' % number, 'timestamp': 1735689600 + number} for number in block_numbers}
+
+
+def make_contract(provider):
+    with open(ABI_PATH) as f:
+        abi = json.load(f)['abi']
+    return Web3(provider).eth.contract(address=CONTRACT_ADDRESS, abi=abi)
+
+
+class IndexerTestMixin:
+    """Points the indexer at a LogsProvider-backed contract"""
+
+    head = 250
+    max_range = None
+
+    def setUp(self):
+        self.logs = []
+        self.provider = LogsProvider(self.logs, head=self.head, max_range=self.max_range)
+        self.contract = make_contract(self.provider)
+        self.topics = {name: topic for topic, name in get_event_topics(self.contract).items()}
+        patcher_web3 = patch('certificates.indexer.get_web3', return_value=self.contract.w3)
+        patcher_contract = patch('certificates.indexer.get_current_contract', return_value=self.contract)
+        patcher_headers = patch('certificates.indexer.get_block_headers', side_effect=block_headers)
+        for patcher in (patcher_web3, patcher_contract, patcher_headers):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def add_log(self, name, cert_hash, block, data=b''):
+        self.logs.append({
+            'address': CONTRACT_ADDRESS,
+            'topics': [self.topics[name], cert_hash],
+            'data': Web3.to_hex(data),
+            'blockNumber': hex(block),
+            'blockHash': '0x' + '%064x' % block,
+            'transactionHash': '0x' + '%064x' % (block + 10000),
+            'transactionIndex': '0x0',
+            'logIndex': hex(len(self.logs)),
+            'removed': False,
+        })
+
+    def add_issued(self, cert_hash, block, name='Alice'):
+        data = abi_encode(['string', 'string', 'string', 'uint256'], [name, 'CS', 'Uni', 1735689600])
+        self.add_log('CertificateIssued', cert_hash, block, data)
+
+
+class EventIndexerTests(IndexerTestMixin, TestCase):
+    def test_events_update_and_create_rows(self):
+        """Known rows are confirmed and certificates issued elsewhere are created"""
+        known = Certificate.objects.create(
+            student_name='Alice', course='CS', institution='Uni', issue_date='2025-01-01T00:00:00Z',
+            cert_hash='0x' + '01' * 32, chain_status='pending')
+        self.add_issued(known.cert_hash, 10)
+        self.add_issued('0x' + '02' * 32, 120, name='Bob')
+        self.add_log('CertificateRevoked', '0x' + '02' * 32, 200)
+
+        applied, last_block = index_once(block_range=100)
+
+        self.assertEqual((applied, last_block), (3, 250))
+        # The window doubles after the first near-empty response
+        self.assertEqual(self.provider.ranges, [(0, 99), (100, 250)])
+        known.refresh_from_db()
+        self.assertTrue(known.blockchain_verified)
+        self.assertEqual(known.chain_status, 'confirmed')
+        self.assertEqual((known.block_number, known.block_hash), (10, '0x%064x' % 10))
+        self.assertEqual(int(known.blockchain_timestamp.timestamp()), 1735689600 + 10)
+        created = Certificate.objects.get(cert_hash='0x' + '02' * 32)
+        self.assertEqual(created.student_name, 'Bob')
+        self.assertTrue(created.is_revoked)
+        self.assertEqual((created.revocation_status, created.revocation_block_number), ('confirmed', 200))
+
+    def test_revoke_events_only_apply_to_their_kind_of_certificate(self):
+        """AnchoredCertificateRevoked revokes anchored rows only, CertificateRevoked individually issued ones"""
+        anchored = Certificate.objects.create(
+            student_name='Alice', course='CS', institution='Uni', issue_date='2025-01-01T00:00:00Z',
+            cert_hash='0x' + '03' * 32, chain_status='confirmed', merkle_root='0x' + 'ee' * 32)
+        individual = Certificate.objects.create(
+            student_name='Bob', course='CS', institution='Uni', issue_date='2025-01-01T00:00:00Z',
+            cert_hash='0x' + '04' * 32, chain_status='confirmed')
+        self.add_log('CertificateRevoked', anchored.cert_hash, 10)
+        self.add_log('AnchoredCertificateRevoked', individual.cert_hash, 11)
+        index_once(block_range=100)
+        anchored.refresh_from_db()
+        individual.refresh_from_db()
+        self.assertFalse(anchored.is_revoked)
+        self.assertFalse(individual.is_revoked)
+
+        self.add_log('AnchoredCertificateRevoked', anchored.cert_hash, 260)
+        self.add_log('CertificateRevoked', individual.cert_hash, 261)
+        self.provider.head = 300
+        index_once(block_range=100)
+        anchored.refresh_from_db()
+        individual.refresh_from_db()
+        self.assertEqual((anchored.is_revoked, anchored.revocation_block_number), (True, 260))
+        self.assertEqual((individual.is_revoked, individual.revocation_block_number), (True, 261))
+
+    def test_restart_resumes_from_checkpoint(self):
+        self.add_issued('0x' + '01' * 32, 10)
+        index_once(block_range=100)
+        self.provider.ranges.clear()
+        self.provider.head = 300
+        self.add_issued('0x' + '03' * 32, 280)
+
+        applied, last_block = index_once(block_range=100)
+
+        self.assertEqual((applied, last_block), (1, 300))
+        self.assertEqual(self.provider.ranges, [(251, 300)])
+        self.assertEqual(ChainCheckpoint.objects.get().last_block, 300)
+
+    @patch('certificates.indexer.CONFIRMATION_DEPTH', 12)
+    def test_only_confirmed_blocks_are_indexed(self):
+        self.add_issued('0x' + '01' * 32, 245)
+        applied, last_block = index_once()
+        self.assertEqual((applied, last_block), (0, 239))
+
+    def test_replaying_events_is_idempotent(self):
+        self.add_issued('0x' + '01' * 32, 10)
+        index_once()
+        ChainCheckpoint.objects.update(last_block=-1)
+        index_once()
+        self.assertEqual(Certificate.objects.count(), 1)
+
+    @override_settings(CERTIFICATE_VERIFICATION_SOURCE='index')
+    def test_indexed_rows_verify_without_rpc(self):
+        self.add_issued('0x' + '01' * 32, 10)
+        index_once()
+        certificate = Certificate.objects.get()
+        with patch('certificates.verification.verify_certificate_on_chain') as chain_mock:
+            result = verify_certificate_record(certificate)
+        chain_mock.assert_not_called()
+        self.assertEqual(result[:4], (True, 'Alice', 'CS', 'Uni'))
+
+
+class BlockWindowTests(TestCase):
+    def test_window_adapts_to_responses(self):
+        window = BlockWindow(100, maximum=1000, target_logs=10)
+        window.record_success(100, 0)
+        self.assertEqual(window.size, 200)
+        window.record_success(200, 50)
+        self.assertEqual(window.size, 100)
+        window.record_failure(100)
+        self.assertEqual(window.size, 50)
+        for _ in range(10):
+            window.record_success(window.size, 0)
+        self.assertEqual(window.size, 1000)
+
+
+class BackfillTests(IndexerTestMixin, TestCase):
+    head = 5000
+    max_range = 300
+
+    def test_parallel_backfill_applies_history_in_order(self):
+        """Rejected ranges are split, and events apply in block order despite parallel windows"""
+        for index in range(40):
+            self.add_issued('0x%064x' % (index + 1), block=index * 120 + 5, name=f'Student {index}')
+        self.add_log('CertificateRevoked', '0x%064x' % 1, block=4990)
+        reports = []
+
+        applied, last_block = backfill(block_range=1000, concurrency=4, progress=reports.append)
+
+        self.assertEqual((applied, last_block), (41, 5000))
+        self.assertEqual(Certificate.objects.count(), 40)
+        self.assertTrue(Certificate.objects.get(cert_hash='0x%064x' % 1).is_revoked)
+        self.assertEqual(ChainCheckpoint.objects.get().last_block, 5000)
+        self.assertTrue(any(end - start + 1 > 300 for start, end in self.provider.ranges))
+        self.assertEqual(reports[-1]['blocks_done'], reports[-1]['blocks_total'])
+        self.assertEqual(reports[-1]['eta_seconds'], 0)
+        self.assertEqual([r['last_block'] for r in reports], sorted(r['last_block'] for r in reports))
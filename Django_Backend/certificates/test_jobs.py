@@ -0,0 +1,194 @@
+"""
+Test the database-backed job queue and background issuance
+Run with: python manage.py test certificates.test_jobs
+"""
+
+import hashlib
+from datetime import timedelta
+from unittest.mock import Mock, patch
+
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from certificates.blockchain import SmartContractError
+from certificates.jobs import (
+    JobType,
+    PermanentJobError,
+    WorkerPool,
+    enqueue,
+    job_types,
+    lease_job,
+    queue_stats,
+    retry_delay,
+    run_job,
+)
+from certificates.models import Certificate, Job
+from certificates.tasks import JOB_GENERATE_QR_CODE, JOB_HASH_CERTIFICATE_PDF, JOB_ISSUE_CERTIFICATE
+
+WORKER = 'test-worker'
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        self.handler = Mock()
+        self.on_failure = Mock()
+        self.types = patch.dict(job_types, {
+            'fast': JobType('fast', self.handler, max_attempts=2, on_failure=self.on_failure),
+            'urgent': JobType('urgent', self.handler, priority=5),
+            'limited': JobType('limited', self.handler, concurrency=1),
+        })
+        self.types.start()
+        self.addCleanup(self.types.stop)
+
+    def test_lease_by_priority_then_age(self):
+        first = enqueue('fast', {'n': 1})
+        later = enqueue('fast', {'n': 2}, delay=60)
+        urgent = enqueue('urgent')
+        second = enqueue('fast', {'n': 3})
+
+        leased = [lease_job(WORKER) for _ in range(4)]
+        self.assertEqual(leased[:3], [urgent, first, second])
+        self.assertIsNone(leased[3])
+        self.assertNotIn(later, leased)
+        self.assertEqual(leased[0].status, Job.STATUS_RUNNING)
+        self.assertEqual(leased[0].attempts, 1)
+        self.assertEqual(leased[0].locked_by, WORKER)
+        self.assertIsNone(lease_job(WORKER, types=['urgent']))
+
+    def test_retry_with_backoff_then_on_failure(self):
+        self.handler.side_effect = RuntimeError('node down')
+        job = enqueue('fast', {'n': 1})
+
+        self.assertFalse(run_job(lease_job(WORKER), WORKER))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.last_error), (Job.STATUS_QUEUED, 1, 'node down'))
+        self.assertGreater(job.run_after, timezone.now() + timedelta(seconds=retry_delay(1) - 1))
+        self.assertIsNone(lease_job(WORKER))
+        self.on_failure.assert_not_called()
+
+        Job.objects.filter(id=job.id).update(run_after=timezone.now())
+        self.assertFalse(run_job(lease_job(WORKER), WORKER))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.STATUS_FAILED, 2))
+        self.on_failure.assert_called_once_with({'n': 1}, 'node down')
+        self.assertEqual(queue_stats(), {'fast': {Job.STATUS_FAILED: 1}})
+
+        self.assertEqual(retry_delay(1) * 4, retry_delay(3))
+        self.assertLessEqual(retry_delay(50), 600)
+
+    def test_permanent_error_and_success(self):
+        self.handler.side_effect = [PermanentJobError('reverted'), None]
+        failed, done = enqueue('urgent'), enqueue('urgent')
+
+        self.assertFalse(run_job(lease_job(WORKER), WORKER))
+        self.assertTrue(run_job(lease_job(WORKER), WORKER))
+        failed.refresh_from_db()
+        done.refresh_from_db()
+        self.assertEqual((failed.status, failed.attempts), (Job.STATUS_FAILED, 1))
+        self.assertEqual(done.status, Job.STATUS_SUCCEEDED)
+        self.assertIsNotNone(done.finished_at)
+
+    def test_expired_lease_is_taken_over(self):
+        job = enqueue('fast')
+        leased = lease_job('dead-worker')
+        self.assertIsNone(lease_job(WORKER))
+
+        Job.objects.filter(id=job.id).update(locked_until=timezone.now() - timedelta(seconds=1))
+        retaken = lease_job(WORKER)
+        self.assertEqual(retaken, leased)
+        self.assertEqual((retaken.locked_by, retaken.attempts), (WORKER, 2))
+        # The dead worker can no longer record an outcome
+        run_job(leased, 'dead-worker')
+        retaken.refresh_from_db()
+        self.assertEqual(retaken.status, Job.STATUS_RUNNING)
+
+        # Lost on its last attempt: failed without running the handler again
+        Job.objects.filter(id=job.id).update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertFalse(run_job(lease_job(WORKER), WORKER))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_FAILED)
+        self.assertEqual(self.handler.call_count, 1)
+
+    def test_pool_concurrency_limit_per_type(self):
+        pool = WorkerPool(concurrency=2, types=['limited', 'urgent'])
+        enqueue('limited', {'n': 1})
+        enqueue('limited', {'n': 2})
+        enqueue('urgent', priority=0)
+
+        running = pool.lease('w/0')
+        self.assertEqual(running.job_type, 'limited')
+        self.assertEqual(pool.leasable_types(), ['urgent'])
+        self.assertEqual(pool.lease('w/1').job_type, 'urgent')
+        self.assertIsNone(pool.lease('w/1'))
+
+        pool.release(running, True)
+        self.assertTrue(pool.run_next('w/1'))
+        self.assertEqual(Job.objects.filter(status=Job.STATUS_QUEUED).count(), 0)
+        self.assertEqual(pool.succeeded, 2)
+
+
+class BackgroundIssuanceTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.pool = WorkerPool()
+        patcher = patch('certificates.views.BACKGROUND_JOBS', True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post(self):
+        return self.client.post(reverse('issue_certificate'), {
+            'studentName': 'Alice', 'course': 'Computer Science', 'institution': 'University of Blockchain',
+            'issueDate': '2025-01-01', 'issueDateTimestamp': '1735689600',
+            'certificatePdf': SimpleUploadedFile('certificate.pdf', b'%PDF-1.4', content_type='application/pdf'),
+        }, format='multipart')
+
+    def run_all(self):
+        while self.pool.run_next(WORKER):
+            pass
+
+    @patch('certificates.tasks.generate_qr_code', side_effect=lambda cert_hash: ContentFile(b'png', name='qr.png'))
+    @patch('certificates.tasks.receipt_tracker')
+    @patch('certificates.tasks.submit_certificate')
+    @patch('certificates.views.submit_certificate')
+    def test_issue_is_queued_and_run_by_workers(self, view_submit_mock, submit_mock, tracker_mock, qr_mock):
+        tx_hash = '0x' + 'ab' * 32
+        submit_mock.return_value = {'cert_hash': None, 'ipfs_hash': None, 'transaction_hash': tx_hash}
+        response = self.post()
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], Certificate.CHAIN_STATUS_PENDING)
+        self.assertIsNone(response.data['transaction_hash'])
+        self.assertEqual(set(response.data['jobs']),
+                         {JOB_ISSUE_CERTIFICATE, JOB_GENERATE_QR_CODE, JOB_HASH_CERTIFICATE_PDF})
+        view_submit_mock.assert_not_called()
+
+        self.run_all()
+        certificate = Certificate.objects.get(cert_hash=response.data['cert_hash'])
+        self.assertEqual(certificate.transaction_hash, tx_hash)
+        self.assertTrue(certificate.qr_code)
+        self.assertEqual(certificate.pdf_hash, '0x' + hashlib.sha256(b'%PDF-1.4').hexdigest())
+        submit_mock.assert_called_once_with('Alice', 'Computer Science', 'University of Blockchain', 1735689600)
+        tracker_mock.track.assert_called_once()
+        self.assertEqual(Job.objects.filter(status=Job.STATUS_SUCCEEDED).count(), 3)
+
+        # A rerun (e.g. after a lost lease) does not send a second transaction
+        enqueue(JOB_ISSUE_CERTIFICATE, {'certificate_id': certificate.id, 'issue_date': 1735689600})
+        self.run_all()
+        submit_mock.assert_called_once()
+
+    @patch('certificates.tasks.generate_qr_code', side_effect=lambda cert_hash: ContentFile(b'png', name='qr.png'))
+    @patch('certificates.tasks.submit_certificate', side_effect=SmartContractError(
+        'Smart contract reverted the transaction. Please check your input data.'))
+    def test_reverted_issuance_fails_certificate(self, submit_mock, qr_mock):
+        response = self.post()
+        self.run_all()
+
+        certificate = Certificate.objects.get(cert_hash=response.data['cert_hash'])
+        self.assertEqual(certificate.chain_status, Certificate.CHAIN_STATUS_FAILED)
+        self.assertIn('reverted', certificate.chain_error)
+        submit_mock.assert_called_once()
+        self.assertEqual(Job.objects.get(id=response.data['jobs'][JOB_ISSUE_CERTIFICATE]).status, Job.STATUS_FAILED)
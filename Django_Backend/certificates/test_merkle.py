@@ -0,0 +1,109 @@
+"""
+Test Merkle anchoring
+Run with: python manage.py test certificates.test_merkle
+"""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.utils import timezone
+
+from certificates.anchoring import anchor_pending, claim_batch, release_stale_claims, verify_anchored_certificate
+from certificates.blockchain import SmartContractError
+from certificates.merkle import build_merkle_tree, compute_merkle_root, verify_merkle_proof
+from certificates.models import Certificate
+
+
+def cert_hashes(count):
+    return ['0x%064x' % (i + 1) for i in range(count)]
+
+
+class MerkleTreeTests(TestCase):
+    def test_every_proof_reaches_the_root(self):
+        """Proofs verify for every leaf, including unpaired ones"""
+        for count in (1, 2, 3, 7, 8, 33):
+            hashes = cert_hashes(count)
+            root, proofs = build_merkle_tree(hashes)
+            for cert_hash in hashes:
+                self.assertTrue(verify_merkle_proof(cert_hash, proofs[cert_hash], root), (count, cert_hash))
+
+    def test_proofs_are_logarithmic(self):
+        root, proofs = build_merkle_tree(cert_hashes(1024))
+        self.assertTrue(all(len(proof) == 10 for proof in proofs.values()))
+
+    def test_tampered_proofs_fail(self):
+        hashes = cert_hashes(5)
+        root, proofs = build_merkle_tree(hashes)
+        self.assertFalse(verify_merkle_proof('0x' + 'ff' * 32, proofs[hashes[0]], root))
+        self.assertFalse(verify_merkle_proof(hashes[0], proofs[hashes[1]], root))
+        self.assertFalse(verify_merkle_proof(hashes[0], ['0xzz'], root))
+        self.assertEqual(compute_merkle_root(hashes[0], proofs[hashes[0]]), root)
+
+
+class AnchoringTests(TestCase):
+    def setUp(self):
+        for index, cert_hash in enumerate(cert_hashes(5)):
+            Certificate.objects.create(
+                student_name=f'Student {index}', course='CS', institution='Uni',
+                issue_date='2025-01-01T00:00:00Z', cert_hash=cert_hash,
+                chain_status=Certificate.CHAIN_STATUS_QUEUED)
+
+    @patch('certificates.anchoring.anchor_merkle_root', return_value='0x' + 'aa' * 32)
+    def test_queued_certificates_share_one_root(self, anchor_mock):
+        self.assertEqual(anchor_pending(batch_size=3), 3)
+        self.assertEqual(anchor_pending(batch_size=3), 2)
+        self.assertEqual(anchor_pending(batch_size=3), 0)
+        self.assertEqual(anchor_mock.call_count, 2)
+
+        certificates = Certificate.objects.order_by('id')
+        self.assertEqual(len({certificate.merkle_root for certificate in certificates}), 2)
+        for certificate in certificates:
+            self.assertEqual(certificate.chain_status, Certificate.CHAIN_STATUS_PENDING)
+            self.assertEqual(certificate.transaction_hash, '0x' + 'aa' * 32)
+            self.assertTrue(verify_merkle_proof(certificate.cert_hash, certificate.merkle_proof,
+                                                certificate.merkle_root))
+
+    @patch('certificates.anchoring.anchor_merkle_root', return_value='0x' + 'aa' * 32)
+    def test_rows_claimed_by_another_anchorer_are_skipped(self, anchor_mock):
+        """Rows another anchorer has claimed are left out of this batch"""
+        self.assertEqual(len(claim_batch(2)), 2)
+        self.assertEqual(anchor_pending(), 3)
+        self.assertEqual(Certificate.objects.filter(chain_status=Certificate.CHAIN_STATUS_ANCHORING).count(), 2)
+        self.assertEqual(anchor_mock.call_args[0][1], 3)
+
+    @patch('certificates.anchoring.anchor_merkle_root', side_effect=SmartContractError('node down'))
+    def test_failed_send_requeues_the_batch(self, anchor_mock):
+        with self.assertRaises(SmartContractError):
+            anchor_pending()
+        self.assertEqual(Certificate.objects.filter(chain_status=Certificate.CHAIN_STATUS_QUEUED).count(), 5)
+
+    def test_stale_claims_are_released(self):
+        claim_batch(5)
+        self.assertEqual(release_stale_claims(), 0)
+        Certificate.objects.update(pending_since=timezone.now() - timedelta(hours=1))
+        self.assertEqual(release_stale_claims(), 5)
+        self.assertEqual(Certificate.objects.filter(chain_status=Certificate.CHAIN_STATUS_QUEUED).count(), 5)
+
+    @patch('certificates.anchoring.anchor_merkle_root', return_value='0x' + 'aa' * 32)
+    def test_verification_needs_only_the_root(self, anchor_mock):
+        anchor_pending()
+        certificate = Certificate.objects.get(cert_hash=cert_hashes(5)[2])
+
+        with patch('certificates.anchoring.anchored_roots.get_anchored_at', return_value=1700000000) as root_mock:
+            result = verify_anchored_certificate(certificate)
+        self.assertEqual(result[:4], (True, 'Student 2', 'CS', 'Uni'))
+        root_mock.assert_called_once_with(certificate.merkle_root)
+
+        certificate.merkle_proof = list(reversed(certificate.merkle_proof))
+        with patch('certificates.anchoring.anchored_roots.get_anchored_at', return_value=1700000000):
+            with self.assertRaises(SmartContractError):
+                verify_anchored_certificate(certificate)
+
+    @patch('certificates.anchoring.anchor_merkle_root', return_value='0x' + 'aa' * 32)
+    def test_unanchored_root_is_not_found(self, anchor_mock):
+        anchor_pending()
+        certificate = Certificate.objects.first()
+        with patch('certificates.anchoring.anchored_roots.get_anchored_at', return_value=0):
+            with self.assertRaisesMessage(SmartContractError, 'not found on blockchain'):
+                verify_anchored_certificate(certificate)
@@ -0,0 +1,125 @@
+"""
+Test certificate full-text search
+Run with: python manage.py test certificates.test_search
+"""
+
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from certificates.models import Certificate
+from certificates.search import (
+    BACKEND_FTS5,
+    SEARCH_TABLE,
+    get_search_backend,
+    search_certificates,
+    sync_search_index,
+)
+
+PEOPLE = [
+    ('Jane Doe', 'Computer Science', 'Tech University'),
+    ('John Smith', 'Physics', 'Tech University'),
+    ('Janet Science', 'History', 'Open College'),
+    ('Zoë Kariuki', 'Computer Engineering', 'Nairobi Institute of Technology'),
+]
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        if get_search_backend() != BACKEND_FTS5:
+            self.skipTest('SQLite here was built without FTS5')
+        self.certificates = [
+            Certificate.objects.create(
+                student_name=name, course=course, institution=institution,
+                issue_date='2025-01-01T00:00:00Z', cert_hash='0x%064x' % (index + 1))
+            for index, (name, course, institution) in enumerate(PEOPLE)
+        ]
+
+    def names(self, query):
+        return [certificate.student_name for certificate in search_certificates(query)]
+
+    def test_prefix_matching_and_every_word_required(self):
+        self.assertEqual(sorted(self.names('jan')), ['Jane Doe', 'Janet Science'])
+        self.assertEqual(self.names('jane d'), ['Jane Doe'])
+        self.assertEqual(self.names('tech phys'), ['John Smith'])
+        self.assertEqual(self.names('zoe'), ['Zoë Kariuki'])
+        self.assertEqual(self.names('""*'), [])
+        self.assertEqual(self.names('nobody'), [])
+
+    def test_student_name_matches_rank_first(self):
+        self.assertEqual(self.names('science'), ['Janet Science', 'Jane Doe'])
+
+    def test_index_follows_updates_deletes_and_bulk_inserts(self):
+        jane = self.certificates[0]
+        jane.student_name = 'Jane Wanjiru'
+        jane.save()
+        self.assertEqual(self.names('wanjiru'), ['Jane Wanjiru'])
+        self.assertEqual(self.names('doe'), [])
+
+        self.certificates[1].delete()
+        self.assertEqual(self.names('john'), [])
+
+        Certificate.objects.bulk_create([Certificate(
+            student_name='Bulk Student', course='CS', institution='Uni',
+            issue_date='2025-01-01T00:00:00Z', cert_hash='0x%064x' % 99)])
+        self.assertEqual(self.names('bulk'), [])
+        self.assertEqual(sync_search_index(), 1)
+        self.assertEqual(self.names('bulk'), ['Bulk Student'])
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM {SEARCH_TABLE}")
+            self.assertEqual(cursor.fetchone()[0], Certificate.objects.count())
+
+    def test_search_endpoints(self):
+        client = APIClient()
+        response = client.get(reverse('search_certificates'), {'q': 'tech uni'})
+        self.assertEqual(response.data['backend'], BACKEND_FTS5)
+        self.assertEqual(len(response.data['results']), 2)
+        response = client.get(reverse('search_certificates'), {'q': '%064X' % 3})
+        self.assertEqual([row['student_name'] for row in response.data['results']], ['Janet Science'])
+        self.assertEqual(client.get(reverse('search_certificates'), {'limit': 'x'}).status_code, 400)
+
+        response = client.get(reverse('certificate_list'), {'search': 'computer', 'page_size': 1})
+        self.assertEqual(len(response.data['results']), 1)
+        response = client.get(reverse('certificate_list'), {'search': 'computer', 'cursor': response.data['next_cursor']})
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['next_cursor'])
+
+
+class HashPrefixLookupTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('lookup_certificate_prefix')
+        for index, cert_hash in enumerate(['3fa9' + '00' * 30, '3fa9' + 'ff' * 30, '3faa' + '00' * 30,
+                                           '3fa8' + 'ff' * 30, 'ff' * 32]):
+            Certificate.objects.create(
+                student_name=f'Student {index}', course='CS', institution='Uni',
+                issue_date='2025-01-01T00:00:00Z', cert_hash=cert_hash)
+
+    def prefixes(self, prefix):
+        response = self.client.get(self.url, {'prefix': prefix})
+        self.assertEqual(response.status_code, 200, response.data)
+        return [candidate['cert_hash'][:6] for candidate in response.data['candidates']]
+
+    def test_range_covers_exactly_the_prefix(self):
+        self.assertEqual(self.prefixes('0x3fa9'), ['0x3fa9', '0x3fa9'])
+        with patch('certificates.views.LOOKUP_MIN_PREFIX', 3):
+            self.assertEqual(self.prefixes('3FA'), ['0x3fa8', '0x3fa9', '0x3fa9', '0x3faa'])
+        self.assertEqual(self.prefixes('0xffff'), ['0xffff'])
+        response = self.client.get(self.url, {'prefix': '0x3fa9' + 'ff' * 30})
+        self.assertTrue(response.data['unique'])
+
+    def test_short_or_bad_prefixes_are_rejected(self):
+        for prefix in ('0x3f', '3fz9', '3f_a9', '0x' + 'a' * 65):
+            self.assertEqual(self.client.get(self.url, {'prefix': prefix}).status_code, 400, prefix)
+
+    @patch('certificates.views.LOOKUP_MIN_PREFIX', 3)
+    @patch('certificates.views.LOOKUP_MAX_CANDIDATES', 2)
+    def test_candidates_are_capped(self):
+        response = self.client.get(self.url, {'prefix': '3fa'})
+        self.assertEqual(len(response.data['candidates']), 2)
+        self.assertTrue(response.data['truncated'])
+        self.assertFalse(response.data['unique'])
@@ -0,0 +1,123 @@
+"""
+Test the memory-mapped certificate hash snapshot
+Run with: python manage.py test certificates.test_snapshot
+"""
+
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.utils import timezone
+
+from certificates.bloom import KnownHashFilter
+from certificates.models import Certificate
+from certificates.snapshot import (
+    HASH_REVOKED,
+    HASH_VALID,
+    HashSnapshot,
+    SnapshotError,
+    SnapshotReader,
+    build_snapshot,
+)
+from certificates.verification import verify_locally
+
+
+def make_certificate(cert_hash, is_revoked=False):
+    return Certificate.objects.create(
+        student_name='Alice', course='CS', institution='Uni', issue_date='2025-01-01T00:00:00Z',
+        cert_hash=cert_hash, is_revoked=is_revoked)
+
+
+class HashSnapshotTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'hashes.bin')
+
+    def test_lookup_and_revocation(self):
+        for index in range(1, 200):
+            make_certificate('0x%064x' % (index * 7919), is_revoked=index % 5 == 0)
+        # Saved without the prefix and in upper case
+        make_certificate('%064X' % 0xabc)
+
+        self.assertEqual(build_snapshot(self.path, settle_seconds=0), (200, Certificate.objects.latest('id').id))
+        reader = SnapshotReader(self.path, check_interval=0)
+
+        self.assertEqual(reader.status('0x%064x' % 7919), HASH_VALID)
+        self.assertEqual(reader.status('%064x' % (5 * 7919)), HASH_REVOKED)
+        self.assertEqual(reader.status('0x%064x' % 0xabc), HASH_VALID)
+        self.assertIsNone(reader.status('0x%064x' % 1))
+        self.assertIsNone(reader.status('0x%064x' % (200 * 7919)))
+        self.assertIsNone(reader.status('bogus'))
+        self.assertEqual(reader.stats()['hashes'], 200)
+
+    def test_rebuild_is_picked_up_by_readers(self):
+        make_certificate('0x' + '01' * 32)
+        build_snapshot(self.path)
+        reader = SnapshotReader(self.path, check_interval=0)
+        old_snapshot = reader.current()
+
+        make_certificate('0x' + '02' * 32)
+        build_snapshot(self.path)
+
+        self.assertEqual(reader.status('0x' + '02' * 32), HASH_VALID)
+        self.assertEqual(reader.stats()['loads'], 2)
+        # The replaced mapping still answers lookups already holding it
+        self.assertEqual(old_snapshot.find(bytes.fromhex('01' * 32)), 0)
+        self.assertEqual([name for name in os.listdir(self.directory)], ['hashes.bin'])
+
+    def test_missing_or_corrupt_files(self):
+        self.assertIsNone(SnapshotReader(self.path, check_interval=0).status('0x' + '01' * 32))
+        self.assertIsNone(SnapshotReader('', check_interval=0).current())
+        with open(self.path, 'wb') as f:
+            f.write(b'not a snapshot at all, but long enough')
+        with self.assertRaises(SnapshotError):
+            HashSnapshot(self.path)
+
+    def test_filter_only_covers_newer_certificates(self):
+        make_certificate('0x' + '01' * 32)
+        build_snapshot(self.path, settle_seconds=0)
+        make_certificate('0x' + '02' * 32)
+        reader = SnapshotReader(self.path, check_interval=0)
+        known = KnownHashFilter(capacity=100, refresh_interval=3600, snapshot=reader)
+        known.maintain()
+
+        self.assertTrue(known.might_contain('0x' + '01' * 32))
+        self.assertTrue(known.might_contain('0x' + '02' * 32))
+        self.assertFalse(known.might_contain('0x' + '03' * 32))
+        self.assertEqual(known.stats()['hashes'], 1)
+
+        # Losing the snapshot makes the filter cover the whole table again
+        os.remove(self.path)
+        self.assertTrue(known.might_contain('0x' + '01' * 32))
+        known.maintain()
+        self.assertEqual(known.stats()['hashes'], 2)
+
+    def test_recent_rows_are_left_to_the_filter(self):
+        """Rows too recent to be sure lower ids have committed stay covered by the filter"""
+        settled = make_certificate('0x' + '01' * 32)
+        Certificate.objects.filter(id=settled.id).update(created_at=timezone.now() - timedelta(minutes=5))
+        recent = Certificate.objects.create(id=settled.id + 10, student_name='Alice', course='CS', institution='Uni',
+                                            issue_date='2025-01-01T00:00:00Z', cert_hash='0x' + '03' * 32)
+        self.assertEqual(build_snapshot(self.path, settle_seconds=60), (2, settled.id))
+
+        # Committed after the build by a transaction holding a lower id than recent's
+        Certificate.objects.create(id=recent.id - 1, student_name='Late', course='CS', institution='Uni',
+                                   issue_date='2025-01-01T00:00:00Z', cert_hash='0x' + '02' * 32)
+        reader = SnapshotReader(self.path, check_interval=0)
+        known = KnownHashFilter(capacity=100, refresh_interval=3600, snapshot=reader)
+        known.maintain()
+        self.assertIsNone(reader.status('0x' + '02' * 32))
+        self.assertTrue(known.might_contain('0x' + '02' * 32))
+        self.assertEqual(known.stats()['base_id'], settled.id)
+
+    def test_revoked_hashes_skip_the_contract(self):
+        certificate = make_certificate('0x' + '01' * 32, is_revoked=True)
+        certificate.refresh_from_db()
+        build_snapshot(self.path)
+        with patch('certificates.verification.hash_snapshot', SnapshotReader(self.path, check_interval=0)):
+            self.assertEqual(verify_locally(certificate)[:2], (False, 'Alice'))
+        self.assertIsNone(verify_locally(certificate))
@@ -1,12 +1,20 @@
-from django.test import TestCase
+from django.db import transaction
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
-from .models import Certificate
+from .models import Certificate, ChainCheckpoint
+from .hashes import normalize_hash
+from .indexer import CHECKPOINT_NAME
+from .receipts import process_pending
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.management import call_command
-from .blockchain import web3, contract, issue_certificate
+from .blockchain import web3, contract, issue_certificate, ContractFunctionUnavailable
 from web3 import Web3
+from unittest.mock import patch
 import json
+from datetime import timedelta
+from django.utils import timezone
 
 class BlockchainIntegrationTests(TestCase):
     def setUp(self):
@@ -131,8 +139,458 @@ class CertificateTests(TestCase):
             course='Computer Science',
             institution='University of Blockchain',
             issue_date='2025-01-01T00:00:00Z',
-            cert_hash='0x123',
+            cert_hash='0x' + '12' * 32,
             ipfs_hash='QmTest'
         )
         self.assertEqual(str(certificate), "Certificate for Alice")
         self.assertEqual(certificate.course, "Computer Science")
+
+    def test_cert_hash_lookups_ignore_prefix_and_case(self):
+        """cert_hash is stored as 32 bytes and read back in one canonical form"""
+        Certificate.objects.create(
+            student_name='Alice', course='CS', institution='Uni',
+            issue_date='2025-01-01T00:00:00Z', cert_hash='AB' * 32)
+        certificate = Certificate.objects.get(cert_hash='0X' + 'ab' * 32)
+        self.assertEqual(certificate.cert_hash, '0x' + 'ab' * 32)
+        self.assertEqual(list(Certificate.objects.in_bulk(['ab' * 32], field_name='cert_hash')), ['0x' + 'ab' * 32])
+        self.assertFalse(Certificate.objects.filter(cert_hash='0x1234').exists())
+        # 64 characters, but spaces inside would decode to fewer than 32 bytes
+        spaced = 'ab ' * 21 + 'a'
+        self.assertEqual(len(spaced), 64)
+        self.assertIsNone(normalize_hash(spaced))
+        self.assertFalse(Certificate.objects.filter(cert_hash=spaced).exists())
+        for invalid_hash in (spaced, '0x1234'):
+            with self.assertRaises(ValueError), transaction.atomic():
+                Certificate.objects.create(
+                    student_name='Bob', course='CS', institution='Uni',
+                    issue_date='2025-01-01T00:00:00Z', cert_hash=invalid_hash)
+
+        response = self.client.get(reverse('verify_certificate', args=['AB' * 32]))
+        self.assertNotEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class BatchVerificationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('verify_certificates_batch')
+        self.hashes = ['0x' + '11' * 32, '0x' + '22' * 32]
+        for cert_hash in self.hashes:
+            Certificate.objects.create(
+                student_name='Alice',
+                course='Computer Science',
+                institution='University of Blockchain',
+                issue_date='2025-01-01T00:00:00Z',
+                cert_hash=cert_hash
+            )
+
+    @patch('certificates.verification.verify_certificates_on_chain')
+    def test_batch_results_match_single_shape(self, batch_mock):
+        """Each result has the keys verify_certificate_view returns"""
+        batch_mock.return_value = {
+            self.hashes[0]: ((True, 'Alice', 'Computer Science', 'University of Blockchain', 1735689600), None),
+            self.hashes[1]: (None, 'Certificate not found on blockchain'),
+        }
+        missing = '33' * 32
+        response = self.client.post(self.url, {'cert_hashes': self.hashes + [missing]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = {result['cert_hash']: result for result in response.data['results']}
+        self.assertTrue(results[self.hashes[0]]['is_valid'])
+        self.assertEqual(results[self.hashes[0]]['blockchain_details']['student_name'], 'Alice')
+        self.assertFalse(results[self.hashes[1]]['is_valid'])
+        self.assertIn('failure_reason', results[self.hashes[1]])
+        self.assertEqual(results['0x' + missing]['error'], 'Certificate not found')
+        batch_mock.assert_called_once()
+
+    @patch('certificates.verification.verify_certificates_rpc_batch')
+    @patch('certificates.verification.verify_certificates_on_chain')
+    def test_falls_back_to_rpc_batch(self, on_chain_mock, rpc_batch_mock):
+        """Contracts without verifyCertificates are checked with batched eth_calls"""
+        on_chain_mock.side_effect = ContractFunctionUnavailable('no verifyCertificates')
+        rpc_batch_mock.return_value = {}
+        response = self.client.post(self.url, {'cert_hashes': self.hashes}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rpc_batch_mock.assert_called_once()
+
+    def test_batch_size_limit(self):
+        """Requests above VERIFY_BATCH_MAX_HASHES are rejected"""
+        with patch('certificates.views.VERIFY_BATCH_MAX_HASHES', 1):
+            response = self.client.post(self.url, {'cert_hashes': self.hashes}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AsyncIssuanceTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.issue_url = reverse('issue_certificate')
+        self.form = {
+            'studentName': 'Alice',
+            'course': 'Computer Science',
+            'institution': 'University of Blockchain',
+            'issueDate': '2025-01-01',
+            'issueDateTimestamp': '1735689600',
+        }
+
+    def _post(self):
+        data = dict(self.form)
+        data['certificatePdf'] = SimpleUploadedFile('certificate.pdf', b'%PDF-1.4', content_type='application/pdf')
+        return self.client.post(self.issue_url, data, format='multipart')
+
+    @patch('certificates.views.generate_qr_code', side_effect=RuntimeError('no qr in tests'))
+    @patch('certificates.views.receipt_tracker')
+    @patch('certificates.views.submit_certificate')
+    def test_issue_returns_202_and_pending_row(self, submit_mock, tracker_mock, qr_mock):
+        """Issuance returns as soon as the transaction is submitted"""
+        tx_hash = '0x' + 'ab' * 32
+        submit_mock.side_effect = lambda *args: {'cert_hash': None, 'ipfs_hash': None, 'transaction_hash': tx_hash}
+        response = self._post()
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], 'pending')
+        self.assertIn('status_url', response.data)
+        certificate = Certificate.objects.get(cert_hash=response.data['cert_hash'])
+        self.assertEqual(certificate.chain_status, Certificate.CHAIN_STATUS_PENDING)
+        self.assertEqual(certificate.transaction_hash, tx_hash)
+        tracker_mock.track.assert_called_once()
+
+    @override_settings(CERTIFICATE_ANCHORING_MODE='merkle')
+    @patch('certificates.views.generate_qr_code', side_effect=RuntimeError('no qr in tests'))
+    @patch('certificates.views.submit_certificate')
+    def test_merkle_mode_queues_for_anchoring(self, submit_mock, qr_mock):
+        """In Merkle anchoring mode nothing is sent until the next root is anchored"""
+        response = self._post()
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], 'queued')
+        submit_mock.assert_not_called()
+
+    @patch('certificates.receipts.get_block_headers',
+           side_effect=lambda numbers: {n: {'hash': '0x' + 'b1' * 32, 'timestamp': 1735689600} for n in numbers})
+    @patch('certificates.receipts.get_web3')
+    @patch('certificates.receipts.get_transaction_receipts')
+    def test_receipts_confirm_or_fail_rows(self, receipts_mock, web3_mock, headers_mock):
+        """The tracker marks rows from their receipt status"""
+        confirmed = Certificate.objects.create(
+            student_name='Alice', course='CS', institution='Uni', issue_date='2025-01-01T00:00:00Z',
+            cert_hash='0x' + '01' * 32, chain_status='pending', transaction_hash='0x' + 'a1' * 32)
+        reverted = Certificate.objects.create(
+            student_name='Bob', course='CS', institution='Uni', issue_date='2025-01-01T00:00:00Z',
+            cert_hash='0x' + '02' * 32, chain_status='pending', transaction_hash='0x' + 'a2' * 32)
+        waiting = Certificate.objects.create(
+            student_name='Carol', course='CS', institution='Uni', issue_date='2025-01-01T00:00:00Z',
+            cert_hash='0x' + '03' * 32, chain_status='pending', transaction_hash='0x' + 'a3' * 32)
+        web3_mock.return_value.eth.block_number = 10
+        receipts_mock.return_value = {
+            confirmed.transaction_hash: {'status': '0x1', 'blockNumber': '0xa', 'blockHash': '0x' + 'b1' * 32},
+            reverted.transaction_hash: {'status': '0x0', 'blockNumber': '0xa', 'blockHash': '0x' + 'b1' * 32},
+            waiting.transaction_hash: None,
+        }
+
+        self.assertEqual(process_pending(), 1)
+        confirmed.refresh_from_db()
+        reverted.refresh_from_db()
+        self.assertEqual(confirmed.chain_status, 'confirmed')
+        self.assertTrue(confirmed.blockchain_verified)
+        self.assertEqual(reverted.chain_status, 'failed')
+
+    @patch('certificates.receipts.CONFIRMATION_DEPTH', 3)
+    @patch('certificates.receipts.get_block_headers')
+    @patch('certificates.receipts.get_web3')
+    @patch('certificates.receipts.get_transaction_receipts')
+    def test_confirmation_depth_and_reorgs(self, receipts_mock, web3_mock, headers_mock):
+        """Rows confirm only once deep enough, and go back to pending if their block is reorganised away"""
+        certificate = Certificate.objects.create(
+            student_name='Alice', course='CS', institution='Uni', issue_date='2025-01-01T00:00:00Z',
+            cert_hash='0x' + '05' * 32, chain_status='pending', transaction_hash='0x' + 'a5' * 32)
+        receipts_mock.return_value = {
+            certificate.transaction_hash: {'status': '0x1', 'blockNumber': '0x64', 'blockHash': '0x' + 'b1' * 32},
+        }
+        headers_mock.side_effect = lambda numbers: {n: {'hash': '0x' + 'b1' * 32, 'timestamp': 1735689600}
+                                                    for n in numbers}
+
+        web3_mock.return_value.eth.block_number = 101
+        self.assertEqual(process_pending(), 1)
+        certificate.refresh_from_db()
+        self.assertEqual((certificate.chain_status, certificate.block_number), ('pending', 100))
+
+        web3_mock.return_value.eth.block_number = 102
+        self.assertEqual(process_pending(), 0)
+        certificate.refresh_from_db()
+        self.assertEqual(certificate.chain_status, 'confirmed')
+        self.assertEqual(int(certificate.blockchain_timestamp.timestamp()), 1735689600)
+
+        # Block 100 now has a different hash on the canonical chain
+        headers_mock.side_effect = lambda numbers: {n: {'hash': '0x' + 'c2' * 32, 'timestamp': 1735689600}
+                                                    for n in numbers}
+        receipts_mock.return_value = {certificate.transaction_hash: None}
+        self.assertEqual(process_pending(), 1)
+        certificate.refresh_from_db()
+        self.assertEqual(certificate.chain_status, 'pending')
+        self.assertIsNone(certificate.block_hash)
+        self.assertFalse(certificate.blockchain_verified)
+
+    @patch('certificates.receipts.CONFIRMATION_DEPTH', 1)
+    @patch('certificates.receipts.get_block_headers')
+    @patch('certificates.receipts.get_web3')
+    @patch('certificates.receipts.get_transaction_receipts')
+    def test_reorged_old_row_waits_for_a_new_timeout(self, receipts_mock, web3_mock, headers_mock):
+        """A row rolled back by a reorg is not failed at once because it was issued long ago"""
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        certificate = Certificate.objects.create(
+            student_name='Alice', course='CS', institution='Uni', issue_date='2025-01-01T00:00:00Z',
+            cert_hash='0x' + '06' * 32, chain_status='confirmed', transaction_hash='0x' + 'a6' * 32,
+            block_number=100, block_hash='0x' + 'b1' * 32, blockchain_verified=True, pending_since=an_hour_ago)
+        Certificate.objects.filter(id=certificate.id).update(created_at=an_hour_ago)
+        web3_mock.return_value.eth.block_number = 110
+        headers_mock.side_effect = lambda numbers: {n: {'hash': '0x' + 'c2' * 32, 'timestamp': 1735689600}
+                                                    for n in numbers}
+        # Back in the mempool: no receipt yet
+        receipts_mock.return_value = {certificate.transaction_hash: None}
+
+        self.assertEqual(process_pending(), 1)
+        certificate.refresh_from_db()
+        self.assertEqual(certificate.chain_status, 'pending')
+        self.assertGreater(certificate.pending_since, an_hour_ago)
+
+        Certificate.objects.filter(id=certificate.id).update(pending_since=an_hour_ago)
+        self.assertEqual(process_pending(), 0)
+        certificate.refresh_from_db()
+        self.assertEqual(certificate.chain_status, 'failed')
+
+    def test_status_endpoint(self):
+        """The status URL reports the row's chain status"""
+        Certificate.objects.create(
+            student_name='Alice', course='CS', institution='Uni', issue_date='2025-01-01T00:00:00Z',
+            cert_hash='0x' + '04' * 32, chain_status='failed', chain_error='reverted')
+        response = self.client.get(reverse('issuance_status', args=['04' * 32]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'failed')
+        self.assertEqual(response.data['failure_reason'], 'reverted')
+        self.assertEqual(self.client.get(reverse('issuance_status', args=['0X' + '04' * 32])).status_code,
+                         status.HTTP_200_OK)
+        self.assertEqual(self.client.get(reverse('issuance_status', args=['04' * 31])).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+    @patch('certificates.views.receipt_tracker')
+    @patch('certificates.views.submit_revocation', return_value='0x' + 'a7' * 32)
+    def test_revoke_uses_canonical_hash(self, revoke_mock, tracker_mock):
+        """The contract is called with the stored hash, whatever form the URL used"""
+        Certificate.objects.create(
+            student_name='Alice', course='CS', institution='Uni', issue_date='2025-01-01T00:00:00Z',
+            cert_hash='0x' + 'ab' * 32)
+        response = self.client.post(reverse('revoke_certificate', args=['AB' * 32]))
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        revoke_mock.assert_called_once_with('0x' + 'ab' * 32, anchored=False)
+
+    @patch('certificates.views.receipt_tracker')
+    @patch('certificates.views.submit_revocation', return_value='0x' + 'a7' * 32)
+    def test_revoke_waits_for_the_receipt(self, revoke_mock, tracker_mock):
+        """The row is only marked revoked once the tracker confirms the transaction"""
+        certificate = Certificate.objects.create(
+            student_name='Alice', course='CS', institution='Uni', issue_date='2025-01-01T00:00:00Z',
+            cert_hash='0x' + '07' * 32)
+        response = self.client.post(reverse('revoke_certificate', args=[certificate.cert_hash]))
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], 'pending')
+        certificate.refresh_from_db()
+        self.assertFalse(certificate.is_revoked)
+        self.assertEqual(certificate.revocation_tx_hash, '0x' + 'a7' * 32)
+        tracker_mock.track.assert_called_once()
+        # A second request while the first is pending sends nothing
+        response = self.client.post(reverse('revoke_certificate', args=[certificate.cert_hash]))
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        revoke_mock.assert_called_once()
+
+    @patch('certificates.receipts.CONFIRMATION_DEPTH', 3)
+    @patch('certificates.receipts.get_block_headers')
+    @patch('certificates.receipts.get_web3')
+    @patch('certificates.receipts.get_transaction_receipts')
+    def test_revocation_confirmation_and_reorg(self, receipts_mock, web3_mock, headers_mock):
+        """Revocations confirm at depth and are undone, with the indexer checkpoint, when their block is orphaned"""
+        certificate = Certificate.objects.create(
+            student_name='Alice', course='CS', institution='Uni', issue_date='2025-01-01T00:00:00Z',
+            cert_hash='0x' + '08' * 32, chain_status='confirmed', blockchain_verified=True,
+            revocation_status='pending', revocation_tx_hash='0x' + 'a8' * 32, revocation_pending_since=timezone.now())
+        ChainCheckpoint.objects.create(name=CHECKPOINT_NAME, contract_address='0x' + '00' * 20, last_block=101)
+        receipts_mock.return_value = {
+            certificate.revocation_tx_hash: {'status': '0x1', 'blockNumber': '0x64', 'blockHash': '0x' + 'b1' * 32},
+        }
+        headers_mock.side_effect = lambda numbers: {n: {'hash': '0x' + 'b1' * 32, 'timestamp': 1735689600}
+                                                    for n in numbers}
+
+        web3_mock.return_value.eth.block_number = 101
+        self.assertEqual(process_pending(), 1)
+        certificate.refresh_from_db()
+        self.assertFalse(certificate.is_revoked)
+        self.assertEqual(certificate.revocation_block_number, 100)
+
+        web3_mock.return_value.eth.block_number = 102
+        self.assertEqual(process_pending(), 0)
+        certificate.refresh_from_db()
+        self.assertTrue(certificate.is_revoked)
+        self.assertEqual(certificate.revocation_status, 'confirmed')
+
+        headers_mock.side_effect = lambda numbers: {n: {'hash': '0x' + 'c2' * 32, 'timestamp': 1735689600}
+                                                    for n in numbers}
+        receipts_mock.return_value = {certificate.revocation_tx_hash: None}
+        self.assertEqual(process_pending(), 1)
+        certificate.refresh_from_db()
+        self.assertFalse(certificate.is_revoked)
+        self.assertEqual(certificate.revocation_status, 'pending')
+        self.assertIsNone(certificate.revocation_block_hash)
+        self.assertEqual(ChainCheckpoint.objects.get(name=CHECKPOINT_NAME).last_block, 99)
+
+
+class CertificateListTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('certificate_list')
+        # Several certificates share an issue date so pages break inside a tie
+        for index in range(25):
+            Certificate.objects.create(
+                student_name=f'Student {index}',
+                course='Physics' if index % 2 else 'Computer Science',
+                institution='University of Blockchain',
+                issue_date=f'2025-01-{index // 3 + 1:02d}T00:00:00Z',
+                cert_hash='0x%064x' % (index + 1),
+                is_revoked=index % 5 == 0,
+            )
+
+    def _walk(self, **params):
+        cert_hashes = []
+        cursor = None
+        while True:
+            query = dict(params, page_size=4)
+            if cursor:
+                query['cursor'] = cursor
+            with self.assertNumQueries(1):
+                response = self.client.get(self.url, query)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            cert_hashes.extend(row['cert_hash'] for row in response.data['results'])
+            cursor = response.data['next_cursor']
+            if not cursor:
+                return cert_hashes
+
+    def test_cursor_pages_cover_every_row_once(self):
+        cert_hashes = self._walk()
+        self.assertEqual(len(cert_hashes), 25)
+        self.assertEqual(len(set(cert_hashes)), 25)
+        expected = Certificate.objects.order_by('-issue_date', '-id').values_list('cert_hash', flat=True)
+        self.assertEqual(cert_hashes, list(expected))
+
+    def test_filters_use_real_fields(self):
+        self.assertEqual(len(self._walk(course='Physics')), 12)
+        self.assertEqual(len(self._walk(revoked='true')), 5)
+        self.assertEqual(len(self._walk(status='valid', institution='University of Blockchain')), 20)
+        self.assertEqual(len(self._walk(date_from='2025-01-02', date_to='2025-01-03')), 6)
+        self.assertEqual(self._walk(search='%064X' % 7), ['0x%064x' % 7])
+        self.assertEqual(len(self._walk(search='student 1')), 11)
+
+    def test_count_is_opt_in_and_bad_input_is_rejected(self):
+        response = self.client.get(self.url, {'page_size': 10})
+        self.assertNotIn('count', response.data)
+        self.assertIn('cursor=', response.data['next'])
+        response = self.client.get(self.url, {'include_count': 'true'})
+        self.assertEqual(response.data['count'], 25)
+
+        for params in ({'cursor': 'not-a-cursor'}, {'date_from': 'yesterday'},
+                       {'page_size': '0'}, {'revoked': 'maybe'}, {'status': 'lost'}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+
+class VerifyDetailsTests(TestCase):
+    def setUp(self):
+        from .blockchain import compute_certificate_hash
+        self.client = APIClient()
+        self.url = reverse('verify_certificate_details')
+        # Issued from a browser in Nairobi: local midnight is 21:00 UTC the day before
+        self.timestamp = 1735678800
+        self.certificate = Certificate.objects.create(
+            student_name='Jane Doe', course='Computer Science', institution='Tech University',
+            issue_date='2025-01-01T00:00:00Z',
+            cert_hash=compute_certificate_hash('Jane Doe', 'Computer Science', 'Tech University', self.timestamp))
+        self.details = {'student_name': 'Jane Doe', 'course': 'Computer Science',
+                        'institution': 'Tech University', 'issue_date': '2025-01-01'}
+
+    @patch('certificates.views.verify_certificate_record',
+           return_value=(True, 'Jane Doe', 'Computer Science', 'Tech University', 1735678800))
+    def test_finds_certificate_across_timezones_in_one_query(self, verify_mock):
+        with self.assertNumQueries(1):
+            response = self.client.post(self.url, self.details, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['is_valid'])
+        self.assertEqual(response.data['cert_hash'], self.certificate.cert_hash)
+        self.assertEqual(response.data['matched_timestamp'], self.timestamp)
+        verify_mock.assert_called_once()
+
+        response = self.client.post(self.url, dict(self.details, timezone='Africa/Nairobi'), format='json')
+        self.assertEqual(response.data['candidates_checked'], 1)
+        response = self.client.post(self.url, dict(self.details, issue_date_timestamp=self.timestamp), format='json')
+        self.assertEqual(response.data['matched_timestamp'], self.timestamp)
+
+    def test_unknown_details_and_bad_input(self):
+        response = self.client.post(self.url, dict(self.details, student_name='John Doe'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertGreater(response.data['candidates_checked'], 24)
+        response = self.client.post(self.url, dict(self.details, timezone='Europe/London'), format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        for details in ({'course': 'Computer Science'}, dict(self.details, issue_date='01/01/2025'),
+                        dict(self.details, timezone='Nowhere/Special')):
+            response = self.client.post(self.url, details, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, details)
+
+
+class CertificateRowSerializerTests(TestCase):
+    def setUp(self):
+        from django.utils import timezone
+        Certificate.objects.create(
+            student_name='Zoë Kariuki', course='Computer Science', institution='Tech University',
+            issue_date='2025-01-01T09:30:00+03:00', cert_hash='0x' + '01' * 32,
+            certificate_pdf='certificates/zoë kariuki.pdf', qr_code='qr_codes/qr_1.png',
+            pdf_hash='0x' + 'ab' * 32, is_revoked=True, revocation_timestamp=timezone.now(),
+            blockchain_timestamp=timezone.now(), merkle_root='0x' + 'cd' * 32,
+            merkle_proof=['0x' + 'ef' * 32], block_number=42, block_hash='0x' + '42' * 32)
+        Certificate.objects.create(
+            student_name='Jane Doe', course='Physics', institution='Open College',
+            issue_date='2024-06-30T00:00:00Z', cert_hash='0x' + '02' * 32, chain_status='pending')
+
+    def render_both(self, request, fields=None):
+        from rest_framework.renderers import JSONRenderer
+        from .serializers import CertificateRowSerializer, CertificateSerializer
+
+        certificates = Certificate.objects.order_by('id')
+        expected = CertificateSerializer(certificates, many=True, context={'request': request}).data
+        if fields:
+            expected = [{field: row[field] for field in fields} for row in expected]
+        row_serializer = CertificateRowSerializer(request, fields)
+        actual = row_serializer.serialize(row_serializer.values(certificates))
+        return JSONRenderer().render(expected), JSONRenderer().render(actual)
+
+    def test_output_is_byte_identical(self):
+        from rest_framework.test import APIRequestFactory
+        from .serializers import CERTIFICATE_FIELDS, CertificateSerializer
+
+        self.assertEqual(CERTIFICATE_FIELDS, tuple(CertificateSerializer().fields))
+        request = APIRequestFactory().get('/api/certificates/')
+        expected, actual = self.render_both(request)
+        self.assertEqual(actual, expected)
+        self.assertIn(b'"http://testserver/media/qr_codes/qr_1.png"', actual)
+        expected, actual = self.render_both(None)
+        self.assertEqual(actual, expected)
+
+    def test_fields_projection(self):
+        from .serializers import parse_fields
+
+        expected, actual = self.render_both(None, parse_fields('qr_code_url,cert_hash, issue_date_timestamp'))
+        self.assertEqual(actual, expected)
+        with self.assertRaises(ValueError):
+            parse_fields('cert_hash,password')
+
+        response = APIClient().get(reverse('certificate_list'), {'fields': 'cert_hash,is_revoked'})
+        self.assertEqual(response.data['results'][0], {'cert_hash': '0x' + '01' * 32, 'is_revoked': True})
+        response = APIClient().get(reverse('certificate_list'), {'fields': 'nope'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -5,10 +5,18 @@ from .views import IssueCertificateView
 
 urlpatterns = [
     path('', views.certificate_list_view, name='certificate_list'),
+    path('export/', views.export_certificates_view, name='export_certificates'),
+    path('search/', views.search_certificates_view, name='search_certificates'),
+    path('lookup/', views.lookup_certificate_prefix_view, name='lookup_certificate_prefix'),
     path('issue/', IssueCertificateView.as_view(), name='issue_certificate'),
+    path('issue/status/<str:cert_hash>/', views.issuance_status_view, name='issuance_status'),
     path('verify/<str:cert_hash>/', views.verify_certificate_view, name='verify_certificate'),
+    path('verify-details/', views.verify_certificate_details_view, name='verify_certificate_details'),
+    path('verify-batch/', views.verify_certificates_batch_view, name='verify_certificates_batch'),
+    path('verify-bulk/', views.verify_certificates_bulk_view, name='verify_certificates_bulk'),
     path('verify-blockchain/<str:cert_hash>/', views.verify_blockchain_view, name='verify_blockchain'),
     path('verify-qr/', views.verify_by_qr_code, name='verify_qr'),
     path('revoke/<str:cert_hash>/', views.revoke_certificate_view, name='revoke_certificate'),
+    path('blockchain/status/', views.blockchain_status_view, name='blockchain_status'),
     path('admin/login/', views.admin_login, name='admin_login'),
 ]
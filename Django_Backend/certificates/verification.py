@@ -0,0 +1,185 @@
+# certificates/verification.py
+"""
+Chooses where a stored certificate's chain state is read from.
+
+Merkle-anchored certificates are checked against their cached root. With
+CERTIFICATE_VERIFICATION_SOURCE = 'index', rows already confirmed by the
+event indexer or receipt tracker are answered from the database. Hashes the
+hash snapshot records as revoked are answered without a contract call, since
+a revocation cannot be undone on chain. Everything else calls the contract.
+
+find_certificate_by_details() locates a certificate from the details printed
+on it by recomputing the contract's hash for each plausible issue timestamp.
+verify_certificate_records() and find_certificates_by_details() do the same
+for many certificates at once.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timezone as dt_timezone
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+
+from .anchoring import verify_anchored_certificate
+from .blockchain import (
+    ContractFunctionUnavailable,
+    compute_certificate_hash,
+    rpc_deadline,
+    verify_certificate_on_chain,
+    verify_certificates_on_chain,
+    verify_certificates_rpc_batch,
+)
+from .models import Certificate
+from .snapshot import HASH_REVOKED, hash_snapshot
+
+VERIFICATION_SOURCE_CHAIN = 'chain'
+VERIFICATION_SOURCE_INDEX = 'index'
+
+
+def uses_index():
+    return getattr(settings, 'CERTIFICATE_VERIFICATION_SOURCE', VERIFICATION_SOURCE_CHAIN) == VERIFICATION_SOURCE_INDEX
+
+
+def verify_from_index(certificate):
+    """Chain state recorded for the row, or None if it has not been confirmed yet"""
+    if not certificate.blockchain_verified:
+        return None
+    return (
+        not certificate.is_revoked,
+        certificate.student_name,
+        certificate.course,
+        certificate.institution,
+        int(certificate.issue_date.timestamp()),
+    )
+
+
+def verify_locally(certificate):
+    """
+    Verify without a contract call where possible.
+    Returns the verify_certificate_on_chain tuple, or None when the chain has to be asked.
+    """
+    if certificate.merkle_root:
+        return verify_anchored_certificate(certificate)
+    if uses_index():
+        return verify_from_index(certificate)
+    if hash_snapshot.status(certificate.cert_hash) == HASH_REVOKED:
+        return (
+            False,
+            certificate.student_name,
+            certificate.course,
+            certificate.institution,
+            int(certificate.issue_date.timestamp()),
+        )
+    return None
+
+
+def verify_certificate_record(certificate):
+    """Verify a stored certificate whichever way its chain state is available"""
+    result = verify_locally(certificate)
+    if result is None:
+        result = verify_certificate_on_chain(certificate.cert_hash)
+    return result
+
+
+def verify_certificate_records(certificates, deadline):
+    """
+    Verify many stored certificates. Anchored, indexed and snapshot-revoked
+    certificates are answered locally; the rest go to the contract in
+    verifyCertificates calls (batched verifyCertificate calls on contracts
+    without it) within deadline seconds.
+    Returns {cert_hash: (result, error)} for every certificate.
+    """
+    results = {}
+    direct_hashes = []
+    for certificate in certificates:
+        try:
+            with rpc_deadline(deadline):
+                local_result = verify_locally(certificate)
+        except Exception as e:
+            results[certificate.cert_hash] = (None, str(e))
+            continue
+        if local_result is None:
+            direct_hashes.append(certificate.cert_hash)
+        else:
+            results[certificate.cert_hash] = (local_result, None)
+
+    if direct_hashes:
+        chain_error = None
+        try:
+            with rpc_deadline(deadline):
+                try:
+                    results.update(verify_certificates_on_chain(direct_hashes))
+                except ContractFunctionUnavailable as e:
+                    print(f"Falling back to batched verifyCertificate calls: {str(e)}")
+                    results.update(verify_certificates_rpc_batch(direct_hashes))
+        except Exception as e:
+            chain_error = str(e)
+            print(f"❌ Batch blockchain verification error: {chain_error}")
+        for cert_hash in direct_hashes:
+            results.setdefault(cert_hash, (None, chain_error))
+    return results
+
+
+# UTC offsets in use around the world, every quarter hour from UTC-12 to UTC+14,
+# nearest to UTC first. Issuers may have sent local midnight of the issue date.
+UTC_OFFSET_MINUTES = sorted(range(-12 * 60, 14 * 60 + 1, 15), key=lambda minutes: (abs(minutes), minutes))
+
+
+def issue_date_candidates(issue_date, tz_name=None):
+    """
+    Unix timestamps an issue date (a date) may have been hashed with:
+    midnight in tz_name if given, otherwise midnight UTC followed by
+    midnight at every other UTC offset.
+    """
+    midnight = datetime.combine(issue_date, datetime.min.time())
+    if tz_name:
+        return [int(midnight.replace(tzinfo=ZoneInfo(tz_name)).timestamp())]
+    utc_midnight = int(midnight.replace(tzinfo=dt_timezone.utc).timestamp())
+    return [utc_midnight - minutes * 60 for minutes in UTC_OFFSET_MINUTES]
+
+
+def find_certificate_by_details(student_name, course, institution, timestamps):
+    """
+    The certificate whose hash matches the details at one of timestamps,
+    looked up in a single indexed query. Returns (certificate, timestamp),
+    preferring earlier timestamps, or (None, None).
+    """
+    candidates = {}
+    for timestamp in timestamps:
+        candidates.setdefault(compute_certificate_hash(student_name, course, institution, timestamp), timestamp)
+    found = Certificate.objects.in_bulk(list(candidates), field_name='cert_hash')
+    for cert_hash, timestamp in candidates.items():
+        if cert_hash in found:
+            return found[cert_hash], timestamp
+    return None, None
+
+
+def find_certificates_by_details(entries):
+    """
+    find_certificate_by_details() for many (student_name, course, institution,
+    timestamps) entries. One query fetches every certificate of the students
+    named (through the student_name index). Hashes are only computed for
+    entries with a certificate of the same details, in timestamp preference
+    order until one matches, so the usual UTC-midnight certificate costs one
+    hash and entries with no such certificate cost none.
+    Returns a (certificate, timestamp) or (None, None) pair per entry.
+    """
+    found = defaultdict(dict)
+    names = list({entry[0] for entry in entries})
+    if names:
+        for certificate in Certificate.objects.filter(student_name__in=names):
+            found[(certificate.student_name, certificate.course, certificate.institution)][
+                certificate.cert_hash] = certificate
+
+    matches = []
+    for student_name, course, institution, timestamps in entries:
+        candidates = found.get((student_name, course, institution))
+        match = (None, None)
+        if candidates:
+            for timestamp in timestamps:
+                certificate = candidates.get(compute_certificate_hash(student_name, course, institution, timestamp))
+                if certificate is not None:
+                    match = (certificate, timestamp)
+                    break
+        matches.append(match)
+    return matches
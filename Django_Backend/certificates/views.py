@@ -1,25 +1,64 @@
-from django.db import models
+from django.db import models, transaction
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from django.contrib.auth import authenticate
-from django.http import JsonResponse
+from django.urls import reverse
+from django.http import JsonResponse, StreamingHttpResponse
 from .models import Certificate
-from .serializers import CertificateSerializer
+from .serializers import CertificateRowSerializer, CertificateSerializer, parse_fields
 from .blockchain import issue_certificate, revoke_certificate, verify_certificate_on_chain
+from .blockchain import compute_certificate_hash, submit_certificate, submit_revocation
+from .blockchain import connection, contract_registry, rpc_adapter, rpc_deadline, sender_pool, anchored_roots
+from .blockchain import verification_cache
 from .qr_generator import generate_qr_code, decode_qr_code_hash
+from .receipts import apply_receipts, receipt_tracker
+from .anchoring import is_merkle_mode
+from .verification import verify_certificate_record, verify_certificate_records
+from .verification import find_certificate_by_details, issue_date_candidates
+from .bloom import known_hashes
+from .bulk_verify import BulkVerification, spool_body
+from .export import FORMAT_NDJSON, CertificateExport
+from .hashes import format_hash, hash_prefix_range
+from .jobs import queue_stats
+from .pagination import get_page_size, paginate_keyset
+from .search import filter_by_search, get_search_backend, search_certificate_ids
+from .snapshot import hash_snapshot
+from .tasks import queue_issuance_jobs
 from rest_framework.views import APIView
 from rest_framework import status
-from datetime import datetime
+from datetime import datetime, timedelta
+from django.utils.dateparse import parse_date, parse_datetime
 from django.utils import timezone
+from django.conf import settings
 import time
 
+# Per-request budgets (seconds) for talking to the blockchain node
+VERIFY_DEADLINE = getattr(settings, 'BLOCKCHAIN_VERIFY_DEADLINE', 5.0)
+ISSUE_DEADLINE = getattr(settings, 'BLOCKCHAIN_ISSUE_DEADLINE', 130.0)
+
+# Upper bound on the number of hashes accepted by the batch verify endpoint
+VERIFY_BATCH_MAX_HASHES = getattr(settings, 'VERIFY_BATCH_MAX_HASHES', 1000)
+
+# Shortest hash prefix (hex characters) accepted by the lookup endpoint, and
+# how many candidates it lists before asking for a longer prefix
+LOOKUP_MIN_PREFIX = getattr(settings, 'CERTIFICATE_LOOKUP_MIN_PREFIX', 4)
+LOOKUP_MAX_CANDIDATES = getattr(settings, 'CERTIFICATE_LOOKUP_MAX_CANDIDATES', 10)
+
+# Default and largest number of results returned by the search endpoint
+SEARCH_RESULTS_LIMIT = getattr(settings, 'CERTIFICATE_SEARCH_LIMIT', 20)
+SEARCH_RESULTS_MAX_LIMIT = getattr(settings, 'CERTIFICATE_SEARCH_MAX_LIMIT', 100)
+
+# Hand issuance transactions, QR codes and PDF hashing to the job queue (manage.py run_workers)
+BACKGROUND_JOBS = getattr(settings, 'CERTIFICATE_BACKGROUND_JOBS', False)
+
 @api_view(['GET'])
 def verify_blockchain_view(request, cert_hash):
     """
     Verify a certificate directly on the blockchain
     """
     try:
-        result = verify_certificate_on_chain(cert_hash)
+        with rpc_deadline(VERIFY_DEADLINE):
+            result = verify_certificate_on_chain(cert_hash)
         is_valid, student_name, course, institution, issue_date = result
         return Response({
             'is_valid': is_valid,
@@ -33,6 +72,23 @@ def verify_blockchain_view(request, cert_hash):
             'error': str(e)
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['GET'])
+def blockchain_status_view(request):
+    """
+    Report the blockchain connection state without waiting on the node
+    """
+    return Response({
+        'connection': connection.status(),
+        'contract_registry': contract_registry.stats(),
+        'rpc_pool': rpc_adapter.metrics(),
+        'senders': sender_pool.stats(),
+        'anchored_roots': anchored_roots.stats(),
+        'verification_cache': verification_cache.stats(),
+        'known_hash_filter': known_hashes.stats(),
+        'hash_snapshot': hash_snapshot.stats(),
+        'jobs': queue_stats(),
+    })
+
 @api_view(['GET'])
 def verify_certificate_legacy(request, cert_hash):
     """
@@ -50,7 +106,8 @@ def verify_certificate_legacy(request, cert_hash):
             }, status=status.HTTP_404_NOT_FOUND)
         
         # Verify on blockchain
-        is_valid, student_name, course, institution, issue_date = verify_certificate_on_chain(cert_hash)
+        with rpc_deadline(VERIFY_DEADLINE):
+            is_valid, student_name, course, institution, issue_date = verify_certificate_on_chain(cert_hash)
         
         return Response({
             'certificate': cert_data,
@@ -81,7 +138,8 @@ def revoke_certificate_view(request, cert_hash):
             }, status=status.HTTP_404_NOT_FOUND)
         
         # Revoke on blockchain
-        tx_hash = revoke_certificate(cert_hash)
+        with rpc_deadline(ISSUE_DEADLINE):
+            tx_hash = revoke_certificate(certificate.cert_hash)
         
         # Update database
         certificate.status = 'revoked'
@@ -115,44 +173,213 @@ def admin_login(request):
         'error': 'Invalid credentials'
     }, status=status.HTTP_401_UNAUTHORIZED)
 
+def parse_date_param(value, end_of_day=False):
+    """A date or ISO datetime query parameter as an aware datetime"""
+    day = parse_date(value)
+    if day is not None:
+        parsed = datetime.combine(day, datetime.min.time())
+        if end_of_day:
+            parsed += timedelta(days=1)
+    else:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise ValueError(f"Invalid date: {value}")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+def parse_bool_param(value):
+    value = value.strip().lower()
+    if value in ('1', 'true', 'yes'):
+        return True
+    if value in ('0', 'false', 'no'):
+        return False
+    raise ValueError(f"Invalid boolean: {value}")
+
+def filter_certificate_list(params):
+    """
+    Certificates matching the list filters in params: institution, course,
+    revoked, status, date_from, date_to and search.
+    Raises ValueError for an invalid filter value.
+    """
+    certificates = Certificate.objects.all()
+
+    institution = params.get('institution', '')
+    course = params.get('course', '')
+    if institution:
+        certificates = certificates.filter(institution=institution)
+    if course:
+        certificates = certificates.filter(course=course)
+
+    revoked = params.get('revoked', '')
+    status_filter = params.get('status', '').lower()
+    if revoked:
+        certificates = certificates.filter(is_revoked=parse_bool_param(revoked))
+    elif status_filter in ('valid', 'active'):
+        certificates = certificates.filter(is_revoked=False)
+    elif status_filter == 'revoked':
+        certificates = certificates.filter(is_revoked=True)
+    elif status_filter:
+        raise ValueError(f"Invalid status: {status_filter}")
+
+    date_from = params.get('date_from', '')
+    date_to = params.get('date_to', '')
+    if date_from:
+        certificates = certificates.filter(issue_date__gte=parse_date_param(date_from))
+    if date_to:
+        certificates = certificates.filter(issue_date__lt=parse_date_param(date_to, end_of_day=True))
+
+    search = params.get('search', '')
+    if search:
+        if format_hash(search):
+            certificates = certificates.filter(cert_hash=search)
+        else:
+            certificates = filter_by_search(certificates, search)
+    return certificates
+
 @api_view(['GET'])
 def certificate_list_view(request):
     """
-    List all certificates, or filter by search criteria
+    List certificates newest first, one keyset page at a time.
+
+    Filters: institution, course, revoked (true/false), status (valid/revoked),
+    date_from, date_to and search (words of the student name, course or
+    institution, or an exact certificate hash).
+    Pass next_cursor back as ?cursor= for the following page; the total count
+    is only computed when include_count=true. ?fields=id,cert_hash,... limits
+    the keys returned for each certificate.
     """
     try:
-        search = request.GET.get('search', '')
-        type = request.GET.get('type', '')
-        status = request.GET.get('status', '')
-        date_from = request.GET.get('date_from', '')
-        date_to = request.GET.get('date_to', '')
-
-        certificates = Certificate.objects.all()
-
-        if search:
-            certificates = certificates.filter(
-                models.Q(holder_name__icontains=search) |
-                models.Q(cert_hash__icontains=search)
-            )
-        if type:
-            certificates = certificates.filter(certificate_type=type)
-        if status:
-            certificates = certificates.filter(status=status)
-        if date_from:
-            certificates = certificates.filter(issue_date__gte=date_from)
-        if date_to:
-            certificates = certificates.filter(issue_date__lte=date_to)
-
-        serializer = CertificateSerializer(certificates, many=True, context={'request': request})
-        return Response({
-            'results': serializer.data,
-            'count': certificates.count()
-        })
+        try:
+            certificates = filter_certificate_list(request.GET)
+            page_size = get_page_size(request.GET.get('page_size'))
+            row_serializer = CertificateRowSerializer(request, parse_fields(request.GET.get('fields')))
+            rows, next_cursor = paginate_keyset(row_serializer.values(certificates, 'issue_date', 'id'),
+                                                request.GET.get('cursor'), page_size)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        next_url = None
+        if next_cursor:
+            params = request.GET.copy()
+            params['cursor'] = next_cursor
+            next_url = request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+
+        data = {
+            'results': row_serializer.serialize(rows),
+            'next_cursor': next_cursor,
+            'next': next_url,
+            'page_size': page_size,
+        }
+        if request.GET.get('include_count', '').lower() in ('1', 'true', 'yes'):
+            data['count'] = certificates.count()
+        return Response(data)
     except Exception as e:
         return Response({
             'error': str(e)
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['GET'])
+def export_certificates_view(request):
+    """
+    Stream every certificate matching the list filters in id order.
+
+    ?output=ndjson (default) or csv, gzip=true for a gzip file, fields= to pick
+    columns, chain=true to add on-chain status from the local index.
+    Resume an interrupted export with ?after_id=<last id received>; the
+    X-Export-Last-Id header is the id the export ends at.
+    """
+    try:
+        after_id = request.GET.get('after_id', '')
+        export = CertificateExport(
+            filter_certificate_list(request.GET),
+            export_format=request.GET.get('output', FORMAT_NDJSON).lower(),
+            fields=parse_fields(request.GET.get('fields')),
+            include_chain=parse_bool_param(request.GET.get('chain', 'false')),
+            after_id=int(after_id) if after_id else 0,
+            compress=parse_bool_param(request.GET.get('gzip', 'false')),
+            request=request,
+        )
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    response = StreamingHttpResponse(export, content_type=export.content_type)
+    response['Content-Disposition'] = f'attachment; filename="{export.filename}"'
+    response['X-Export-Last-Id'] = str(export.last_id)
+    return response
+
+@api_view(['GET'])
+def search_certificates_view(request):
+    """
+    Full-text search over student name, course and institution, best match first.
+    The last word is matched as a prefix, so it can be called on every keystroke.
+    """
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = min(int(request.GET.get('limit', SEARCH_RESULTS_LIMIT)), SEARCH_RESULTS_MAX_LIMIT)
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        row_serializer = CertificateRowSerializer(request, parse_fields(request.GET.get('fields')))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if format_hash(query):
+        ids = list(Certificate.objects.filter(cert_hash=query).values_list('id', flat=True))
+    else:
+        ids = search_certificate_ids(query, limit)
+    rows = {row['id']: row for row in row_serializer.values(Certificate.objects.filter(id__in=ids), 'id')}
+    return Response({
+        'query': query,
+        'backend': get_search_backend(),
+        'results': row_serializer.serialize(rows[row_id] for row_id in ids if row_id in rows),
+    })
+
+@api_view(['GET'])
+def lookup_certificate_prefix_view(request):
+    """
+    Find certificates whose hash starts with ?prefix= (e.g. 0x3fa9), for
+    hashes copied off a printed certificate. Answered by a range scan of the
+    cert_hash index. Lists up to LOOKUP_MAX_CANDIDATES candidates; when
+    there are more, 'truncated' is set and a longer prefix is needed.
+    """
+    prefix = request.GET.get('prefix', '').strip()
+    digits = prefix[2:] if prefix.lower().startswith('0x') else prefix
+    if len(digits) < LOOKUP_MIN_PREFIX:
+        return Response({'error': f'prefix must have at least {LOOKUP_MIN_PREFIX} hex characters'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    try:
+        lowest, upper = hash_prefix_range(digits)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    matches = Certificate.objects.filter(cert_hash__gte=lowest)
+    if upper:
+        matches = matches.filter(cert_hash__lt=upper)
+    candidates = list(
+        matches.order_by('cert_hash')
+        .only('cert_hash', 'student_name', 'course', 'institution', 'issue_date', 'is_revoked')
+        [:LOOKUP_MAX_CANDIDATES + 1]
+    )
+    truncated = len(candidates) > LOOKUP_MAX_CANDIDATES
+    candidates = candidates[:LOOKUP_MAX_CANDIDATES]
+
+    return Response({
+        'prefix': '0x' + digits.lower(),
+        'unique': len(candidates) == 1,
+        'truncated': truncated,
+        'candidates': [{
+            'cert_hash': certificate.cert_hash,
+            'student_name': certificate.student_name,
+            'course': certificate.course,
+            'institution': certificate.institution,
+            'issue_date': certificate.issue_date,
+            'is_revoked': certificate.is_revoked,
+            'verify_url': request.build_absolute_uri(reverse('verify_certificate', args=[certificate.cert_hash])),
+        } for certificate in candidates],
+    })
+
 class IssueCertificateView(APIView):
     def post(self, request):
         """
@@ -238,17 +465,45 @@ class IssueCertificateView(APIView):
             # Save datetime for DB record
             issue_date_dt = timezone.make_aware(datetime.strptime(issue_date, '%Y-%m-%d'))
 
-            # --- Blockchain call ---
-            try:
-                tx_result = issue_certificate(student_name, course, institution, issue_date_timestamp)
-                tx_hash = tx_result['transaction_hash']    # blockchain transaction hash
-                cert_hash = tx_result['cert_hash']        # certificate hash for verification
-            except Exception as blockchain_error:
-                print(f"Blockchain error: {str(blockchain_error)}")
-                return Response({'error': f'Blockchain transaction failed: {blockchain_error}'},
-                                status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            # --- Persist the certificate as pending before submitting it ---
+            cert_hash = compute_certificate_hash(student_name, course, institution, issue_date_timestamp)
+            status_url = request.build_absolute_uri(reverse('issuance_status', args=[cert_hash]))
+
+            existing = Certificate.objects.filter(cert_hash=cert_hash).first()
+            if existing is not None:
+                if existing.chain_status != Certificate.CHAIN_STATUS_FAILED:
+                    return Response({'error': 'Certificate with this data already exists',
+                                     'cert_hash': cert_hash,
+                                     'status_url': status_url},
+                                    status=status.HTTP_409_CONFLICT)
+                # A previously failed issuance can be retried
+                existing.delete()
+
+            chain_status = Certificate.CHAIN_STATUS_QUEUED if is_merkle_mode() else Certificate.CHAIN_STATUS_PENDING
+            if BACKGROUND_JOBS:
+                # The transaction, QR code and PDF hash are left to manage.py run_workers
+                with transaction.atomic():
+                    certificate = Certificate.objects.create(
+                        student_name=student_name,
+                        course=course,
+                        institution=institution,
+                        issue_date=issue_date_dt,
+                        cert_hash=cert_hash,
+                        certificate_pdf=certificate_pdf,
+                        chain_status=chain_status
+                    )
+                    jobs = queue_issuance_jobs(certificate, issue_date_timestamp)
+                return Response({
+                    'cert_hash': cert_hash,
+                    'transaction_hash': None,
+                    'status': certificate.chain_status,
+                    'status_url': status_url,
+                    'qr_code_url': None,
+                    'jobs': {name: job.id for name, job in jobs.items()},
+                    'certificate': CertificateSerializer(certificate, context={'request': request}).data,
+                    'message': 'Certificate queued for issuance'
+                }, status=status.HTTP_202_ACCEPTED)
 
-            # --- Create DB record using certificate hash ---
             certificate = Certificate.objects.create(
                 student_name=student_name,
                 course=course,
@@ -256,9 +511,33 @@ class IssueCertificateView(APIView):
                 issue_date=issue_date_dt,
                 cert_hash=cert_hash,  # Use certificate hash, not transaction hash
                 certificate_pdf=certificate_pdf,
-                ipfs_hash=tx_result.get('ipfs_hash', '')
+                chain_status=chain_status
             )
 
+            # --- Blockchain call: submit only, the receipt is tracked in the background ---
+            # In Merkle anchoring mode the certificate waits for the next anchored root instead
+            try:
+                if is_merkle_mode():
+                    tx_result = {'transaction_hash': None, 'ipfs_hash': None}
+                else:
+                    with rpc_deadline(ISSUE_DEADLINE):
+                        tx_result = submit_certificate(student_name, course, institution, issue_date_timestamp)
+            except Exception as blockchain_error:
+                print(f"Blockchain error: {str(blockchain_error)}")
+                certificate.chain_status = Certificate.CHAIN_STATUS_FAILED
+                certificate.chain_error = str(blockchain_error)
+                certificate.save(update_fields=['chain_status', 'chain_error'])
+                return Response({'error': f'Blockchain transaction failed: {blockchain_error}'},
+                                status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+            tx_hash = tx_result['transaction_hash']    # blockchain transaction hash
+            certificate.transaction_hash = tx_hash
+            certificate.ipfs_hash = tx_result.get('ipfs_hash', '')
+            certificate.pending_since = timezone.now()
+            certificate.save(update_fields=['transaction_hash', 'ipfs_hash', 'pending_since'])
+            if tx_hash:
+                receipt_tracker.track()
+
             # Generate QR code for the certificate
             try:
                 qr_code_file = generate_qr_code(cert_hash)
@@ -272,16 +551,49 @@ class IssueCertificateView(APIView):
             return Response({
                 'cert_hash': cert_hash,
                 'transaction_hash': tx_hash,
+                'status': certificate.chain_status,
+                'status_url': status_url,
                 'qr_code_url': certificate.qr_code.url if certificate.qr_code else None,
                 'certificate': CertificateSerializer(certificate, context={'request': request}).data,
-                'message': 'Certificate issued successfully'
-            }, status=status.HTTP_201_CREATED)
+                'message': 'Certificate submitted to the blockchain'
+            }, status=status.HTTP_202_ACCEPTED)
 
         except Exception as e:
             print(f"Error in certificate issuance: {str(e)}")
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['GET'])
+def issuance_status_view(request, cert_hash):
+    """
+    Report whether a certificate's issuance transaction has been confirmed
+    """
+    cert_hash = format_hash(cert_hash)
+    if cert_hash is None:
+        return Response({'error': 'Invalid certificate hash: expected 64 hex characters'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    try:
+        certificate = Certificate.objects.get(cert_hash=cert_hash)
+    except Certificate.DoesNotExist:
+        return Response({'error': 'Certificate not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    # Resolve the receipt now in case no tracker is running for this row
+    if certificate.chain_status == Certificate.CHAIN_STATUS_PENDING and certificate.transaction_hash:
+        try:
+            with rpc_deadline(VERIFY_DEADLINE):
+                apply_receipts([certificate])
+        except Exception as e:
+            print(f"Could not check transaction receipt: {str(e)}")
+
+    return Response({
+        'cert_hash': certificate.cert_hash,
+        'status': certificate.chain_status,
+        'transaction_hash': certificate.transaction_hash,
+        'failure_reason': certificate.chain_error,
+        'certificate': CertificateSerializer(certificate, context={'request': request}).data,
+    })
+
+
 @api_view(['POST'])
 def issue_certificate_view(request):
     """
@@ -302,12 +614,13 @@ def issue_certificate_view(request):
             return Response({'error': 'issue_date must be a valid integer timestamp'},
                             status=status.HTTP_400_BAD_REQUEST)
 
-        result = issue_certificate(
-            request.data.get('student_name'),
-            request.data.get('course'),
-            request.data.get('institution'),
-            timestamp
-        )
+        with rpc_deadline(ISSUE_DEADLINE):
+            result = issue_certificate(
+                request.data.get('student_name'),
+                request.data.get('course'),
+                request.data.get('institution'),
+                timestamp
+            )
 
         if not result.get('transaction_hash'):
             return Response({'error': 'Failed to issue certificate on blockchain'},
@@ -334,6 +647,38 @@ def issue_certificate_view(request):
         return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
 
+def build_verification_response(certificate, blockchain_result, blockchain_error, request):
+    """
+    Build the verification body shared by single and batch verification
+    """
+    database_valid = not certificate.is_revoked
+    # Certificate is valid if:
+    # 1. Not revoked in database AND
+    # 2. Found on blockchain (blockchain_result is not None)
+    overall_valid = database_valid and (blockchain_result is not None)
+
+    response_data = {
+        'certificate': CertificateSerializer(certificate, context={'request': request}).data,
+        'is_valid': overall_valid,
+        'blockchain_valid': bool(blockchain_result),
+        'database_valid': database_valid,
+    }
+
+    if blockchain_result:
+        response_data['blockchain_details'] = {
+            'student_name': str(blockchain_result[1]) if blockchain_result[1] else '',
+            'course': str(blockchain_result[2]) if blockchain_result[2] else '',
+            'institution': str(blockchain_result[3]) if blockchain_result[3] else '',
+            'issue_date': int(blockchain_result[4]) if blockchain_result[4] else 0
+        }
+
+    if blockchain_error:
+        response_data['failure_reason'] = blockchain_error
+        response_data['note'] = "Certificate exists in the database but couldn't be verified on the blockchain."
+
+    return response_data
+
+
 @api_view(['GET'])
 def verify_certificate_view(request, cert_hash):
     """
@@ -341,8 +686,14 @@ def verify_certificate_view(request, cert_hash):
     """
     try:
         print(f"Attempting to verify certificate: {cert_hash}")
-        if not cert_hash.startswith('0x'):
-            cert_hash = '0x' + cert_hash
+        if format_hash(cert_hash) is None:
+            return Response({'error': 'Invalid certificate hash: expected 64 hex characters'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        cert_hash = format_hash(cert_hash)
+
+        # Hashes that were never issued are turned away without a full lookup or a chain call
+        if not known_hashes.might_contain(cert_hash):
+            return Response({'error': 'Certificate not found'}, status=status.HTTP_404_NOT_FOUND)
 
         try:
             certificate = Certificate.objects.get(cert_hash=cert_hash)
@@ -350,15 +701,14 @@ def verify_certificate_view(request, cert_hash):
         except Certificate.DoesNotExist:
             return Response({'error': 'Certificate not found'}, status=status.HTTP_404_NOT_FOUND)
 
-        blockchain_valid = False
         blockchain_result = None
         blockchain_error = None
 
         try:
             print(f"Attempting blockchain verification for: {cert_hash}")
-            blockchain_result = verify_certificate_on_chain(cert_hash)
+            with rpc_deadline(VERIFY_DEADLINE):
+                blockchain_result = verify_certificate_record(certificate)
             if blockchain_result:
-                blockchain_valid = True
                 print(f"✅ Certificate found on blockchain - marked as valid")
                 print(f"   Blockchain data: {blockchain_result}")
             else:
@@ -371,44 +721,165 @@ def verify_certificate_view(request, cert_hash):
             import traceback
             traceback.print_exc()
 
-        database_valid = not certificate.is_revoked
-        # Certificate is valid if:
-        # 1. Not revoked in database AND
-        # 2. Found on blockchain (blockchain_result is not None)
-        overall_valid = database_valid and (blockchain_result is not None)
-        
+        response_data = build_verification_response(certificate, blockchain_result, blockchain_error, request)
+
         print(f"✅ VERIFICATION RESULT:")
-        print(f"   database_valid (not is_revoked): {database_valid}")
+        print(f"   database_valid (not is_revoked): {response_data['database_valid']}")
         print(f"   blockchain_result found: {blockchain_result is not None}")
-        print(f"   overall_valid: {overall_valid}")
+        print(f"   overall_valid: {response_data['is_valid']}")
 
-        response_data = {
-            'certificate': CertificateSerializer(certificate, context={'request': request}).data,
-            'is_valid': overall_valid,
-            'blockchain_valid': blockchain_valid if blockchain_result else False,
-            'database_valid': database_valid,
-        }
+        return Response(response_data, status=status.HTTP_200_OK)
 
-        if blockchain_result:
-            response_data['blockchain_details'] = {
-                'student_name': str(blockchain_result[1]) if blockchain_result[1] else '',
-                'course': str(blockchain_result[2]) if blockchain_result[2] else '',
-                'institution': str(blockchain_result[3]) if blockchain_result[3] else '',
-                'issue_date': int(blockchain_result[4]) if blockchain_result[4] else 0
-            }
+    except Exception as e:
+        print(f"Unexpected error during verification: {str(e)}")
+        return Response({'error': f'Unexpected error during verification: {str(e)}'},
+                        status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        if blockchain_error:
-            response_data['failure_reason'] = blockchain_error
-            response_data['note'] = "Certificate exists in the database but couldn't be verified on the blockchain."
 
-        return Response(response_data, status=status.HTTP_200_OK)
+@api_view(['POST'])
+def verify_certificate_details_view(request):
+    """
+    Verify a certificate from the details printed on it instead of its hash.
+    Expects student_name, course, institution and issue_date (YYYY-MM-DD),
+    plus optionally issue_date_timestamp (exact) or timezone (IANA name) to
+    narrow down the timestamp the date was hashed with.
+    """
+    student_name = request.data.get('studentName') or request.data.get('student_name')
+    course = request.data.get('course')
+    institution = request.data.get('institution')
+    issue_date = request.data.get('issueDate') or request.data.get('issue_date')
+    issue_date_timestamp = request.data.get('issueDateTimestamp') or request.data.get('issue_date_timestamp')
+    tz_name = request.data.get('timezone')
+
+    missing_fields = [name for name, value in (('student_name', student_name), ('course', course),
+                                               ('institution', institution)) if not value]
+    if not issue_date and not issue_date_timestamp:
+        missing_fields.append('issue_date')
+    if missing_fields:
+        return Response({'error': f'Missing required fields: {", ".join(missing_fields)}'},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        if issue_date_timestamp:
+            timestamps = [int(issue_date_timestamp)]
+        else:
+            timestamps = issue_date_candidates(datetime.strptime(str(issue_date), '%Y-%m-%d').date(), tz_name)
+    except (ValueError, TypeError, LookupError) as e:
+        return Response({'error': f'Invalid issue date or timezone: {str(e)}'},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        certificate, timestamp = find_certificate_by_details(student_name, course, institution, timestamps)
+        if certificate is None:
+            return Response({'error': 'Certificate not found',
+                             'candidates_checked': len(timestamps)}, status=status.HTTP_404_NOT_FOUND)
 
+        blockchain_result = None
+        blockchain_error = None
+        try:
+            with rpc_deadline(VERIFY_DEADLINE):
+                blockchain_result = verify_certificate_record(certificate)
+            if not blockchain_result:
+                blockchain_error = "Certificate does not exist on blockchain"
+        except Exception as e:
+            blockchain_error = str(e)
+            print(f"❌ Blockchain verification error: {blockchain_error}")
+
+        response_data = build_verification_response(certificate, blockchain_result, blockchain_error, request)
+        response_data['cert_hash'] = certificate.cert_hash
+        response_data['matched_timestamp'] = timestamp
+        response_data['candidates_checked'] = len(timestamps)
+        return Response(response_data, status=status.HTTP_200_OK)
     except Exception as e:
         print(f"Unexpected error during verification: {str(e)}")
         return Response({'error': f'Unexpected error during verification: {str(e)}'},
                         status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['POST'])
+def verify_certificates_batch_view(request):
+    """
+    Verify many certificates at once.
+    Expects {"cert_hashes": [...]} and returns one result per hash in the
+    same shape as verify_certificate_view.
+    """
+    try:
+        cert_hashes = request.data.get('cert_hashes') or request.data.get('hashes')
+        if not isinstance(cert_hashes, list) or not cert_hashes:
+            return Response({'error': 'cert_hashes must be a non-empty list'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(cert_hashes) > VERIFY_BATCH_MAX_HASHES:
+            return Response({'error': f'At most {VERIFY_BATCH_MAX_HASHES} hashes can be verified per request'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        # Normalise and de-duplicate while keeping the caller's order
+        normalized = []
+        for cert_hash in cert_hashes:
+            cert_hash = str(cert_hash)
+            normalized.append(format_hash(cert_hash) or cert_hash)
+        unique_hashes = list(dict.fromkeys(normalized))
+
+        certificates = Certificate.objects.in_bulk(unique_hashes, field_name='cert_hash')
+
+        # Anchored and already-indexed certificates are answered without a contract call
+        chain_results = verify_certificate_records(certificates.values(), VERIFY_DEADLINE)
+
+        results = []
+        for cert_hash in unique_hashes:
+            certificate = certificates.get(cert_hash)
+            if certificate is None:
+                results.append({'cert_hash': cert_hash, 'error': 'Certificate not found'})
+                continue
+            blockchain_result, blockchain_error = chain_results[cert_hash]
+            result = build_verification_response(certificate, blockchain_result, blockchain_error, request)
+            result['cert_hash'] = cert_hash
+            results.append(result)
+
+        return Response({
+            'results': results,
+            'count': len(results),
+            'found': len(certificates),
+        }, status=status.HTTP_200_OK)
+
+    except Exception as e:
+        print(f"Unexpected error during batch verification: {str(e)}")
+        return Response({'error': f'Unexpected error during verification: {str(e)}'},
+                        status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+def verify_certificates_bulk_view(request):
+    """
+    Verify every row of a CSV file, streaming results a chunk at a time.
+    Send the file as the multipart field 'file' or as the request body with
+    Content-Type: text/csv. Rows give a cert_hash, or student_name, course,
+    institution and issue_date. ?output=ndjson (default, with progress lines)
+    or csv.
+    """
+    try:
+        if request.content_type.startswith('text/csv'):
+            # Received in full before responding; the stream is not readable once the response starts
+            lines = spool_body(request._request)
+        else:
+            lines = request.FILES.get('file')
+            if lines is None:
+                return Response({'error': "Upload a CSV file as 'file' or send it with Content-Type: text/csv"},
+                                status=status.HTTP_400_BAD_REQUEST)
+        verification = BulkVerification(
+            lines,
+            export_format=request.GET.get('output', FORMAT_NDJSON).lower(),
+            deadline=VERIFY_DEADLINE,
+        )
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        print(f"Unexpected error during bulk verification: {str(e)}")
+        return Response({'error': f'Unexpected error during verification: {str(e)}'},
+                        status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    return StreamingHttpResponse(verification, content_type=verification.content_type)
+
+
 @api_view(['POST'])
 def admin_login(request):
     username = request.data.get('username')
@@ -422,15 +893,39 @@ def admin_login(request):
 
 @api_view(['POST'])
 def revoke_certificate_view(request, cert_hash):
+    """
+    Send the revocation transaction and return 202; the receipt tracker marks
+    the certificate revoked once the transaction is confirmed.
+    """
     try:
         certificate = Certificate.objects.get(cert_hash=cert_hash)
-        revoke_certificate(cert_hash)
-        certificate.is_revoked = True
-        certificate.save()
+        # Claim the row so two requests cannot both send a revocation
+        claimed = Certificate.objects.filter(id=certificate.id, is_revoked=False).exclude(
+            revocation_status=Certificate.REVOCATION_STATUS_PENDING
+        ).update(revocation_status=Certificate.REVOCATION_STATUS_PENDING, revocation_tx_hash=None,
+                 revocation_pending_since=timezone.now(), revocation_error=None,
+                 revocation_block_number=None, revocation_block_hash=None)
+        if not claimed:
+            return Response({'error': 'Certificate is already revoked or its revocation is pending'},
+                            status=status.HTTP_409_CONFLICT)
+        try:
+            # The stored hash is canonical; the URL may differ in case or prefix
+            with rpc_deadline(ISSUE_DEADLINE):
+                tx_hash = submit_revocation(certificate.cert_hash, anchored=bool(certificate.merkle_root))
+        except Exception as e:
+            Certificate.objects.filter(id=certificate.id).update(
+                revocation_status=Certificate.REVOCATION_STATUS_FAILED, revocation_error=str(e))
+            raise
+        Certificate.objects.filter(id=certificate.id).update(
+            revocation_tx_hash=tx_hash, revocation_pending_since=timezone.now())
+        receipt_tracker.track()
+        certificate.refresh_from_db()
         return Response({
-            'message': 'Certificate revoked successfully',
+            'message': 'Revocation submitted to the blockchain',
+            'status': certificate.revocation_status,
+            'transaction_hash': tx_hash,
             'certificate': CertificateSerializer(certificate, context={'request': request}).data
-        }, status=status.HTTP_200_OK)
+        }, status=status.HTTP_202_ACCEPTED)
     except Certificate.DoesNotExist:
         return Response({'error': 'Certificate not found'}, status=status.HTTP_404_NOT_FOUND)
     except Exception as e:
@@ -485,7 +980,7 @@ def verify_by_qr_code(request):
         
         # Now verify the certificate using the decoded hash
         try:
-            certificate = Certificate.objects.get(cert_hash=f'0x{cert_hash}')
+            certificate = Certificate.objects.get(cert_hash=cert_hash)
             cert_data = CertificateSerializer(certificate, context={'request': request}).data
         except Certificate.DoesNotExist:
             return Response({
@@ -501,7 +996,8 @@ def verify_by_qr_code(request):
         issue_date = 0
         
         try:
-            blockchain_result = verify_certificate_on_chain(f'0x{cert_hash}')
+            with rpc_deadline(VERIFY_DEADLINE):
+                blockchain_result = verify_certificate_record(certificate)
             if blockchain_result:
                 is_valid, student_name, course, institution, issue_date = blockchain_result
                 # If certificate is found on blockchain, it's valid
@@ -11,6 +11,7 @@ import {
     IconButton,
     useTheme,
     Typography,
+    alpha,
 } from '@mui/material';
 import FilterListIcon from '@mui/icons-material/FilterList';
 import CloseIcon from '@mui/icons-material/Close';
@@ -18,7 +19,8 @@ import CloseIcon from '@mui/icons-material/Close';
 const CertificateFilters = ({ onFilterChange }) => {
     const theme = useTheme();
     const [filters, setFilters] = useState({
-        type: '',
+        institution: '',
+        course: '',
         status: '',
         dateFrom: '',
         dateTo: '',
@@ -62,19 +64,18 @@ const CertificateFilters = ({ onFilterChange }) => {
             </Box>
 
             <Stack direction={{ xs: 'column', sm: 'row' }} spacing={2} sx={{ mb: 2 }}>
-                <FormControl sx={{ minWidth: 120 }}>
-                    <InputLabel>Type</InputLabel>
-                    <Select
-                        value={filters.type}
-                        label="Type"
-                        onChange={(e) => handleFilterChange('type', e.target.value)}
-                    >
-                        <MenuItem value="">All</MenuItem>
-                        <MenuItem value="academic">Academic</MenuItem>
-                        <MenuItem value="professional">Professional</MenuItem>
-                        <MenuItem value="achievement">Achievement</MenuItem>
-                    </Select>
-                </FormControl>
+                {/* The backend matches institution and course names exactly */}
+                <TextField
+                    label="Institution"
+                    value={filters.institution}
+                    onChange={(e) => handleFilterChange('institution', e.target.value)}
+                />
+
+                <TextField
+                    label="Course"
+                    value={filters.course}
+                    onChange={(e) => handleFilterChange('course', e.target.value)}
+                />
 
                 <FormControl sx={{ minWidth: 120 }}>
                     <InputLabel>Status</InputLabel>
@@ -85,7 +86,6 @@ const CertificateFilters = ({ onFilterChange }) => {
                     >
                         <MenuItem value="">All</MenuItem>
                         <MenuItem value="valid">Valid</MenuItem>
-                        <MenuItem value="expired">Expired</MenuItem>
                         <MenuItem value="revoked">Revoked</MenuItem>
                     </Select>
                 </FormControl>
@@ -7,6 +7,7 @@ import {
     CardContent,
     Grid,
     Pagination,
+    PaginationItem,
     CircularProgress,
     Alert,
 } from '@mui/material';
@@ -20,9 +21,12 @@ const CertificateList = () => {
     const [error, setError] = useState(null);
     const [page, setPage] = useState(1);
     const [totalPages, setTotalPages] = useState(1);
+    // cursors[i] fetches page i + 1; pages are reached one step at a time
+    const [cursors, setCursors] = useState(['']);
     const [searchTerm, setSearchTerm] = useState('');
     const [filters, setFilters] = useState({
-        type: '',
+        institution: '',
+        course: '',
         status: '',
         dateFrom: '',
         dateTo: '',
@@ -32,14 +36,22 @@ const CertificateList = () => {
         try {
             setLoading(true);
             setError(null);
-            // TODO: Replace with actual API call
             const response = await fetchCertificates({
-                page,
+                cursor: cursors[page - 1],
                 searchTerm,
                 ...filters,
             });
             setCertificates(response.data);
-            setTotalPages(response.totalPages);
+            setCursors((previous) => {
+                const next = previous.slice(0, page);
+                if (response.nextCursor) {
+                    next[page] = response.nextCursor;
+                }
+                return next;
+            });
+            if (response.totalPages !== undefined) {
+                setTotalPages(Math.max(1, response.totalPages));
+            }
         } catch (err) {
             setError('Failed to load certificates. Please try again later.');
             console.error('Error loading certificates:', err);
@@ -54,16 +66,20 @@ const CertificateList = () => {
 
     const handleSearch = (term) => {
         setSearchTerm(term);
+        setCursors(['']);
         setPage(1); // Reset to first page when searching
     };
 
     const handleFilterChange = (newFilters) => {
         setFilters(newFilters);
+        setCursors(['']);
         setPage(1); // Reset to first page when filters change
     };
 
     const handlePageChange = (event, value) => {
-        setPage(value);
+        if (value <= cursors.length) {
+            setPage(value);
+        }
     };
 
     return (
@@ -95,16 +111,19 @@ const CertificateList = () => {
                                 <Card>
                                     <CardContent>
                                         <Typography variant="h6" gutterBottom>
-                                            {certificate.title}
+                                            {certificate.student_name}
+                                        </Typography>
+                                        <Typography color="textSecondary" gutterBottom>
+                                            Course: {certificate.course}
                                         </Typography>
                                         <Typography color="textSecondary" gutterBottom>
-                                            Type: {certificate.type}
+                                            Institution: {certificate.institution}
                                         </Typography>
                                         <Typography color="textSecondary" gutterBottom>
-                                            Status: {certificate.status}
+                                            Status: {certificate.is_revoked ? 'Revoked' : 'Valid'}
                                         </Typography>
                                         <Typography color="textSecondary">
-                                            Issue Date: {new Date(certificate.issueDate).toLocaleDateString()}
+                                            Issue Date: {new Date(certificate.issue_date).toLocaleDateString()}
                                         </Typography>
                                     </CardContent>
                                 </Card>
@@ -127,6 +146,12 @@ const CertificateList = () => {
                                 page={page}
                                 onChange={handlePageChange}
                                 color="primary"
+                                renderItem={(item) => (
+                                    <PaginationItem
+                                        {...item}
+                                        disabled={item.disabled || item.page > cursors.length}
+                                    />
+                                )}
                             />
                         </Box>
                     )}
@@ -1,11 +1,15 @@
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL || 'http://localhost:8000';
 
-export const fetchCertificates = async ({ page = 1, searchTerm = '', type = '', status = '', dateFrom = '', dateTo = '' }) => {
+// The list is paged with cursors: pass the nextCursor of a page to get the one after it.
+// The total count is only asked for on the first page, where it costs the backend a COUNT query.
+export const fetchCertificates = async ({ cursor = '', pageSize = 10, searchTerm = '', institution = '', course = '', status = '', dateFrom = '', dateTo = '' }) => {
     try {
         const queryParams = new URLSearchParams({
-            page,
+            page_size: pageSize,
             search: searchTerm,
-            ...(type && { type }),
+            ...(cursor ? { cursor } : { include_count: 'true' }),
+            ...(institution && { institution }),
+            ...(course && { course }),
             ...(status && { status }),
             ...(dateFrom && { date_from: dateFrom }),
             ...(dateTo && { date_to: dateTo }),
@@ -25,7 +29,8 @@ export const fetchCertificates = async ({ page = 1, searchTerm = '', type = '',
         const data = await response.json();
         return {
             data: data.results,
-            totalPages: Math.ceil(data.count / 10), // Assuming 10 items per page
+            nextCursor: data.next_cursor,
+            totalPages: data.count !== undefined ? Math.ceil(data.count / pageSize) : undefined,
             totalCount: data.count,
         };
     } catch (error) {
@@ -25,6 +25,33 @@ contract CertificateVerification {
         return certHash;
     }
 
+    // Batch version of issueCertificate for issuing a whole cohort in one
+    // transaction. Certificates that already exist are skipped rather than
+    // reverting the batch; only new ones emit CertificateIssued.
+    function issueCertificates(
+        string[] memory _studentNames,
+        string[] memory _courses,
+        string[] memory _institutions,
+        uint256[] memory _issueDates
+    ) public returns (uint256 issued) {
+        uint256 count = _studentNames.length;
+        require(
+            _courses.length == count && _institutions.length == count && _issueDates.length == count,
+            "Input arrays must have the same length!"
+        );
+
+        for (uint256 i = 0; i < count; i++) {
+            bytes32 certHash = keccak256(abi.encodePacked(_studentNames[i], _courses[i], _institutions[i], _issueDates[i]));
+            if (certificates[certHash].issueDate != 0 || _issueDates[i] == 0) {
+                continue;
+            }
+
+            certificates[certHash] = Certificate(_studentNames[i], _courses[i], _institutions[i], _issueDates[i], true);
+            emit CertificateIssued(certHash, _studentNames[i], _courses[i], _institutions[i], _issueDates[i]);
+            issued++;
+        }
+    }
+
     function verifyCertificate(bytes32 _certHash) public view returns (bool, string memory, string memory, string memory, uint256) {
         Certificate memory cert = certificates[_certHash];
         require(cert.issueDate != 0, "Certificate not found!");
@@ -32,6 +59,77 @@ contract CertificateVerification {
         return (cert.isValid, cert.studentName, cert.course, cert.institution, cert.issueDate);
     }
 
+    // Batch lookup status codes
+    uint8 public constant STATUS_NOT_FOUND = 0;
+    uint8 public constant STATUS_VALID = 1;
+    uint8 public constant STATUS_REVOKED = 2;
+
+    // Non-reverting batch version of verifyCertificate. Missing certificates get
+    // STATUS_NOT_FOUND and empty fields instead of failing the whole call.
+    function verifyCertificates(bytes32[] memory _certHashes) public view returns (
+        uint8[] memory statuses,
+        string[] memory studentNames,
+        string[] memory courses,
+        string[] memory institutions,
+        uint256[] memory issueDates
+    ) {
+        uint256 count = _certHashes.length;
+        statuses = new uint8[](count);
+        studentNames = new string[](count);
+        courses = new string[](count);
+        institutions = new string[](count);
+        issueDates = new uint256[](count);
+
+        for (uint256 i = 0; i < count; i++) {
+            Certificate storage cert = certificates[_certHashes[i]];
+            if (cert.issueDate == 0) {
+                continue;
+            }
+            statuses[i] = cert.isValid ? STATUS_VALID : STATUS_REVOKED;
+            studentNames[i] = cert.studentName;
+            courses[i] = cert.course;
+            institutions[i] = cert.institution;
+            issueDates[i] = cert.issueDate;
+        }
+    }
+
+    // Merkle anchoring mode: only the root of a batch of certificate hashes is
+    // stored. Leaves are keccak256(certHash) and pairs are hashed in sorted order.
+    mapping(bytes32 => uint256) public anchoredRoots;
+    mapping(bytes32 => bool) public revokedCertificates;
+
+    event RootAnchored(bytes32 indexed root, uint256 certificateCount, uint256 anchoredAt);
+    // Separate from CertificateRevoked so indexers only apply it to anchored certificates
+    event AnchoredCertificateRevoked(bytes32 indexed certHash);
+
+    function anchorRoot(bytes32 _root, uint256 _certificateCount) public {
+        require(_root != bytes32(0), "Invalid root!");
+        require(anchoredRoots[_root] == 0, "Root already anchored!");
+        anchoredRoots[_root] = block.timestamp;
+
+        emit RootAnchored(_root, _certificateCount, block.timestamp);
+    }
+
+    function verifyAnchoredCertificate(bytes32 _certHash, bytes32 _root, bytes32[] memory _proof) public view returns (bool anchored, bool revoked) {
+        bytes32 node = keccak256(abi.encodePacked(_certHash));
+        for (uint256 i = 0; i < _proof.length; i++) {
+            node = node < _proof[i]
+                ? keccak256(abi.encodePacked(node, _proof[i]))
+                : keccak256(abi.encodePacked(_proof[i], node));
+        }
+        anchored = node == _root && anchoredRoots[_root] != 0;
+        revoked = revokedCertificates[_certHash];
+    }
+
+    function revokeAnchoredCertificate(bytes32 _certHash) public {
+        // Individually issued certificates are revoked with revokeCertificate
+        require(!certificates[_certHash].isValid, "Certificate was issued individually!");
+        require(!revokedCertificates[_certHash], "Certificate is already revoked!");
+        revokedCertificates[_certHash] = true;
+
+        emit AnchoredCertificateRevoked(_certHash);
+    }
+
     function revokeCertificate(bytes32 _certHash) public {
         require(certificates[_certHash].isValid, "Certificate does not exist or is already revoked!");
         certificates[_certHash].isValid = false;